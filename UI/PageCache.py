@@ -0,0 +1,24 @@
+from collections import OrderedDict
+
+
+class PageCache:
+    # tiny LRU for pages a view already fetched, so back/forward clicks dont hit the db again.
+    # the views also keep their rendered pages in one, keyed (page, data version)
+    def __init__(self, size: int = 5):
+        self.size = size
+        self.pages = OrderedDict()
+
+    def get(self, page):
+        if page not in self.pages:
+            return None
+        self.pages.move_to_end(page)
+        return self.pages[page]
+
+    def put(self, page, data):
+        self.pages[page] = data
+        self.pages.move_to_end(page)
+        if len(self.pages) > self.size:
+            self.pages.popitem(last=False)
+
+    def clear(self):
+        self.pages.clear()
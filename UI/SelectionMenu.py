@@ -1,7 +1,10 @@
+import asyncio
 import discord
 from discord.ext import commands
 from typing import List, Union, Callable
 from services.settings_service import Setting_Service
+from services.shard_router import enter_guild, hold_guild
+from UI.PageCache import PageCache
 
 class SelectionMenu(discord.ui.View):
     def __init__(
@@ -10,16 +13,42 @@ class SelectionMenu(discord.ui.View):
         setting_service: Setting_Service,
         items: List[Union[str, dict]],
         title: str = "Select an item",
-        timeout: int = None
+        timeout: int = None,
+        fetch_page: Callable = None,
+        total: int = None,
+        guild_id: int = None
     ):
         super().__init__(timeout=timeout)
         self.bot = bot
         self.items = items
         self.title = title
-        self.items_per_page = setting_service.pagination
+        self.items_per_page = setting_service.page_size(guild_id)
+        self.setting_service = setting_service
+        self.guild_id = guild_id
         self.on_select: Callable = None
         self.current_page = 0
 
+        # lazy mode, same as PaginatedTable: items is only the current page and
+        # fetch_page(page) awaits a Result with data {"items", "total"}. seen pages stay in an LRU
+        self.fetch_page = fetch_page
+        # fetch_page holds on to the services of this guild's shard, keep it open until the view times out
+        self.release_shard = hold_guild(guild_id) if fetch_page is not None else None
+        self.total = total if fetch_page is not None else len(items)
+        self.page_cache = PageCache()
+        # embed text per (page, data version) and one button per slot made once, so a page turn
+        # only relabels what is already there. version changes when a page gets fetched again
+        self.render_cache = PageCache(size=10)
+        self.slot_buttons = []
+        self.version = 0
+        self.page_version = 0
+        # same as PaginatedTable, only the in memory slices follow a page size change
+        self.unsubscribe = None
+        if fetch_page is not None:
+            self.page_cache.put(0, (self.version, {"items": items, "total": total}))
+        else:
+            self.loop = asyncio.get_running_loop()
+            self.unsubscribe = setting_service.subscribe(self.on_settings_change)
+
         # Buttons
         self.previous_button = discord.ui.Button(label="⬅️", style=discord.ButtonStyle.secondary)
         self.next_button = discord.ui.Button(label="➡️", style=discord.ButtonStyle.secondary)
@@ -34,48 +63,82 @@ class SelectionMenu(discord.ui.View):
         # Add item buttons dynamically in build_buttons()
         self.build_buttons()
 
-    def build_buttons(self):
-        # Remove old item buttons except navigation
-        self.clear_items()
-        
+    def on_settings_change(self, guild_id, settings):
+        # db thread, hop to the loop before touching the view
+        size = self.setting_service.page_size(self.guild_id)
+        if size != self.items_per_page:
+            self.loop.call_soon_threadsafe(self.set_page_size, size)
+
+    def set_page_size(self, size):
+        # cached text and the slot buttons are per page number, re-slice from the first item on screen
+        first_item = self.current_page * self.items_per_page
+        self.items_per_page = size
+        self.render_cache = PageCache(size=10)
+        self.current_page = min(first_item // size, self.last_page())
+        self.build_buttons()
+
+    def page_items(self):
+        if self.fetch_page is not None:
+            return self.items
+
         start_index = self.current_page * self.items_per_page
         end_index = start_index + self.items_per_page
-        page_items = self.items[start_index:end_index]
+        return self.items[start_index:end_index]
+
+    def last_page(self):
+        # None when the provider doesnt know the total
+        if self.total is None:
+            return None
+        return max(0, (self.total - 1) // self.items_per_page)
 
-        for idx, item in enumerate(page_items):
-            real_index = start_index + idx
-            label = str(idx + 1)
+    def slot_button(self, slot):
+        # button for the slot-th item of whatever page is showing, made the first time it is needed
+        while len(self.slot_buttons) <= slot:
+            index = len(self.slot_buttons)
             button = discord.ui.Button(
-                label=label,
+                label=str(index + 1),
                 style=discord.ButtonStyle.primary,
-                custom_id=f"select_{real_index}"
+                custom_id=f"select_{index}"
             )
-            async def callback(interaction: discord.Interaction, index=real_index):
-                selected_item = self.items[index]
-                if self.on_select:
-                    await self.on_select(interaction, selected_item, index)
+
+            async def callback(interaction: discord.Interaction, slot=index):
+                items = self.page_items()
+                if self.on_select and slot < len(items):
+                    # one pick per menu, every caller swaps the menu out for what was picked
+                    self.stop()
+                    await self.on_select(interaction, items[slot], self.current_page * self.items_per_page + slot)
             button.callback = callback
-            self.add_item(button)
+            self.slot_buttons.append(button)
+        return self.slot_buttons[slot]
+
+    def build_buttons(self):
+        # Remove old item buttons except navigation, the slot buttons themselves are reused
+        self.clear_items()
+
+        for slot in range(len(self.page_items())):
+            self.add_item(self.slot_button(slot))
         
         # Re-add nav buttons
         self.add_item(self.previous_button)
         self.add_item(self.next_button)
 
     def build_embed(self) -> discord.Embed:
-        start_index = self.current_page * self.items_per_page
-        end_index = start_index + self.items_per_page
-        page_items = self.items[start_index:end_index]
-
-        description = ""
-        for idx, item in enumerate(page_items):
-            if isinstance(item, str):
-                description += f"{idx + 1}. {item}\n"
-            elif isinstance(item, dict) and "name" in item:
-                description += f"{idx + 1}. {item['name']}\n"
-            else:
-                description += f"{idx + 1}. Item\n"
-
-        total_pages = (len(self.items) - 1) // self.items_per_page + 1
+        key = (self.current_page, self.page_version)
+        description = self.render_cache.get(key)
+        if description is None:
+            lines = []
+            for idx, item in enumerate(self.page_items()):
+                if isinstance(item, str):
+                    lines.append(f"{idx + 1}. {item}")
+                elif isinstance(item, dict) and "name" in item:
+                    lines.append(f"{idx + 1}. {item['name']}")
+                else:
+                    lines.append(f"{idx + 1}. Item")
+            description = "\n".join(lines)
+            self.render_cache.put(key, description)
+
+        last_page = self.last_page()
+        total_pages = "?" if last_page is None else last_page + 1
         embed = discord.Embed(
             title=self.title,
             description=description,
@@ -91,19 +154,61 @@ class SelectionMenu(discord.ui.View):
     def set_callback(self, callback: Callable):
         self.on_select = callback
 
+    async def interaction_check(self, interaction: discord.Interaction):
+        # button callbacks run in their own task, point the service calls at this guild's shard again
+        await enter_guild(interaction.guild_id)
+        return True
+
+    def stop(self):
+        # after a pick (or by hand), on_timeout never runs for these when timeout is None
+        self.release()
+        super().stop()
+
+    def release(self):
+        if self.release_shard is not None:
+            self.release_shard()
+        if self.unsubscribe is not None:
+            self.unsubscribe()
+
+    async def on_timeout(self):
+        self.release()
+
+    async def load_page(self):
+        if self.fetch_page is None:
+            return
+
+        cached = self.page_cache.get(self.current_page)
+        if cached is None:
+            result = await self.fetch_page(self.current_page)
+            if not result.success:
+                self.items = []
+                self.page_version = None
+                return
+            self.version += 1
+            cached = (self.version, result.data)
+            self.page_cache.put(self.current_page, cached)
+
+        self.page_version, data = cached
+        self.items = data["items"]
+        self.total = data.get("total")
+
     # Pagination handlers
     async def previous_page(self, interaction: discord.Interaction):
         if self.current_page > 0:
             self.current_page -= 1
+            await self.load_page()
             self.build_buttons()
             await interaction.response.edit_message(embed=self.build_embed(), view=self)
         else:
             await interaction.response.defer()  # nothing happens if already at first page
 
     async def next_page(self, interaction: discord.Interaction):
-        total_pages = (len(self.items) - 1) // self.items_per_page
-        if self.current_page < total_pages:
+        last_page = self.last_page()
+        # unknown total: keep going while pages come back full
+        has_next = len(self.page_items()) == self.items_per_page if last_page is None else self.current_page < last_page
+        if has_next:
             self.current_page += 1
+            await self.load_page()
             self.build_buttons()
             await interaction.response.edit_message(embed=self.build_embed(), view=self)
         else:
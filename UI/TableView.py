@@ -1,15 +1,64 @@
+import asyncio
 import discord
 from discord.ui import View, Button
 from services.settings_service import Setting_Service
+from services.shard_router import enter_guild, hold_guild
+from UI.PageCache import PageCache
+
+# longer cells get cut so one long note doesnt stretch every line of the table
+MAX_CELL_WIDTH = 40
+
+
+def clip_cell(value):
+    text = str(value)
+    return text if len(text) <= MAX_CELL_WIDTH else text[:MAX_CELL_WIDTH - 1] + "…"
+
+
+def format_table(rows, headers=None):
+    # monospace table for a code block: columns padded to the widest cell on this page with one
+    # format string, every line built with one join instead of += over the whole table
+    headers = headers or list(rows[0].keys())
+    cells = [[clip_cell(row.get(h, "")) for h in headers] for row in rows]
+    widths = [max(map(len, column)) for column in zip(headers, *cells)]
+    line_format = " | ".join(f"{{:<{w}}}" for w in widths)
+
+    header_line = line_format.format(*headers).rstrip()
+    lines = [header_line, "=" * len(header_line)]
+    lines.extend(line_format.format(*line).rstrip() for line in cells)
+    return "\n".join(lines)
+
 
 class PaginatedTable(View):
-    def __init__(self, setting_service: Setting_Service, items, title="Table", page=0, timeout=120):
+    def __init__(self, setting_service: Setting_Service, items, title="Table", page=0, timeout=120, fetch_page=None, total=None, guild_id=None):
         super().__init__(timeout=timeout)
-        self.ITEMS_PER_PAGE = setting_service.pagination
+        self.ITEMS_PER_PAGE = setting_service.page_size(guild_id)
+        self.setting_service = setting_service
+        self.guild_id = guild_id
         self.items = items
         self.title = title
         self.page = page
-        self.max_page = max(0, (len(items) - 1) // self.ITEMS_PER_PAGE)
+        # lazy mode: items is only the page on screen and fetch_page(page) awaits the
+        # next one (Result with data {"items", "total"}, total can be None if unknown),
+        # so big histories never get loaded whole. pages already seen stay in a small LRU
+        self.fetch_page = fetch_page
+        # fetch_page holds on to the services of this guild's shard, keep it open until the view times out
+        self.release_shard = hold_guild(guild_id) if fetch_page is not None else None
+        self.page_cache = PageCache()
+        # rendered table text per (page, data version). a page's version changes only when its rows
+        # get fetched again, so flipping back and forth reuses the text instead of rebuilding it
+        self.render_cache = PageCache(size=10)
+        self.version = 0
+        self.page_version = 0
+        # a lazy view's pages come from a provider with a fixed page size, only the in memory
+        # slices can follow a .update_pagination / .server_pagination while the view is open
+        self.unsubscribe = None
+        if fetch_page is not None:
+            self.page_cache.put(page, (self.version, {"items": items, "total": total}))
+            self._set_max_page(total)
+        else:
+            self._set_max_page(len(items))
+            self.loop = asyncio.get_running_loop()
+            self.unsubscribe = setting_service.subscribe(self.on_settings_change)
 
         self._update_buttons()
 
@@ -18,33 +67,79 @@ class PaginatedTable(View):
     def build_embed(self):
         embed = discord.Embed(title=self.title, color=discord.Color.blurple())
 
-        start = self.page * self.ITEMS_PER_PAGE
-        end = start + self.ITEMS_PER_PAGE
-        page_items = self.items[start:end]
+        key = (self.page, self.page_version)
+        table = self.render_cache.get(key)
+        if table is None:
+            if self.fetch_page is not None:
+                page_items = self.items
+            else:
+                start = self.page * self.ITEMS_PER_PAGE
+                end = start + self.ITEMS_PER_PAGE
+                page_items = self.items[start:end]
 
-        if not page_items:
+            table = format_table(page_items) if page_items else ""
+            self.render_cache.put(key, table)
+
+        if not table:
             embed.description = "No data available."
             return embed
 
-        table = ""
-        headers = list(page_items[0].keys())
-
-        header_line = " | ".join(headers)
-        separator = "=" * len(header_line)
-
-        table += header_line + "\n"
-        table += separator + "\n"
-
-        # Rows
-        for item in page_items:
-            row = [str(item.get(h, "")) for h in headers]
-            table += " | ".join(row) + "\n"
-
         embed.description = f"```{table}```"
-        embed.set_footer(text=f"Page {self.page + 1} / {self.max_page + 1}")
+        last_page = "?" if self.total is None else self.max_page + 1
+        embed.set_footer(text=f"Page {self.page + 1} / {last_page}")
 
         return embed
 
+    # ---------- SETTINGS ----------
+
+    def on_settings_change(self, guild_id, settings):
+        # db thread, hop to the loop before touching the view
+        size = self.setting_service.page_size(self.guild_id)
+        if size != self.ITEMS_PER_PAGE:
+            self.loop.call_soon_threadsafe(self.set_page_size, size)
+
+    def set_page_size(self, size):
+        # the cached text is keyed by page number, those are different rows now.
+        # shows up on the next button press, the message on screen stays as it is
+        first_row = self.page * self.ITEMS_PER_PAGE
+        self.ITEMS_PER_PAGE = size
+        self.render_cache = PageCache(size=10)
+        self._set_max_page(len(self.items))
+        self.page = min(first_row // size, self.max_page)
+        self._update_buttons()
+
+    # ---------- LAZY PAGES ----------
+
+    def _set_max_page(self, total):
+        self.total = total
+        if total is not None:
+            self.max_page = max(0, (total - 1) // self.ITEMS_PER_PAGE)
+        elif len(self.items) < self.ITEMS_PER_PAGE:
+            # unknown total: a short page is the last one
+            self.max_page = self.page
+        else:
+            self.max_page = self.page + 1
+
+    async def load_page(self):
+        if self.fetch_page is None:
+            return
+
+        cached = self.page_cache.get(self.page)
+        if cached is None:
+            result = await self.fetch_page(self.page)
+            if not result.success:
+                self.items = []
+                self.page_version = None
+                return
+            # fresh rows, might differ from what an older render of this page showed
+            self.version += 1
+            cached = (self.version, result.data)
+            self.page_cache.put(self.page, cached)
+
+        self.page_version, data = cached
+        self.items = data["items"]
+        self._set_max_page(data.get("total"))
+
     # ---------- BUTTON MANAGEMENT ----------
 
     def _update_buttons(self):
@@ -56,9 +151,23 @@ class PaginatedTable(View):
                 item.disabled = self.page >= self.max_page
 
     async def interaction_check(self, interaction: discord.Interaction):
+        # button callbacks run in their own task, point the service calls at this guild's shard again
+        await enter_guild(interaction.guild_id)
         return True  # optionally restrict to original user
 
+    def stop(self):
+        self.release()
+        super().stop()
+
+    def release(self):
+        # shard pin + settings subscription, both fine to drop twice
+        if self.release_shard is not None:
+            self.release_shard()
+        if self.unsubscribe is not None:
+            self.unsubscribe()
+
     async def on_timeout(self):
+        self.release()
         self.clear_items()
 
         if hasattr(self, "message"):
@@ -70,6 +179,7 @@ class PaginatedTable(View):
     async def prev_button(self, interaction: discord.Interaction, button: Button):
         if self.page > 0:
             self.page -= 1
+        await self.load_page()
         self._update_buttons()
         await interaction.response.edit_message(
             embed=self.build_embed(),
@@ -80,6 +190,7 @@ class PaginatedTable(View):
     async def next_button(self, interaction: discord.Interaction, button: Button):
         if self.page < self.max_page:
             self.page += 1
+        await self.load_page()
         self._update_buttons()
         await interaction.response.edit_message(
             embed=self.build_embed(),
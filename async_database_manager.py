@@ -0,0 +1,59 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from database_manager import DatabaseManager
+
+# how long buffered banner pity waits for more pulls before it gets written, see the WRITE BEHIND region
+BANNER_FLUSH_DELAY = 2.0
+
+
+class AsyncDatabaseManager:
+    # async facade over the DatabaseManager.
+    # every call runs on ONE dedicated worker thread (aiosqlite style) so a slow sqlite write
+    # never blocks the discord event loop, heartbeats and the other commands keep going.
+    # sqlite only allows one writer at a time anyway so one thread owning the connection is enough XD
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-worker")
+        self.flush_delay = BANNER_FLUSH_DELAY
+        self.flush_timer = None
+        db.on_pending = self.schedule_flush
+
+    def schedule_flush(self):
+        # called on the db thread by the first buffered banner update after a flush, the flush itself
+        # is queued behind whatever the db thread has to do by then
+        self.flush_timer = threading.Timer(self.flush_delay, self.submit_flush)
+        self.flush_timer.daemon = True
+        self.flush_timer.start()
+
+    def submit_flush(self):
+        try:
+            self.executor.submit(self.db.flush_banner_writes)
+        except RuntimeError:
+            # executor already shut down, close_db flushed on the way out
+            pass
+
+    async def run(self, func, *args, **kwargs):
+        # run any sync callable (db method or a service method that uses the db) on the db thread
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        return await loop.run_in_executor(self.executor, call)
+
+    def __getattr__(self, name):
+        # await adb.get_pulls_by_banner(banner_id) -> db.get_pulls_by_banner on the db thread
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return method
+
+    def close(self, wait=True):
+        # wait for queued writes (and the buffered banner updates) to finish before the process exits
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+        self.executor.submit(self.db.flush_banner_writes)
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager
+from services import Services
+
+# db thread latency while an online backup of a big database runs: one writer (.pull) and one
+# reader (.history page) loop through service.run, measured idle, during the stepped backup_to
+# (what .backup does) and during a one shot copy (pages=-1, the whole db in one step).
+# integrity_check on the copy is timed on its own, it runs on the backup thread
+#   python bench/backup_load.py [--mb 360] [--idle 3] [--dir .]
+
+NOTE = "x" * 900
+
+
+def seed(path, megabytes):
+    # pull_history rows with ~1KB of notes until the file is `megabytes` big, fast profile for the fill
+    db = DatabaseManager(path, profile="fast")
+    db.connect_db()
+    db.migrate()
+    db.add_games("game", "1")
+    for banner in range(5):
+        db.add_banner(1, f"banner {banner}", 0, 90)
+
+    rng = random.Random(12)
+    start = int(time.time()) - 365 * 86400
+    batch = 20000
+    written = 0
+    while os.path.getsize(path) < megabytes * 1e6:
+        with db.connection:
+            db.connection.executemany(
+                "INSERT INTO pull_history (banner_id, game_id, entry_name, pity, notes, timestamp) VALUES (?, 1, 'x', ?, ?, ?)",
+                [(rng.randint(1, 5), rng.randint(1, 90), NOTE, start + written + i) for i in range(batch)]
+            )
+        written += batch
+        db.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.close_db()
+    return written
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def traffic(service, stop, samples):
+    # writer + reader back to back on the db thread, (finished at, latency) per call
+    loop = asyncio.get_running_loop()
+    rng = random.Random(1)
+
+    async def writer():
+        while not stop.is_set():
+            start = loop.time()
+            await service.run(service.pull_service.add_pull_to_banner, "x", rng.randint(1, 5), rng.randint(1, 90), None)
+            samples.append((loop.time(), loop.time() - start))
+
+    async def reader():
+        while not stop.is_set():
+            start = loop.time()
+            await service.run(service.pull_service.get_banner_pulls_page, rng.randint(1, 5), 10)
+            samples.append((loop.time(), loop.time() - start))
+
+    await asyncio.gather(writer(), reader())
+
+
+def summary(label, samples, since, until, extra=""):
+    values = [latency for at, latency in samples if since <= at <= until]
+    if not values:
+        return f"  {label:<16} no calls"
+    return (
+        f"  {label:<16} n={len(values):<6} p50 {percentile(values, 0.50) * 1000:6.2f}ms"
+        f"  p99 {percentile(values, 0.99) * 1000:7.2f}ms  max {max(values) * 1000:7.1f}ms{extra}"
+    )
+
+
+async def measure(service, backup_dir, idle):
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    samples = []
+    load = asyncio.create_task(traffic(service, stop, samples))
+    lines = []
+
+    start = loop.time()
+    await asyncio.sleep(idle)
+    lines.append(summary("idle", samples, start, loop.time()))
+
+    for label, pages in (("256-page steps", 256), ("one-shot copy", -1)):
+        target = os.path.join(backup_dir, f"{pages}.db")
+        start = loop.time()
+        backup = await asyncio.to_thread(service.db.backup_to, target, pages)
+        took = loop.time() - start
+        if not backup.success:
+            raise SystemExit(f"{label}: {backup.message} {backup.error}")
+        lines.append(summary(label, samples, start, loop.time(), f"  ({took:.1f}s copy, {backup.data['steps']} steps)"))
+
+    stop.set()
+    await load
+
+    start = time.perf_counter()
+    check = await asyncio.to_thread(service.db.check_database_file, target)
+    if not check.success:
+        raise SystemExit(f"integrity_check failed: {check.message} {check.error}")
+    lines.append(f"  integrity_check on the copy {time.perf_counter() - start:.1f}s, off both threads")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="db thread latency while backing up a big database under load")
+    parser.add_argument("--mb", type=int, default=360, help="database size to build")
+    parser.add_argument("--idle", type=float, default=3, help="seconds of load before the backups")
+    parser.add_argument("--dir", help="where the database + copies go, default a temp dir")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = os.path.join(tmp, "data.db")
+        start = time.perf_counter()
+        rows = seed(path, args.mb)
+        print(f"{rows} pulls, {os.path.getsize(path) / 1e6:.0f}MB built in {time.perf_counter() - start:.0f}s")
+
+        db = DatabaseManager(path)
+        db.connect_db()
+        db.migrate()
+        service = Services(db, backup_dir=tmp)
+        try:
+            lines = asyncio.run(measure(service, tmp, args.idle))
+        finally:
+            service.close(wait=True)
+        print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
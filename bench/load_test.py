@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import CONNECTION_PROFILES, DatabaseManager
+from services import Services
+
+# command latency under concurrent .pull / .banners traffic, with the database calls made right on
+# the event loop (how the commands did it before the async facade) vs through service.run.
+# .h never touches the db, its latency is what the gateway / every other guild feels
+#   python bench/load_test.py [--users 50] [--seconds 5] [--history 20000]
+
+CHANNEL = "1"
+
+
+def seed(path, profile, history):
+    db = DatabaseManager(path, profile=profile)
+    db.connect_db()
+    db.migrate()
+    db.add_games("game", CHANNEL)
+    for banner in range(5):
+        db.add_banner(1, f"banner {banner}", 0, 90)
+        db.add_pulls(banner + 1, [("x", i % 90 + 1, None) for i in range(history // 5)])
+    db.flush_banner_writes()
+    return Services(db)
+
+
+async def call(service, blocking, func, *args):
+    if blocking:
+        return func(*args)
+    return await service.run(func, *args)
+
+
+async def pull_command(service, blocking, rng):
+    game = await call(service, blocking, service.game_service.get_game_for_channel, CHANNEL)
+    await call(service, blocking, service.banner_service.get_banners, game.data["Game_ID"])
+    return await call(service, blocking, service.pull_service.add_pull_to_banner, "x", rng.randint(1, 5), rng.randint(1, 90), None)
+
+
+async def banners_command(service, blocking, rng):
+    game = await call(service, blocking, service.game_service.get_game_for_channel, CHANNEL)
+    return await call(service, blocking, service.banner_service.get_banners, game.data["Game_ID"])
+
+
+async def history_command(service, blocking, rng):
+    # whole pull history of a banner, the heaviest read a user can trigger
+    return await call(service, blocking, service.pull_service.get_banner_pulls, rng.randint(1, 5))
+
+
+async def ping_command(service, blocking, rng):
+    return None
+
+
+COMMANDS = {
+    ".pull": (pull_command, 60),
+    ".banners": (banners_command, 25),
+    ".history": (history_command, 5),
+    ".h": (ping_command, 10),
+}
+
+
+async def user(service, blocking, seed_value, think, until, latencies):
+    rng = random.Random(seed_value)
+    loop = asyncio.get_running_loop()
+    names = list(COMMANDS)
+    weights = [COMMANDS[name][1] for name in names]
+    while True:
+        # latency counts from when the message would have arrived, so time spent waiting on a
+        # blocked loop shows up too
+        due = loop.time() + rng.expovariate(1 / think)
+        if due > until:
+            return
+        await asyncio.sleep(due - loop.time())
+        name = rng.choices(names, weights)[0]
+        await COMMANDS[name][0](service, blocking, rng)
+        latencies.setdefault(name, []).append(loop.time() - due)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_mode(service, blocking, users, seconds, think):
+    latencies = {}
+    until = asyncio.get_running_loop().time() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(user(service, blocking, i, think, until, latencies) for i in range(users)))
+    return latencies, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="p50/p99 command latency, blocking db calls vs the async facade")
+    parser.add_argument("--users", type=int, default=50, help="concurrent users sending commands")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--think", type=float, default=0.05, help="mean seconds between a user's commands")
+    parser.add_argument("--history", type=int, default=20000, help="pulls in the database before the test")
+    parser.add_argument("--profile", choices=list(CONNECTION_PROFILES), default="wal")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, blocking in (("blocking", True), ("async", False)):
+            service = seed(os.path.join(tmp, f"{label}.db"), args.profile, args.history)
+            if blocking:
+                # no flush timer on the db thread while the loop uses the connection itself,
+                # the reads flush the buffered banner writes like before the facade
+                service.db.on_pending = None
+            latencies, elapsed = asyncio.run(run_mode(service, blocking, args.users, args.seconds, args.think))
+            service.close(wait=True)
+
+            total = sum(len(values) for values in latencies.values())
+            print(f"{label}: {total} commands in {elapsed:.1f}s, {args.users} users")
+            for name in COMMANDS:
+                values = latencies.get(name)
+                if not values:
+                    continue
+                print(
+                    f"  {name:<9} n={len(values):<6} p50 {percentile(values, 0.50) * 1000:7.2f}ms"
+                    f"   p99 {percentile(values, 0.99) * 1000:7.2f}ms   max {max(values) * 1000:7.2f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
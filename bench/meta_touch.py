@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import CONNECTION_PROFILES, DatabaseManager, EPOCH_NOW
+
+# cost of a 1000 row update with the old per row meta triggers (migration 4, dropped in 13)
+# vs the one touch per transaction of Meta_Connection
+#   python bench/meta_touch.py [--rows 1000] [--reps 20] [--profile wal]
+
+UPDATES = {
+    "pull_history": "UPDATE pull_history SET notes = ? WHERE banner_id = 1",
+    "banners": "UPDATE banners SET max_pity = length(?) + 80 WHERE banner_id > 1",
+}
+
+
+def build(path, profile, rows, triggers):
+    db = DatabaseManager(path, profile=profile)
+    db.connect_db()
+    db.migrate()
+    db.add_games("game", "1")
+    db.add_banner(1, "banner", 0, 90)
+    db.add_pulls(1, [("x", i % 90 + 1, None) for i in range(rows)])
+    with db.connection:
+        db.connection.executemany(
+            "INSERT INTO banners (game_id, banner_name, current_pity, max_pity) VALUES (1, ?, 0, 90)",
+            [(f"banner {i}",) for i in range(rows)]
+        )
+
+    if triggers:
+        # the old bookkeeping: one UPDATE meta per updated row, no touch on commit
+        db.connection.touch_sql = None
+        with db.connection:
+            for name, table in (("banner", "banners"), ("history", "pull_history"), ("currency", "currency_balance")):
+                db.connection.execute(f"""
+                    CREATE TRIGGER meta_timestamp_to_{name} AFTER UPDATE ON {table}
+                    BEGIN UPDATE meta SET last_modified = {EPOCH_NOW} WHERE id = 1; END
+                """)
+    return db
+
+
+def time_updates(db, reps):
+    best = {}
+    for table, sql in UPDATES.items():
+        times = []
+        for rep in range(reps):
+            start = time.perf_counter()
+            with db.connection:
+                db.connection.execute(sql, (f"n{rep}",))
+            times.append(time.perf_counter() - start)
+        best[table] = min(times)
+    return best
+
+
+def count_meta_writes(db, sql, params=()):
+    # total_changes counts the rows the statement updated + every write its triggers / the touch did
+    before = db.connection.total_changes
+    with db.connection:
+        updated = db.connection.execute(sql, params).rowcount
+    return db.connection.total_changes - before - updated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="meta.last_modified: per row triggers vs one touch per transaction")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--reps", type=int, default=20)
+    parser.add_argument("--profile", choices=list(CONNECTION_PROFILES), default="wal")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, triggers in (("triggers", True), ("commit hook", False)):
+            db = build(os.path.join(tmp, f"{'before' if triggers else 'after'}.db"), args.profile, args.rows, triggers)
+            results[label] = time_updates(db, args.reps)
+            writes = count_meta_writes(db, UPDATES["pull_history"], ("counted",))
+            empty = count_meta_writes(db, "UPDATE banners SET max_pity = 1 WHERE banner_id = -1")
+            print(f"{label:<12} meta writes: {writes} for a {args.rows} row update, {empty} for a 0 row update")
+            db.close_db()
+
+    print(f"\n{args.rows} row update, best of {args.reps} ({args.profile} profile)")
+    for table in UPDATES:
+        before = results["triggers"][table] * 1000
+        after = results["commit hook"][table] * 1000
+        print(f"  {table:<13} triggers {before:7.2f}ms   commit hook {after:7.2f}ms   {before / after:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
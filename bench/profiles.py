@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import CONNECTION_PROFILES, DatabaseManager
+
+# commit throughput of each connection profile: N sequential add_pull calls (one commit each)
+# on a fresh database file, the buffered banner pity flushed at the end inside the timing.
+# put --dir on the disk the bot runs on, a tmpfs /tmp hides the fsync cost of safe
+#   python bench/profiles.py [--pulls 2000] [--dir .]
+
+
+def run_profile(directory, profile, pulls):
+    path = os.path.join(directory, f"{profile}.db")
+    db = DatabaseManager(path, profile=profile)
+    db.connect_db()
+    db.migrate()
+    db.add_games("game", "1")
+    db.add_banner(1, "banner", 0, 90)
+
+    start = time.perf_counter()
+    for i in range(pulls):
+        result = db.add_pull("x", 1, i % 90 + 1, None)
+        if not result.success:
+            raise SystemExit(f"{profile}: add_pull failed: {result.message} {result.error}")
+    db.flush_banner_writes()
+    took = time.perf_counter() - start
+
+    count = db.connection.execute("SELECT COUNT(*) FROM pull_history").fetchone()[0]
+    db.close_db()
+    if count != pulls:
+        raise SystemExit(f"{profile}: {count} pulls written, expected {pulls}")
+    return took
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="add_pull commits per second for every connection profile")
+    parser.add_argument("--pulls", type=int, default=2000)
+    parser.add_argument("--dir", help="where the database files go, default a temp dir")
+    parser.add_argument("profiles", nargs="*", default=list(CONNECTION_PROFILES), help="default: all of them")
+    args = parser.parse_args(argv)
+    unknown = [profile for profile in args.profiles if profile not in CONNECTION_PROFILES]
+    if unknown:
+        parser.error(f"unknown profile {', '.join(unknown)}, pick from {', '.join(CONNECTION_PROFILES)}")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        print(f"{args.pulls} sequential add_pull commits in {tmp}")
+        for profile in args.profiles:
+            took = run_profile(tmp, profile, args.pulls)
+            print(f"  {profile:<6} {args.pulls / took:9.0f} commits/s   {took / args.pulls * 1e6:8.1f}us per commit")
+
+
+if __name__ == "__main__":
+    main()
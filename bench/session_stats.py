@@ -0,0 +1,143 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager
+from migrations import MIGRATIONS
+from services.session_service import Session_Service
+
+# years of sessions: .sessions / .sesh_stats the way they ran before durations were stored
+# (schema v8, julianday / strftime math on text timestamps, 4 statements for .sesh_stats) vs the
+# same data migrated to the current schema (stored durations, one query + the running session registry)
+#   python bench/session_stats.py [--years 3] [--per-day 6]
+
+OLD_BROWSE = """
+    SELECT session_id, session_name, start_time, end_time, total_break_time,
+        ((julianday(end_time) - julianday(start_time)) * 86400) AS duration
+    FROM sessions
+"""
+OLD_SESSION_EXISTS = "SELECT * FROM sessions WHERE session_id = ?"
+OLD_CURRENT_SESSION = """
+    SELECT s.start_time, strftime('%s', CURRENT_TIMESTAMP) - strftime('%s', s.start_time),
+        EXISTS (SELECT 1 FROM session_breaks sb WHERE sb.session_id = s.session_id)
+    FROM sessions s WHERE s.session_id = ?
+"""
+OLD_BREAKS = """
+    SELECT break_start, break_end,
+        CASE WHEN break_end IS NOT NULL THEN strftime('%s', break_end) - strftime('%s', break_start)
+             ELSE strftime('%s', CURRENT_TIMESTAMP) - strftime('%s', break_start) END,
+        CASE WHEN break_end IS NOT NULL THEN 1 ELSE 0 END
+    FROM session_breaks WHERE session_id = ?
+"""
+
+
+def seed_v8(path, years, per_day):
+    # the schema as it was before stored durations, filled with `years` of finished sessions
+    # (2 breaks each) and one running session with a running break
+    connection = sqlite3.connect(path)
+    cur = connection.cursor()
+    for version, _, step in MIGRATIONS:
+        if version > 8:
+            break
+        cur.execute("BEGIN")
+        step(cur)
+        cur.execute(f"PRAGMA user_version = {version}")
+        connection.commit()
+
+    rng = random.Random(17)
+    start = int(time.time()) - years * 365 * 86400
+    sessions, breaks = [], []
+    session_id = 0
+    for day in range(years * 365):
+        for slot in range(per_day):
+            session_id += 1
+            begin = start + day * 86400 + slot * (86400 // per_day)
+            sessions.append((session_id, f"session {session_id}", begin, begin + rng.randint(600, 3 * 3600)))
+            for n in range(2):
+                break_start = begin + 300 * (n + 1)
+                breaks.append((session_id, break_start, break_start + rng.randint(30, 600)))
+
+    text = "datetime(?, 'unixepoch')"
+    cur.executemany(f"INSERT INTO sessions (session_id, session_name, start_time, end_time) VALUES (?, ?, {text}, {text})", sessions)
+    cur.executemany(f"INSERT INTO session_breaks (session_id, break_start, break_end) VALUES (?, {text}, {text})", breaks)
+    cur.execute("""
+        UPDATE sessions SET total_break_time = (
+            SELECT SUM(strftime('%s', break_end) - strftime('%s', break_start))
+            FROM session_breaks b WHERE b.session_id = sessions.session_id
+        )
+    """)
+    cur.execute("INSERT INTO sessions (session_name, channel_id, user_id) VALUES ('running', '1', '1')")
+    live = cur.lastrowid
+    cur.execute("INSERT INTO session_breaks (session_id, break_start) VALUES (?, datetime('now', '-60 seconds'))", (live,))
+    connection.commit()
+    connection.close()
+    return len(sessions), len(breaks), live
+
+
+def best_of(func, reps):
+    func()
+    times = []
+    for _ in range(reps):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=".sessions / .sesh_stats before and after stored durations")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-day", type=int, default=6)
+    parser.add_argument("--reps", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.db")
+        session_count, break_count, live = seed_v8(path, args.years, args.per_day)
+        print(f"{session_count} sessions, {break_count} breaks over {args.years} years")
+
+        old = sqlite3.connect(path)
+
+        def old_sesh_stats():
+            cur = old.cursor()
+            cur.execute(OLD_SESSION_EXISTS, (live,)).fetchone()
+            cur.execute(OLD_CURRENT_SESSION, (live,)).fetchone()
+            cur.execute(OLD_SESSION_EXISTS, (live,)).fetchone()
+            cur.execute(OLD_BREAKS, (live,)).fetchall()
+
+        before = {
+            ".sessions (all rows)": best_of(lambda: old.execute(OLD_BROWSE).fetchall(), args.reps),
+            ".sesh_stats": best_of(old_sesh_stats, args.reps * 100),
+        }
+        old.close()
+
+        db = DatabaseManager(path)
+        db.connect_db()
+        start = time.perf_counter()
+        migration = db.migrate()
+        print(f"{migration.message} in {time.perf_counter() - start:.2f}s")
+        sessions = Session_Service(db)
+        sessions.load_active_sessions()
+
+        after = {
+            ".sessions (all rows)": best_of(db.browse_sessions, args.reps),
+            ".sesh_stats": best_of(lambda: sessions.get_active_session("1", "1"), args.reps * 100),
+        }
+        stats = sessions.get_active_session("1", "1")
+        db.close_db()
+
+    if not stats.success:
+        raise SystemExit(f".sesh_stats failed: {stats.message}")
+    for label in before:
+        print(f"  {label:<22} before {before[label] * 1000:8.3f}ms   after {after[label] * 1000:8.3f}ms   {before[label] / after[label]:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
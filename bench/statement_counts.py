@@ -0,0 +1,150 @@
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# sql statements each DatabaseManager call runs (set_trace_callback), side by side for several trees.
+# default: before existence checks were folded into the writes, that change and this checkout (.),
+# the change is found by its commit subject so a rebase doesnt break the default
+#   python bench/statement_counts.py [rev ...]
+# BEGIN / COMMIT and the meta.last_modified touch are left out, the writes of the old meta triggers
+# dont count either. labels in () are calls that are supposed to fail
+
+CALLS = [
+    ("add_games", ("game", "1")),
+    ("add_games (taken)", ("game", "1")),
+    ("add_banner", (1, "banner", 0, 90)),
+    ("add_pull", ("x", 1, 5, None)),
+    ("add_pull (no banner)", ("x", 99, 5, None)),
+    ("edit_pull", (1, "y", 6, None)),
+    ("update_banner_pity", (1, 7)),
+    ("update_banner_pity (no banner)", (99, 7)),
+    ("start_session", ("session",)),
+    ("add_session_break", (1,)),
+    ("add_session_break (no session)", (99,)),
+    ("end_session_break", (1,)),
+    ("end_session", (1,)),
+    ("add_game_currency", (1, 10, 1)),
+    ("add_game_currency (exists)", (1, 10, 1)),
+    ("update_currency_amount", (1, 20)),
+    ("log_currency_action", (1, 10, "add", "daily")),
+    ("get_game_by_channel_id", ("1",)),
+    ("delete_pull", (1,)),
+    ("delete_pull (gone)", (1,)),
+]
+
+SKIPPED = ("BEGIN", "COMMIT", "ROLLBACK", "UPDATE META SET LAST_MODIFIED")
+
+CHANGE_SUBJECT = "Derive existence from the write itself instead of pre-check queries"
+
+
+def count_statements(tree):
+    # runs inside a subprocess with the tree's own database_manager on the path
+    sys.path.insert(0, tree)
+    from database_manager import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "data.db"))
+        db.connect_db()
+        db.migrate()
+        statements = []
+        db.connection.set_trace_callback(statements.append)
+
+        counts = {}
+        for label, args in CALLS:
+            method = getattr(db, label.split(" ")[0], None)
+            if method is None:
+                counts[label] = None
+                continue
+            statements.clear()
+            result = method(*args)
+            # buffered banner writes are part of the pull, count their flush with it
+            if hasattr(db, "flush_banner_writes"):
+                db.flush_banner_writes()
+            # the trace repeats a statement's text for every trigger it fires (the old meta
+            # triggers), so consecutive copies are one statement
+            distinct = [s for i, s in enumerate(statements) if i == 0 or s != statements[i - 1]]
+            counts[label] = [
+                len([s for s in distinct if not " ".join(s.split()).upper().startswith(SKIPPED)]),
+                result.success
+            ]
+        db.connection.set_trace_callback(None)
+        db.close_db() if hasattr(db, "close_db") else db.connection.close()
+    print(json.dumps(counts))
+
+
+def tree_for(rev, tmp):
+    if rev == ".":
+        return ROOT
+    archive = subprocess.run(["git", "-C", ROOT, "archive", rev], capture_output=True, check=True).stdout
+    path = os.path.join(tmp, rev.replace("/", "_").replace("~", "_"))
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(path)
+    return path
+
+
+def default_revs():
+    # the commit that folded the existence checks into the writes, its parent and this checkout
+    found = subprocess.run(
+        ["git", "-C", ROOT, "log", "--format=%h", "--fixed-strings", f"--grep={CHANGE_SUBJECT}"],
+        capture_output=True, text=True
+    ).stdout.split()
+    if not found:
+        return None
+    # oldest match, a later commit could quote the subject
+    change = found[-1]
+    return [f"{change}~1", change, "."]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="statements per DatabaseManager call across git revisions")
+    parser.add_argument("revs", nargs="*", help="git revisions, . = this checkout. default: before / after the existence check change and .")
+    parser.add_argument("--count-in", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.count_in:
+        count_statements(args.count_in)
+        return
+
+    if not args.revs:
+        args.revs = default_revs()
+        if args.revs is None:
+            parser.error(f"no commit called '{CHANGE_SUBJECT}' in this history (squashed?), pass the revisions to compare")
+
+    columns = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for rev in args.revs:
+            run = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--count-in", tree_for(rev, tmp)],
+                capture_output=True, text=True, cwd=tmp
+            )
+            if run.returncode != 0:
+                print(f"{rev}: failed\n{run.stderr}", file=sys.stderr)
+                return 1
+            columns[rev] = json.loads(run.stdout.strip().splitlines()[-1])
+
+    print(f"{'call':<32}" + "".join(f"{rev:>12}" for rev in columns))
+    totals = dict.fromkeys(columns, 0)
+    for label, _ in CALLS:
+        cells = []
+        for rev, counts in columns.items():
+            count = counts.get(label)
+            if count is None:
+                cells.append("-")
+                continue
+            expected = "(" not in label
+            cells.append(f"{count[0]}{'' if count[1] == expected else '*'}")
+            totals[rev] += count[0]
+        print(f"{label:<32}" + "".join(f"{cell:>12}" for cell in cells))
+    print(f"{'total':<32}" + "".join(f"{total:>12}" for total in totals.values()))
+    print("* the call didnt do what the label says in that tree (bug there at the time)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import help
+from database_manager import DatabaseManager
+
+# formatting the timestamp column of a big pull history for display:
+# the per row strptime + astimezone + strftime every service had before the shared formatter,
+# the same per row on unix seconds, and help.epoch_to_local / epochs_to_local (memoized per minute)
+#   python bench/timestamps.py [--rows 100000] [--days 30]
+
+DISPLAY_FORMAT = "%b %d, %Y %I:%M %p"
+
+
+def per_row_text(dt_string):
+    # the old utc_string_to_local, on the 'YYYY-MM-DD HH:MM:SS' text the pulls were stored as
+    dt = datetime.strptime(dt_string, "%Y-%m-%d %H:%M:%S")
+    return dt.replace(tzinfo=timezone.utc).astimezone().strftime(DISPLAY_FORMAT)
+
+
+def per_row_epoch(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).astimezone().strftime(DISPLAY_FORMAT)
+
+
+def seed(path, rows, days):
+    # one banner, pulls in bursts (a 10 pull lands in the same minute) spread over `days`
+    db = DatabaseManager(path, profile="fast")
+    db.connect_db()
+    db.migrate()
+    db.add_games("game", "1")
+    db.add_banner(1, "banner", 0, 90)
+
+    rng = random.Random(9)
+    start = int(time.time()) - days * 86400
+    step = days * 86400 // rows
+    with db.connection:
+        db.connection.executemany(
+            "INSERT INTO pull_history (banner_id, game_id, entry_name, pity, timestamp) VALUES (1, 1, 'x', ?, ?)",
+            [(i % 90 + 1, start + i * step + rng.randint(0, 5)) for i in range(rows)]
+        )
+    return db
+
+
+def best_of(func, reps):
+    times = []
+    for _ in range(reps):
+        help._format_minute.cache_clear()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="per row timestamp formatting vs the shared memoized formatter")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--reps", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = seed(os.path.join(tmp, "data.db"), args.rows, args.days)
+        start = time.perf_counter()
+        pulls = db.get_pulls_by_banner(1).data
+        read_time = time.perf_counter() - start
+        db.close_db()
+
+    seconds = [row[4] for row in pulls]
+    texts = [datetime.fromtimestamp(s, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S") for s in seconds]
+
+    runs = {
+        "per row strptime (text, before)": lambda: [per_row_text(t) for t in texts],
+        "per row fromtimestamp (epoch)": lambda: [per_row_epoch(s) for s in seconds],
+        "epoch_to_local per row": lambda: [help.epoch_to_local(s) for s in seconds],
+        "epochs_to_local batch": lambda: help.epochs_to_local(seconds),
+    }
+
+    print(f"{len(pulls)} pull rows over {args.days} days, read in {read_time * 1000:.0f}ms, best of {args.reps} (cold cache each run)")
+    baseline = None
+    expected = None
+    for label, func in runs.items():
+        took, result = best_of(func, args.reps)
+        if expected is None:
+            expected = result
+        elif result != expected:
+            raise SystemExit(f"{label} formats differently")
+        baseline = baseline or took
+        print(f"  {label:<33} {took * 1000:8.1f}ms   {baseline / took:5.1f}x")
+    print(f"  distinct minutes: {len({s // 60 for s in seconds})}")
+
+
+if __name__ == "__main__":
+    main()
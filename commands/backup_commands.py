@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from contextlib import aclosing
+from discord.ext import commands, tasks
+from services.backup_service import SAFETY_PREFIX
+from services.interface import ServicesProtocol
+from UI.SimpleEmbed import SimpleEmbed
+
+logger = logging.getLogger(__name__)
+
+def setup_backup_commands(bot, service: ServicesProtocol, every_hours: float = 24):
+    # one backup at a time, the scheduled one and .backup share this
+    backup_lock = asyncio.Lock()
+
+    async def run_backup(label=None, backup_service=None):
+        backup_service = backup_service or service.backup_service
+        async with backup_lock:
+            # own thread, NOT the db thread, so commands keep running between backup steps
+            return await asyncio.to_thread(backup_service.create_backup, label)
+
+    @tasks.loop(hours=every_hours)
+    async def scheduled_backup():
+        # every shard when the db is split per guild (one shard otherwise), one after the other
+        async with aclosing(service.all_shards()) as shards:
+            async for name, shard in shards:
+                result = await run_backup(backup_service=shard.backup_service)
+                if result.success:
+                    logger.info(f"{name}: {result.message}")
+                else:
+                    logger.warning(f"{name}: {result.message} {result.error}")
+
+    @bot.listen("on_ready")
+    async def start_scheduled_backup():
+        # on_ready fires again after reconnects, only start the loop once
+        if not scheduled_backup.is_running():
+            scheduled_backup.start()
+
+    @bot.command(name="backup")
+    async def backup_now(ctx):
+        await ctx.send("Backing up the database...", delete_after=5)
+        result = await run_backup()
+        if not result.success:
+            await ctx.send("⚠ SERVICE ERROR: " + str(result.message))
+            return
+
+        await ctx.send(f"⚠ SERVICE MESSAGE: `{result.message}`")
+
+    @bot.command(name="backups")
+    async def list_backups(ctx):
+        backups = await asyncio.to_thread(service.backup_service.list_backups)
+        safety_copies = await asyncio.to_thread(service.backup_service.list_backups, SAFETY_PREFIX)
+        if not backups and not safety_copies:
+            await ctx.send("No backups yet, make one with *.backup*", delete_after=10)
+            return
+
+        embed_builder = SimpleEmbed(title="Backups").set_footer(
+            f"keeping the newest {service.backup_service.keep} backups, "
+            f"{service.backup_service.keep_safety} pre-restore copies"
+        )
+        if backups:
+            embed_builder.add_field(name="Newest first", value="\n".join(f"`{name}`" for name in backups), inline=False)
+        if safety_copies:
+            # only restored when named, .restore pre-restore-... undoes a restore
+            embed_builder.add_field(name="Before a restore", value="\n".join(f"`{name}`" for name in safety_copies), inline=False)
+        await ctx.send(embed=embed_builder.build())
+
+    @bot.command(name="restore")
+    @commands.is_owner()
+    async def restore_backup(ctx, name: str = None):
+        # .restore -> newest backup, .restore data-20250101-120000.db -> that one,
+        # .restore pre-restore-20250101-120000.db -> undo a restore (never picked by default)
+        async with backup_lock:
+            result = await service.run(service.backup_service.restore_backup, name)
+        if not result.success:
+            await ctx.send("⚠ SERVICE ERROR: " + str(result.message))
+            return
+
+        # channel -> game mapping, banner stats, running sessions and settings might be different in the restored db
+        await service.run(service.game_service.channel_cache.clear)
+        await service.run(service.stats_service.clear)
+        await service.run(service.session_service.load_active_sessions)
+        await service.run(service.settings_service.get_all_settings)
+        await ctx.send(f"⚠ SERVICE MESSAGE: `{result.message}`")
@@ -6,12 +6,25 @@ from UI.SelectionMenu import SelectionMenu
 from UI.TableView import PaginatedTable
 from UI.SimpleEmbed import SimpleEmbed
 
+# biggest attachment .pulls will read
+PULL_FILE_LIMIT = 1024 * 1024
+
 def parse_csv_args(arg_string: str, expected: int):
     parts = [p.strip() for p in arg_string.split(",")]
     if len(parts) != expected:
         raise ValueError
     return parts
 
+def banner_pull_stats(banner):
+    # "12 pulls, avg 63.2 | last 5★: Name (74)" from the banner_summary fields of get_banners
+    if not banner["Pulls"]:
+        return "no pulls yet"
+    stats = f'{banner["Pulls"]} pulls, avg {banner["Avg_Pity"]}'
+    last_pull = banner["Last_Pull"]
+    if last_pull:
+        stats += f' | last 5★: {last_pull["Name"]} ({last_pull["Pity"]})'
+    return stats
+
 def setup_banner_commands(bot, service: ServicesProtocol):
     @bot.command(name="addbanner")
     async def create_banner(ctx, *, args: str):
@@ -24,7 +37,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
             return
 
         # get game id for the channel !!!
-        get_game_id = service.game_service.get_game_for_channel(ctx.channel.id)
+        get_game_id = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         
         if not get_game_id.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(get_game_id.message), delete_after=5)
@@ -32,7 +45,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
         
         game_id = get_game_id.data['Game_ID']
 
-        banner = service.banner_service.create_banner(game_id, banner_name, pity, max_pity)
+        banner = await service.run(service.banner_service.create_banner, game_id, banner_name, pity, max_pity)
 
         if not banner.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(banner.message))
@@ -43,7 +56,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
     @bot.command(name="banners")
     async def list_game_banners(ctx):
         # get game id for the channel !!!
-        get_game_id = service.game_service.get_game_for_channel(ctx.channel.id)
+        get_game_id = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not get_game_id.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(get_game_id.message), delete_after=5)
             return
@@ -51,7 +64,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
         game_id = get_game_id.data['Game_ID']
         game_name = get_game_id.data['Game_Name']
 
-        banners = service.banner_service.get_banners(game_id)
+        banners = await service.run(service.banner_service.get_banners, game_id)
         if not banners.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(banners.message), delete_after=5)
             return
@@ -59,21 +72,22 @@ def setup_banner_commands(bot, service: ServicesProtocol):
         banner_list = [
             {
                 "name": f'ID: {b['Banner_ID']} | {b["Banner_Name"]} | At *{b["Current_Pity"]} pity*. | '
-                        f'Last accessed: {b["Last_Updated"]}',
+                        f'{banner_pull_stats(b)} | Last accessed: {b["Last_Updated"]}',
                 "id": b["Banner_ID"]
             }
             for b in banners.data
         ]
 
-        banner_menu = SelectionMenu(bot, setting_service=service.settings_service, items=banner_list, title=f"🎴 Select a Banner for {game_name}")
+        banner_menu = SelectionMenu(bot, setting_service=service.settings_service, guild_id=getattr(ctx.guild, "id", None), items=banner_list, title=f"🎴 Select a Banner for {game_name}", timeout=120)
 
         async def on_banner_select(interaction: discord.Interaction, selected_banner, index):
             await interaction.response.edit_message(embed=banner_menu.build_embed(), view=None)
             
             banner_id = selected_banner["id"]
 
-            # GET PULL HISTORY
-            history = service.pull_service.get_banner_pulls(banner_id)
+            # GET PULL HISTORY, one page at a time
+            pages = service.pull_service.history_pages(banner_id, service.settings_service.page_size(getattr(ctx.guild, "id", None)))
+            history = await service.run(pages.get_page, 0)
             
             # DO VALIDATION HERE: CHECK IF THE GAME HAS BANNER LIST
             if not history.success:
@@ -83,7 +97,10 @@ def setup_banner_commands(bot, service: ServicesProtocol):
             # Create Table of Pull history
             view = PaginatedTable(
                 setting_service=service.settings_service,
-                items=history.data,
+                guild_id=getattr(ctx.guild, "id", None),
+                items=history.data["items"],
+                total=history.data["total"],
+                fetch_page=lambda page: service.run(pages.get_page, page),
                 title="History",
                 timeout=60
             )
@@ -108,7 +125,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
                 delete_after=5)
             return
 
-        update = service.banner_service.update_pity_detail(banner_id, pity, max_pity)
+        update = await service.run(service.banner_service.update_pity_detail, banner_id, pity, max_pity)
 
         if not update.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(update.message))
@@ -125,7 +142,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
                 delete_after=5)
             return
 
-        update = service.banner_service.update_banner_name(banner_id, name)
+        update = await service.run(service.banner_service.update_banner_name, banner_id, name)
 
         if not update.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(update.message))
@@ -134,7 +151,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
 
     @bot.command(name="pull")
     async def add_pull(ctx, *, args: str):
-        get_game_id = service.game_service.get_game_for_channel(ctx.channel.id)
+        get_game_id = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not get_game_id.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(get_game_id.message), delete_after=5)
             return
@@ -142,7 +159,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
         game_id = get_game_id.data['Game_ID']
         game_name = get_game_id.data['Game_Name']
 
-        banners = service.banner_service.get_banners(game_id)
+        banners = await service.run(service.banner_service.get_banners, game_id)
         if not banners.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(banners.message), delete_after=5)
             return
@@ -151,7 +168,8 @@ def setup_banner_commands(bot, service: ServicesProtocol):
             {
                 "name": f'{b["Banner_Name"]} | At *{b["Current_Pity"]} pity*. |'
                         f'Last accessed: {b["Last_Updated"]}',
-                "id": b["Banner_ID"]
+                "id": b["Banner_ID"],
+                "stats": banner_pull_stats(b)
             }
             for b in banners.data
         ]
@@ -164,7 +182,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
         for i, banner in enumerate(banner_list, start=1):
             embed_builder.add_field(
                 name=f"{i}. {banner['name']}",
-                value=f"ID: {banner['id']}",
+                value=f"ID: {banner['id']} | {banner['stats']}",
                 inline=False
             )
 
@@ -178,7 +196,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
                 embed=embed, delete_after=10)
             return
         
-        add = service.pull_service.add_pull_to_banner(entry, banner_id, pity, notes)
+        add = await service.run(service.pull_service.add_pull_to_banner, entry, banner_id, pity, notes)
         if not add.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(add.message))
             return
@@ -186,6 +204,41 @@ def setup_banner_commands(bot, service: ServicesProtocol):
         await ctx.send(f"⚠ SERVICE MESSAGE: `{add.message}`", 
                 delete_after=10)
 
+    @bot.command(name="pulls")
+    async def add_pulls(ctx, banner_id: int, *, block: str = None):
+        # a whole 10 pull at once, one pull per line or an attached .csv / .json file
+        # .pulls 3
+        # Entry Name, pity, Notes
+        # Entry Name, pity
+        if ctx.message.attachments:
+            attachment = ctx.message.attachments[0]
+            if attachment.size > PULL_FILE_LIMIT:
+                await ctx.send("⚠ WARNING: file too big, keep it under 1MB", delete_after=10)
+                return
+            file_name = attachment.filename
+            text = (await attachment.read()).decode("utf-8-sig", errors="replace")
+        elif block:
+            file_name = None
+            text = block
+        else:
+            await ctx.send(
+                "⚠ WARNING Command Format: *.pulls* `Banner ID` then one `Entry Name`, `pity`, `Notes: Optional` "
+                "per line, or attach a .csv / .json file", delete_after=10)
+            return
+
+        pulls = await service.run(service.pull_service.parse_pulls, text, file_name)
+        if not pulls.success:
+            await ctx.send("⚠ SERVICE ERROR: " + str(pulls.message), delete_after=10)
+            return
+
+        add = await service.run(service.pull_service.add_pulls_to_banner, banner_id, pulls.data)
+        if not add.success:
+            await ctx.send("⚠ SERVICE ERROR: " + str(add.message))
+            return
+
+        await ctx.send(f"⚠ SERVICE MESSAGE: `{add.message}`",
+                delete_after=10)
+
     @bot.command(name="bp")
     async def update_pity(ctx, *, args: str):
         try:
@@ -197,18 +250,18 @@ def setup_banner_commands(bot, service: ServicesProtocol):
             return
         
         # update then display banner data ig
-        update = service.banner_service.update_pity(banner_id, data)
+        update = await service.run(service.banner_service.update_pity, banner_id, data)
 
         if not update.success:
             return await ctx.send("⚠ SERVICE ERROR: " + str(update.message))
         
         # get game details then banner details
-        game = service.game_service.get_game_for_channel(ctx.channel.id)
+        game = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game.success:
             return await ctx.send("⚠ SERVICE ERROR: " + str(game.message))
         game_name = game.data["Game_Name"]
         
-        banner = service.banner_service.get_banner(banner_id)
+        banner = await service.run(service.banner_service.get_banner, banner_id)
         if not banner.success:
             return await ctx.send("⚠ SERVICE ERROR: " + str(banner.message))        
         banner_id, game_id, banner_name, current_pity, max_pity, last_updated = banner.data.values()
@@ -237,12 +290,12 @@ def setup_banner_commands(bot, service: ServicesProtocol):
         
         # get game details then banner details
 
-        game = service.game_service.get_game_for_channel(ctx.channel.id)
+        game = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game.success:
             return await ctx.send("⚠ SERVICE ERROR: " + str(game.message))        
         game_name = game.data["Game_Name"]
         
-        banner = service.banner_service.get_banner(banner_id)
+        banner = await service.run(service.banner_service.get_banner, banner_id)
         if not banner.success:
             return await ctx.send("⚠ SERVICE ERROR: " + str(banner.message))        
         banner_id, game_id, banner_name, current_pity, max_pity, last_updated = banner.data.values()
@@ -260,7 +313,141 @@ def setup_banner_commands(bot, service: ServicesProtocol):
         embed = embed_build.build()
 
         await ctx.send(embed=embed)
-            
+
+    @bot.command(name="stats")
+    async def show_stats(ctx, banner_id = None):
+        if not banner_id:
+            await ctx.send(
+                "⚠ WARNING Command Format: *.stats* `Banner ID`",
+                delete_after=10)
+            return
+
+        stats = await service.run(service.stats_service.get_banner_stats, banner_id)
+        if not stats.success:
+            return await ctx.send("⚠ SERVICE ERROR: " + str(stats.message))
+        s = stats.data
+
+        embed_build = (
+            SimpleEmbed(
+                title=f"📊 {s['Banner_Name']}",
+                color=0x00AE86
+            )
+            .set_footer(f"{s['Pulls']} pulls | 50/50 read from the notes (won / lost / guaranteed)")
+        )
+        embed_build.add_field(
+            "Pity",
+            f"```Current: {s['Current_Pity']} / {s['Max_Pity']}\n"
+            f"Mean: {s['Mean']}  Median: {s['Median']:g}  Std: {s['Std']}\n"
+            f"Min: {s['Min']}  Max: {s['Max']}\n"
+            f"p25: {s['Percentiles']['p25']:g}  p75: {s['Percentiles']['p75']:g}  p90: {s['Percentiles']['p90']:g}```"
+        )
+
+        # text bars scaled to the biggest bucket
+        biggest = max(count for _, _, count in s["Histogram"]) or 1
+        bars = "\n".join(
+            f"{low:>3}-{high:<3} {'█' * round(count / biggest * 20):<20} {count}"
+            for low, high, count in s["Histogram"]
+        )
+        embed_build.add_field("Distribution", f"```{bars}```")
+
+        win_rate = "-" if s["Win_Rate"] is None else f"{s['Win_Rate']}%"
+        embed_build.add_field(
+            "50/50",
+            f"```Won: {s['Won']}  Lost: {s['Lost']}  Guaranteed: {s['Guaranteed']}\n"
+            f"Win rate: {win_rate}  Longest losing run: {s['Loss_Streak']}```"
+        )
+        embed_build.add_field(
+            "Streaks",
+            f"```Below average in a row: {s['Lucky_Streak']}\n"
+            f"Average or worse in a row: {s['Unlucky_Streak']}```"
+        )
+
+        await ctx.send(embed=embed_build.build())
+
+    @bot.command(name="curve")
+    async def update_banner_curve(ctx, *, args: str = ""):
+        try:
+            banner_id, base_rate, soft_pity, soft_pity_step, featured_rate = parse_csv_args(args, 5)
+        except ValueError:
+            await ctx.send(
+                "⚠ WARNING Command Format: *.curve* `Banner ID`, `Base Rate`, `Soft Pity`, `Rate Added per Pull`, "
+                "`Featured Rate` (like *.curve 3, 0.006, 74, 0.06, 0.5*)",
+                delete_after=20)
+            return
+
+        update = await service.run(
+            service.simulation_service.update_banner_rates,
+            banner_id, base_rate, soft_pity, soft_pity_step, featured_rate
+        )
+        if not update.success:
+            return await ctx.send("⚠ SERVICE ERROR: " + str(update.message))
+
+        await ctx.send(update.message)
+
+    @bot.command(name="sim")
+    async def simulate_pulls(ctx, banner_id = None):
+        # what the current currency + tokens actually buy on this banner
+        if not banner_id:
+            await ctx.send(
+                "⚠ WARNING Command Format: *.sim* `Banner ID`",
+                delete_after=10)
+            return
+
+        game = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
+        if not game.success:
+            return await ctx.send("⚠ SERVICE ERROR: " + str(game.message))
+
+        params = await service.run(service.simulation_service.get_simulation_input, game.data["Game_ID"], banner_id)
+        if not params.success:
+            return await ctx.send("⚠ SERVICE ERROR: " + str(params.message))
+        p = params.data
+
+        # numpy runs in the process pool, the bot keeps answering meanwhile
+        sim = await service.simulation_service.simulate(p)
+        if not sim.success:
+            return await ctx.send("⚠ SERVICE ERROR: " + str(sim.message))
+        s = sim.data
+
+        embed_build = (
+            SimpleEmbed(
+                title=f"🎲 Pull Simulator | {game.data['Game_Name']}",
+                color=0x00AE86
+            )
+            .set_footer(
+                f"{s['Trials']} trials | {'guaranteed' if p['guaranteed'] else '50/50'} next | "
+                f"rates: {p['base_rate']:.2%} base, soft pity {p['soft_pity']}, +{p['soft_pity_step']:.0%} per pull"
+            )
+        )
+        # huge balances only get the first MAX_HORIZON pulls simulated
+        capped = "" if s["Simulated_Pulls"] == p["budget_pulls"] else f" | simulated the first {s['Simulated_Pulls']}"
+        embed_build.add_field(
+            "Budget",
+            f"```{p['currency']} currency / {p['pull_cost']} + {p['pull_token']} tokens = {p['budget_pulls']} pulls\n"
+            f"Pity: {p['current_pity']} / {p['max_pity']}{capped}```"
+        )
+        zero, one, two, more = s["Featured_Counts"]
+        embed_build.add_field(
+            "With that budget",
+            f"```Any 5★: {s['Five_Star_Chance']:.1%}\n"
+            f"Featured 5★: {s['Featured_Chance']:.1%}\n"
+            f"Expected 5★: {s['Expected_Five_Stars']:.2f}\n"
+            f"Featured x0: {zero:.1%}  x1: {one:.1%}  x2: {two:.1%}  x3+: {more:.1%}```"
+        )
+        needed = s["Pulls_Needed"]
+        if needed[50] is not None:
+            embed_build.add_field(
+                "Pulls to the featured 5★",
+                f"```50%: {needed[50]}  90%: {needed[90]}  99%: {needed[99]}\n"
+                f"currency for 99%: {max(needed[99] - p['pull_token'], 0) * p['pull_cost']}```"
+            )
+        if s["Goal_Featured_Chance"] is not None:
+            embed_build.add_field(
+                "At your goal",
+                f"```{p['goal_pulls']} pulls -> featured 5★: {s['Goal_Featured_Chance']:.1%}```"
+            )
+
+        await ctx.send(embed=embed_build.build())
+
     @bot.command(name="del_banner")
     async def delete_banner(ctx, banner_id):
         if not banner_id:
@@ -268,7 +455,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
                 "⚠ WARNING Command Format: *.del_banner* `Banner ID`", 
                 delete_after=10)
             return
-        delete = service.banner_service.delete_banner(banner_id)
+        delete = await service.run(service.banner_service.delete_banner, banner_id)
         if not delete.success:
             return await ctx.send("⚠ SERVICE ERROR: " + str(delete.message))
         
@@ -281,7 +468,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
                 "⚠ WARNING Command Format: *.dp* `Pull ID`", 
                 delete_after=10)
             return
-        delete = service.pull_service.delete_pull(pull_id)
+        delete = await service.run(service.pull_service.delete_pull, pull_id)
         if not delete.success:
             return await ctx.send("⚠ SERVICE ERROR: " + str(delete.message))
         
@@ -297,7 +484,7 @@ def setup_banner_commands(bot, service: ServicesProtocol):
                 delete_after=5)
             return
 
-        update = service.pull_service.edit_pull(pull_id, entry_name, pity, notes)
+        update = await service.run(service.pull_service.edit_pull, pull_id, entry_name, pity, notes)
 
         if not update.success:
             await ctx.send("⚠ SERVICE ERROR: " + str(update.message))
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import discord
+from database_manager import DatabaseManager
+from services.export_service import EXPORT_FORMATS
+from services.interface import ServicesProtocol
+
+# tables that belong to a game, exported only for the game of the channel
+GAME_TABLES = ("pull_history", "currency_logs")
+
+def setup_export_commands(bot, service: ServicesProtocol):
+    @bot.command(name="export")
+    async def export_table(ctx, table: str = None, file_format: str = "csv"):
+        # .export pull_history jsonl -> uploads the file to the channel
+        file_format = file_format.lower()
+        # checked before anything touches the filesystem, both end up in file names
+        if table not in DatabaseManager.EXPORT_QUERIES or file_format not in EXPORT_FORMATS:
+            await ctx.send(
+                f"⚠ WARNING Command Format: *.export* `{' | '.join(DatabaseManager.EXPORT_QUERIES)}` "
+                f"`{' | '.join(EXPORT_FORMATS)}`", delete_after=10)
+            return
+
+        game_id = None
+        if table in GAME_TABLES:
+            game = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
+            if not game.success:
+                await ctx.send("⚠ SERVICE ERROR: " + str(game.message), delete_after=5)
+                return
+            game_id = game.data["Game_ID"]
+
+        # written to a temp file on the db thread then uploaded, never the whole table in memory
+        fd, path = tempfile.mkstemp(suffix=".export", prefix="export_")
+        os.close(fd)
+        try:
+            export = await service.run(service.export_service.export_table, table, file_format, path, game_id)
+            if not export.success:
+                await ctx.send("⚠ SERVICE ERROR: " + str(export.message))
+                return
+
+            limit = ctx.guild.filesize_limit if ctx.guild else 8 * 1024 * 1024
+            if os.path.getsize(path) > limit:
+                await ctx.send("⚠ WARNING: export is too big to upload here, use export_cli.py on the bot machine")
+                return
+
+            await ctx.send(
+                f"⚠ SERVICE MESSAGE: `{export.message}`",
+                file=discord.File(path, filename=f"{table}.{file_format}")
+            )
+        finally:
+            os.remove(path)
@@ -6,6 +6,7 @@ from services import Services
 from UI.SelectionMenu import SelectionMenu
 from UI.TableView import PaginatedTable
 from UI.SimpleEmbed import SimpleEmbed
+from commands.banner_commands import banner_pull_stats
 
 def parse_csv_args(arg_string: str, expected: int):
     parts = [p.strip() for p in arg_string.split(",")]
@@ -16,7 +17,7 @@ def parse_csv_args(arg_string: str, expected: int):
 def setup_game_commands(bot, service: ServicesProtocol):
     @bot.command(name="update_db")
     async def update(ctx):
-        result = service.settings_service.update_db_version()
+        result = await service.run(service.settings_service.update_db_version)
         if not result.success:
             await ctx.send(result.message)
             return
@@ -25,7 +26,7 @@ def setup_game_commands(bot, service: ServicesProtocol):
 
     @bot.command(name="db_meta")
     async def database(ctx):
-        result = service.settings_service.get_db_meta()
+        result = await service.run(service.settings_service.get_db_meta)
 
         if not result.success:
             await ctx.send("⚠ SERVICE ERROR:"+ str(result.message))
@@ -43,9 +44,35 @@ def setup_game_commands(bot, service: ServicesProtocol):
         embed = build_embed.build()
         await ctx.send(embed=embed)
 
+    @bot.command(name="db_stats")
+    async def query_stats(ctx, reset: str = None):
+        # .db_stats -> timing per hot statement, .db_stats reset -> same and start counting again
+        result = await service.run(service.settings_service.get_query_stats, reset == "reset")
+
+        if not result.success:
+            await ctx.send("⚠ SERVICE ERROR:"+ str(result.message))
+            return
+
+        if not result.data:
+            await ctx.send("No hot queries ran yet.")
+            return
+
+        lines = [f"{'statement':<20}{'calls':>7}{'avg ms':>9}{'max ms':>9}"]
+        for row in result.data[:15]:
+            lines.append(f"{row['Name']:<20}{row['Calls']:>7}{row['Avg_ms']:>9.3f}{row['Max_ms']:>9.3f}")
+
+        build_embed = (
+            SimpleEmbed(
+                title = "Hot Query Timings",
+                description = "```" + "\n".join(lines) + "```",
+                color = 0x00AE86
+            )
+        )
+        await ctx.send(embed=build_embed.build())
+
     @bot.command(name="addgame")
     async def add_game(ctx, *, game_name: str):
-        result = service.game_service.create_game(ctx.channel.id, game_name)
+        result = await service.run(service.game_service.create_game, ctx.channel.id, game_name)
         
         if not result.success:
             await ctx.send(result.message)
@@ -55,7 +82,7 @@ def setup_game_commands(bot, service: ServicesProtocol):
 
     @bot.command(name="update_pagination")
     async def add_game(ctx, *, pagination: int):
-        result = service.settings_service.update_pagination(pagination)
+        result = await service.run(service.settings_service.update_pagination, pagination)
         
         if not result.success:
             await ctx.send(result.message)
@@ -63,9 +90,68 @@ def setup_game_commands(bot, service: ServicesProtocol):
 
         await ctx.send(result.message)
 
+    @bot.command(name="server_pagination")
+    async def server_pagination(ctx, size: str):
+        # .server_pagination 10 -> only this server, .server_pagination reset -> back to the global one
+        guild_id = getattr(ctx.guild, "id", None)
+        if guild_id is None:
+            return await ctx.send("⚠ SERVICE ERROR: Server settings only work inside a server.", delete_after=5)
+
+        if size.lower() == "reset":
+            result = await service.run(service.settings_service.reset_guild_pagination, guild_id)
+        else:
+            result = await service.run(service.settings_service.update_pagination, size, guild_id)
+        
+        if not result.success:
+            await ctx.send("⚠ SERVICE ERROR: " + str(result.message), delete_after=5)
+            return
+
+        await ctx.send(result.message)
+
+    @bot.command(name="feature")
+    async def set_feature(ctx, name: str, state: str, scope: str = None):
+        # .feature <name> on|off|reset          -> this server
+        # .feature <name> on|off|reset global   -> every server without its own value
+        # a command name as <name> turns that command on / off (main.py route_to_guild)
+        states = {"on": True, "off": False, "reset": None}
+        if state.lower() not in states:
+            return await ctx.send("⚠ SERVICE ERROR: Use on, off or reset.", delete_after=5)
+
+        guild_id = None if scope == "global" else getattr(ctx.guild, "id", None)
+        result = await service.run(service.settings_service.set_feature, name, states[state.lower()], guild_id)
+
+        if not result.success:
+            await ctx.send("⚠ SERVICE ERROR: " + str(result.message), delete_after=5)
+            return
+
+        await ctx.send(result.message)
+
+    @bot.command(name="settings")
+    async def show_settings(ctx):
+        # straight from the settings cache, no db round trip
+        result = service.settings_service.describe(getattr(ctx.guild, "id", None))
+        data = result.data
+
+        build_embed = (
+            SimpleEmbed(
+                title = "Settings",
+                color = 0x00AE86
+            )
+        )
+        build_embed.add_field(
+            name="Pagination: ",
+            value=f"{data['Pagination']}" + (" (this server)" if data["Pagination_Overridden"] else "")
+        )
+        features = "\n".join(
+            f"{'✅' if enabled else '❌'} {name}" + (" (this server)" if name in data["Overridden_Features"] else "")
+            for name, enabled in sorted(data["Features"].items())
+        )
+        build_embed.add_field(name="Features: ", value=features or "None set, use *.feature*")
+        await ctx.send(embed=build_embed.build())
+
     @bot.command(name="game")
     async def get_game(ctx):
-        result = service.game_service.get_game_for_channel(ctx.channel.id)
+        result = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
 
         if not result.success:
             await ctx.send(result.message)
@@ -76,7 +162,7 @@ def setup_game_commands(bot, service: ServicesProtocol):
 
     @bot.command(name="listgame")
     async def games_cmd(ctx):
-        result = service.game_service.list_games()
+        result = await service.run(service.game_service.list_games)
 
         if not result.success:
             await ctx.send(result.message)
@@ -84,7 +170,7 @@ def setup_game_commands(bot, service: ServicesProtocol):
         
         games = result.data
         
-        game_menu = SelectionMenu(bot, setting_service=service.settings_service, items=games, title="🎮 Select a Game")
+        game_menu = SelectionMenu(bot, setting_service=service.settings_service, guild_id=getattr(ctx.guild, "id", None), items=games, title="🎮 Select a Game", timeout=120)
 
         async def on_game_select(interaction: discord.Interaction, selected_game, index):
             await interaction.response.edit_message(embed=game_menu.build_embed(), view=None)
@@ -92,7 +178,7 @@ def setup_game_commands(bot, service: ServicesProtocol):
             game_id = selected_game["id"]
             
             # Get Banner list on service
-            banners = service.banner_service.get_banners(game_id)
+            banners = await service.run(service.banner_service.get_banners, game_id)
 
             # DO VALIDATION HERE: CHECK IF THE GAME HAS BANNER LIST
             if not banners.success:
@@ -101,23 +187,24 @@ def setup_game_commands(bot, service: ServicesProtocol):
             
             banner_list = [
             {
-                "name": f'ID: {b['Banner_ID']} | {b["Banner_Name"]} | At *{b["Current_Pity"]} pity*. |'
-                        f'Last accessed: {b["Last_Updated"]}',
+                "name": f'ID: {b['Banner_ID']} | {b["Banner_Name"]} | At *{b["Current_Pity"]} pity*. | '
+                        f'{banner_pull_stats(b)} | Last accessed: {b["Last_Updated"]}',
                 "id": b["Banner_ID"]
             }
             for b in banners.data
         ]
 
             # Create banner menu based on selected game
-            banner_menu = SelectionMenu(bot, setting_service=service.settings_service, items=banner_list, title=f"🎴 Select a Banner for {selected_game['name']}")
+            banner_menu = SelectionMenu(bot, setting_service=service.settings_service, guild_id=getattr(ctx.guild, "id", None), items=banner_list, title=f"🎴 Select a Banner for {selected_game['name']}", timeout=120)
 
             async def on_banner_select(interaction: discord.Interaction, selected_banner, index):
                 await interaction.response.edit_message(embed=banner_menu.build_embed(), view=None)
                 
                 banner_id = selected_banner["id"]
 
-                # GET PULL HISTORY
-                history = service.pull_service.get_banner_pulls(banner_id)
+                # GET PULL HISTORY, one page at a time
+                pages = service.pull_service.history_pages(banner_id, service.settings_service.page_size(getattr(ctx.guild, "id", None)))
+                history = await service.run(pages.get_page, 0)
                 
                 # DO VALIDATION HERE: CHECK IF THE GAME HAS BANNER LIST
                 if not history.success:
@@ -127,7 +214,10 @@ def setup_game_commands(bot, service: ServicesProtocol):
                 # Create Table of Pull history
                 view = PaginatedTable(
                     setting_service=service.settings_service,
-                    items=history.data,
+                    guild_id=getattr(ctx.guild, "id", None),
+                    items=history.data["items"],
+                    total=history.data["total"],
+                    fetch_page=lambda page: service.run(pages.get_page, page),
                     title="History",
                     timeout=60
                 )
@@ -147,14 +237,14 @@ def setup_game_commands(bot, service: ServicesProtocol):
 
     @bot.command(name="rename_game")
     async def rename_game(ctx, new_game: str):
-        game = service.game_service.get_game_for_channel(ctx.channel.id)
+        game = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(game.message), 
                 delete_after=5)        
         game_id = game.data['Game_ID']
 
-        rename = service.game_service.rename_game(game_id, new_game)
+        rename = await service.run(service.game_service.rename_game, game_id, new_game)
         if not rename.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(rename.message), 
@@ -165,7 +255,7 @@ def setup_game_commands(bot, service: ServicesProtocol):
     # currency services
     @bot.command(name="cur")
     async def get_currency(ctx):
-        game = service.game_service.get_game_for_channel(ctx.channel.id)
+        game = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(game.message), 
@@ -173,7 +263,7 @@ def setup_game_commands(bot, service: ServicesProtocol):
         game_id = game.data['Game_ID']
         game_name = game.data['Game_Name']
 
-        currency = service.currency_service.get_game_currency_info(game_id)
+        currency = await service.run(service.currency_service.get_game_currency_info, game_id)
         if not currency.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(currency.message), 
@@ -191,16 +281,60 @@ def setup_game_commands(bot, service: ServicesProtocol):
         embed = build_embed.build()
         await ctx.send(embed=embed)
 
+    @bot.command(name="income")
+    async def get_income(ctx):
+        game = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
+        if not game.success:
+            return await ctx.send(
+                "⚠ SERVICE ERROR:"+ str(game.message),
+                delete_after=20)
+        game_id = game.data['Game_ID']
+        game_name = game.data['Game_Name']
+
+        income = await service.run(service.currency_service.get_income, game_id)
+        if not income.success:
+            return await ctx.send(
+                "⚠ SERVICE ERROR:"+ str(income.message),
+                delete_after=20)
+        data = income.data
+
+        build_embed = (
+            SimpleEmbed(
+                title = f"💰 Income | {game_name}",
+                color = 0x00AE86
+            )
+            .set_footer("from the daily totals of .cur-amount / .cur-token changes (UTC days)")
+        )
+        for label, key in (("Last 7 days", "Weekly"), ("Last 30 days", "Monthly")):
+            period = data[key]
+            build_embed.add_field(
+                name=label,
+                value=f"```+{period['Added']} / -{period['Spent']}\nNet: {period['Net']} ({period['Per_Day']} per day)```"
+            )
+
+        if not data["Goal"]:
+            goal_text = "No goal set, use *.goal*"
+        elif data["Currency"] >= data["Goal"]:
+            goal_text = f"Goal of {data['Goal']} already reached"
+        elif data["Projection"] is None:
+            goal_text = f"{data['Currency']} / {data['Goal']}, not earning enough lately to project a date"
+        else:
+            goal_text = (f"{data['Currency']} / {data['Goal']}, about {data['Projection']['Days']} days "
+                         f"-> {data['Projection']['Date']}")
+        build_embed.add_field(name="Goal", value=goal_text)
+
+        await ctx.send(embed=build_embed.build())
+
     @bot.command(name="install-cur")
     async def install_currency(ctx, currency, pull_token):
-        game_info = service.game_service.get_game_for_channel(ctx.channel.id)
+        game_info = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game_info.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(game_info.message), 
                 delete_after=20)        
         game_id = game_info.data['Game_ID']
         
-        currency_install = service.currency_service.install_game_currency(game_id, currency, pull_token)
+        currency_install = await service.run(service.currency_service.install_game_currency, game_id, currency, pull_token)
         if not currency_install.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(currency_install.message), 
@@ -210,14 +344,14 @@ def setup_game_commands(bot, service: ServicesProtocol):
 
     @bot.command(name="goal")
     async def set_currency_goal(ctx, goal: int):
-        game_info = service.game_service.get_game_for_channel(ctx.channel.id)
+        game_info = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game_info.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(game_info.message), 
                 delete_after=20)        
         game_id = game_info.data['Game_ID']
         
-        currency_goal = service.currency_service.set_game_currency_goal(game_id, goal)
+        currency_goal = await service.run(service.currency_service.set_game_currency_goal, game_id, goal)
         if not currency_goal.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(currency_goal.message), 
@@ -227,14 +361,14 @@ def setup_game_commands(bot, service: ServicesProtocol):
         
     @bot.command(name="done_goal")
     async def unset_currency_goal(ctx):
-        game_info = service.game_service.get_game_for_channel(ctx.channel.id)
+        game_info = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game_info.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(game_info.message), 
                 delete_after=20)        
         game_id = game_info.data['Game_ID']
         
-        currency_goal = service.currency_service.unset_game_currency_goal(game_id)
+        currency_goal = await service.run(service.currency_service.unset_game_currency_goal, game_id)
         if not currency_goal.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(currency_goal.message), 
@@ -252,14 +386,14 @@ def setup_game_commands(bot, service: ServicesProtocol):
                 delete_after=20)
             return
         
-        game_info = service.game_service.get_game_for_channel(ctx.channel.id)
+        game_info = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game_info.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(game_info.message), 
                 delete_after=20)        
         game_id = game_info.data['Game_ID']
         
-        amount_update = service.currency_service.update_currency_amount(game_id, amount, reason)
+        amount_update = await service.run(service.currency_service.update_currency_amount, game_id, amount, reason)
         if not amount_update.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(amount_update.message), 
@@ -291,14 +425,14 @@ def setup_game_commands(bot, service: ServicesProtocol):
                 delete_after=20)
             return
         
-        game_info = service.game_service.get_game_for_channel(ctx.channel.id)
+        game_info = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game_info.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(game_info.message), 
                 delete_after=20)        
         game_id = game_info.data['Game_ID']
         
-        token_update = service.currency_service.update_currency_token(game_id, token, reason)
+        token_update = await service.run(service.currency_service.update_currency_token, game_id, token, reason)
         if not token_update.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(token_update.message), 
@@ -306,17 +440,43 @@ def setup_game_commands(bot, service: ServicesProtocol):
 
         await ctx.send(token_update.message)
 
+    @bot.command(name="cur-cost")
+    async def currency_pull_cost(ctx, pull_cost = None):
+        # how much currency one pull costs in this game, the simulator turns the balance into pulls with it
+        if not pull_cost:
+            await ctx.send(
+                "⚠ WARNING Command Format: *.cur-cost* `Currency per Pull`",
+                delete_after=20)
+            return
+
+        game_info = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
+        if not game_info.success:
+            return await ctx.send(
+                "⚠ SERVICE ERROR:"+ str(game_info.message),
+                delete_after=20)
+        game_id = game_info.data['Game_ID']
+
+        update = await service.run(service.simulation_service.update_pull_cost, game_id, pull_cost)
+        if not update.success:
+            return await ctx.send(
+                "⚠ SERVICE ERROR:"+ str(update.message),
+                delete_after=20)
+
+        await ctx.send(update.message)
+
     # logs on every action like spending or pulling. figure it out how or where to put this logging <- figured it out, logs on service.
     @bot.command(name="cur-logs")
     async def currency_update_amount(ctx):
-        game_info = service.game_service.get_game_for_channel(ctx.channel.id)
+        game_info = await service.run(service.game_service.get_game_for_channel, ctx.channel.id)
         if not game_info.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(game_info.message), 
                 delete_after=20)        
         game_id = game_info.data['Game_ID']
         
-        currency_logs = service.currency_service.get_game_currency_action_logs(game_id)
+        # only the first page now, the table fetches the rest when you click
+        pages = service.currency_service.currency_log_pages(game_id, service.settings_service.page_size(getattr(ctx.guild, "id", None)))
+        currency_logs = await service.run(pages.get_page, 0)
         if not currency_logs.success:
             return await ctx.send(
                 "⚠ SERVICE ERROR:"+ str(currency_logs.message), 
@@ -325,7 +485,10 @@ def setup_game_commands(bot, service: ServicesProtocol):
         # Create Table of Currency Logs
         view = PaginatedTable(
             setting_service=service.settings_service,
-            items=currency_logs.data,
+            guild_id=getattr(ctx.guild, "id", None),
+            items=currency_logs.data["items"],
+            total=currency_logs.data["total"],
+            fetch_page=lambda page: service.run(pages.get_page, page),
             title="Currency Logs",
             timeout=60
         )
@@ -0,0 +1,78 @@
+import io
+import json
+import discord
+from discord.ext import commands
+from services.interface import ServicesProtocol
+from UI.SimpleEmbed import SimpleEmbed
+
+
+def shard_summary(shard):
+    # runs on each shard's own db thread through service.aggregate
+    return shard.db.get_shard_summary()
+
+
+def shard_channel_ids(shard):
+    return shard.db.get_channel_ids()
+
+
+def setup_shard_commands(bot, service: ServicesProtocol):
+    @bot.command(name="shard_map")
+    @commands.is_owner()
+    async def shard_map(ctx):
+        # {guild_id: [channel_id, ...]} of every channel in the database, feed it to
+        #   python shard_cli.py split --guild-map shard_map.json
+        # channels the bot cant see anymore are left out and end up in the global shard
+        channel_ids = {}
+        for name, result in (await service.aggregate(shard_channel_ids)).items():
+            if not result.success:
+                await ctx.send(f"⚠ SERVICE ERROR ({name}): " + str(result.message))
+                return
+            channel_ids.update(dict.fromkeys(result.data))
+
+        guild_map = {}
+        missing = 0
+        for channel_id in channel_ids:
+            channel = bot.get_channel(int(channel_id)) if str(channel_id).isdigit() else None
+            guild = getattr(channel, "guild", None)
+            if guild is None:
+                missing += 1
+                continue
+            guild_map.setdefault(str(guild.id), []).append(str(channel_id))
+
+        data = io.BytesIO(json.dumps(guild_map, indent=2).encode())
+        await ctx.send(
+            f"⚠ SERVICE MESSAGE: `{len(channel_ids) - missing} channels in {len(guild_map)} servers, {missing} unknown channels go to the global shard`",
+            file=discord.File(data, filename="shard_map.json")
+        )
+
+    @bot.command(name="shards")
+    @commands.is_owner()
+    async def shards(ctx):
+        # counts from every shard (just the one when the db isnt split)
+        results = await service.aggregate(shard_summary)
+
+        lines = [f"{'shard':<26}{'games':>6}{'pulls':>8}{'open':>5}{'kb':>8}"]
+        totals = {"games": 0, "pulls": 0, "open_sessions": 0, "size_kb": 0}
+        failed = []
+        for name, result in results.items():
+            if not result.success:
+                failed.append(name)
+                continue
+            row = result.data
+            for key in totals:
+                totals[key] += row[key]
+            lines.append(f"{name[:25]:<26}{row['games']:>6}{row['pulls']:>8}{row['open_sessions']:>5}{row['size_kb']:>8}")
+        lines.append(f"{'total':<26}{totals['games']:>6}{totals['pulls']:>8}{totals['open_sessions']:>5}{totals['size_kb']:>8}")
+
+        # embed description tops out at 4096 characters, the totals line always stays
+        body = lines[:-1]
+        while len("\n".join(body)) > 3800:
+            body.pop()
+        build_embed = SimpleEmbed(
+            title=f"Shards ({len(results)})",
+            description="```" + "\n".join(body + [lines[-1]]) + "```",
+            color=0x00AE86
+        )
+        if failed:
+            build_embed.set_footer(f"couldn't read: {', '.join(failed)[:200]}")
+        await ctx.send(embed=build_embed.build())
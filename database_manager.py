@@ -1,18 +1,146 @@
 import sqlite3
 import os
+import re
+import time
 from help import Result
+from migrations import MIGRATIONS, SCHEMA_VERSION, EPOCH_NOW
+
+
+# sqlite connection profiles, pick one with DB_PROFILE in the .env (default is "wal")
+#  safe: the old plain sqlite3.connect behaviour, rollback journal and a full fsync on every commit
+#  wal:  readers dont wait for the writer and commits only fsync at checkpoints.
+#        NORMAL is still corruption safe in WAL, a power cut can only lose the last few commits
+#  fast: wal without any fsync, only for benchmarks / throwaway databases !!
+CONNECTION_PROFILES = {
+    "safe": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "foreign_keys": "ON",
+    },
+    "wal": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,       # negative = KiB, so ~16MB of page cache
+        "mmap_size": 134217728,     # 128MB
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+    "fast": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+}
+
+# sqlite3 keeps this many compiled statements per connection (keyed on the exact sql string).
+# the default 128 is less than the distinct statements in this file, so the hot ones could get pushed out
+STATEMENT_CACHE_SIZE = 512
+
+# 50/50 result of a pull read from its notes: 1 won, 0 lost, 2 guaranteed, None if the notes dont say.
+# whole words only, LIKE '%win%' counted "twin" / "window" as a win and "lossless" as a loss
+COIN_FLIP_WORDS = re.compile(r"\b(guaranteed?|won|win|lost|lose|loss)\b", re.IGNORECASE)
+
+
+def coin_flip_outcome(notes):
+    if not notes:
+        return None
+    words = {word.lower() for word in COIN_FLIP_WORDS.findall(notes)}
+    # same precedence the old CASE had: guaranteed beats lost beats won
+    if words & {"guarantee", "guaranteed"}:
+        return 2
+    if words & {"lost", "lose", "loss"}:
+        return 0
+    if words & {"won", "win"}:
+        return 1
+    return None
+
+
+# registered on every connection in connect_db, so the queries can still filter / order on it
+COIN_FLIP_OUTCOME = "coin_flip(notes)"
+
+# meta.last_modified bookkeeping, once per write transaction instead of a trigger per updated row
+META_TOUCH = f"UPDATE meta SET last_modified = {EPOCH_NOW} WHERE id = 1"
+
+
+class Meta_Connection(sqlite3.Connection):
+    # sqlite3 has no commit hook, so this is one: touch_sql runs right before a transaction that
+    # wrote something commits (`with self.connection:` or .commit()), same transaction so no extra
+    # fsync. None until migrate() knows the meta table is there
+    touch_sql = None
+    # total_changes when the last transaction ended
+    changes_seen = 0
+
+    def touch(self):
+        # in_transaction is only true after a write statement started one. an UPDATE that matched
+        # nothing or a write that failed still opens it, so it also has to have changed a row
+        if self.touch_sql is not None and self.in_transaction and self.total_changes > self.changes_seen:
+            self.execute(self.touch_sql)
+
+    def commit(self):
+        self.touch()
+        super().commit()
+        self.changes_seen = self.total_changes
+
+    def rollback(self):
+        # total_changes doesnt go back down on a rollback
+        super().rollback()
+        self.changes_seen = self.total_changes
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                try:
+                    self.touch()
+                except sqlite3.Error as e:
+                    # roll the whole transaction back, same as a failed statement inside the with block
+                    super().__exit__(type(e), e, e.__traceback__)
+                    raise
+            return super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            self.changes_seen = self.total_changes
 
 
 class DatabaseManager:
-    def __init__(self, db_path="data.db"):
+    def __init__(self, db_path="data.db", profile="wal"):
         self.db_path = db_path
+        self.profile = profile
         self.connection = None
+        self.query_cursor = None
+        # statement name -> [calls, total seconds, slowest seconds], filled by run_query
+        self.query_stats = {}
+        # banner id -> (pity, pull_id, timestamp) not written yet, see the WRITE BEHIND region
+        self.pending_banners = {}
+        self.on_pending = None
 
     def connect_db(self):
+        # .connect calls this again on a live db, flush + close the old connection instead of dropping it
+        if self.connection is not None:
+            self.close_db()
+
         try:
             file_exists = os.path.exists(self.db_path)
             # this is the database connection !!
-            self.connection = sqlite3.connect(self.db_path)
+            # check_same_thread off because the AsyncDatabaseManager worker thread owns the queries
+            self.connection = sqlite3.connect(
+                self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE,
+                factory=Meta_Connection
+            )
+            self.connection.create_function("coin_flip", 1, coin_flip_outcome, deterministic=True)
+            # shared cursor for run_query, see the QUERY REGISTRY region
+            self.query_cursor = self.connection.cursor()
+            self.apply_profile(self.profile)
+            # a reconnect to an already migrated file doesnt go through migrate(), arm the meta touch here
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                self.connection.touch_sql = META_TOUCH
 
             db_message = ""
             if file_exists:
@@ -34,202 +162,301 @@ class DatabaseManager:
 
     def is_connected(self):
         return self.connection is not None
-        
-    def create_tables(self):
+
+    def close_db(self):
+        # the shard router closes shards it evicts, run it on the db thread after the queued work
+        if self.connection is not None:
+            self.flush_banner_writes()
+            self.connection.close()
+        self.connection = None
+        self.query_cursor = None
+
+    def apply_profile(self, profile):
+        # pragmas are per connection so this runs every time we (re)connect
+        if profile not in CONNECTION_PROFILES:
+            raise ValueError(f"Unknown connection profile: {profile}")
+
+        cur = self.connection.cursor()
+        for pragma, value in CONNECTION_PROFILES[profile].items():
+            cur.execute(f"PRAGMA {pragma} = {value}")
+            # journal_mode answers with a row, drain it
+            cur.fetchall()
+        
+    def migrate(self):
+        # bring the schema up to date, see migrations.py.
+        # on an existing up to date database this is just one PRAGMA read
         if not self.is_connected():
             return Result.fail(
                 code="DB_CONNECTION_FAILED",
-                message="Couldn't create table: Failed to connect to the database"
+                message="Couldn't migrate the database: Failed to connect to the database"
             )
-        
+
         cur = self.connection.cursor()
-        # tables for games, banner_name, pull_history, sessions, settings
-        # me go ask ai, can you make me a query of this table with this columns and these pk and fk, ty !
+        cur.execute("PRAGMA user_version")
+        current_version = cur.fetchone()[0]
+
+        if current_version >= SCHEMA_VERSION:
+            self.connection.touch_sql = META_TOUCH
+            return Result.ok(
+                code="SCHEMA_UP_TO_DATE",
+                message=f"Database schema is up to date (v{current_version})"
+            )
+
+        # table rebuilds in the steps need foreign keys off, pragma is ignored inside a transaction
+        cur.execute("PRAGMA foreign_keys = OFF")
+        # the steps rebuild meta itself, no last_modified bookkeeping until they are done
+        self.connection.touch_sql = None
+
+        for version, description, step in MIGRATIONS:
+            if version <= current_version:
+                continue
+
+            try:
+                # step + version bump in one transaction, all or nothing
+                cur.execute("BEGIN")
+                step(cur)
+                cur.execute(f"PRAGMA user_version = {version}")
+                self.connection.commit()
+            except sqlite3.Error as e:
+                self.connection.rollback()
+                cur.execute("PRAGMA foreign_keys = ON")
+                return Result.fail(
+                    code="MIGRATION_FAILED",
+                    message=f"Migration {version} ({description}) failed",
+                    error=str(e)
+                )
+
+        cur.execute("PRAGMA foreign_keys = ON")
+        self.connection.touch_sql = META_TOUCH
+
+        return Result.ok(
+            code="SCHEMA_MIGRATED",
+            message=f"Database schema migrated from v{current_version} to v{SCHEMA_VERSION}"
+        )
+
+    #region QUERY REGISTRY
+
+    # name: (query, sample params) for the statements that run on almost every command.
+    # they go through run_query so each one is always the exact same string (compiled once by the
+    # statement cache) and gets timed, check_query_plans EXPLAINs all of them on startup
+    HOT_QUERIES = {
+        "game_by_channel": ("SELECT * FROM games WHERE channel_id = ?", (0,)),
+        "game_by_name": ("SELECT * FROM games WHERE game_name = ?", ("",)),
+        "game_banners": ("""
+            SELECT
+                b.banner_id, b.banner_name, b.current_pity, b.last_updated,
+                COALESCE(s.pull_count, 0), s.pity_total, ph.entry_name, ph.pity, ph.timestamp
+            FROM banners b
+            LEFT JOIN banner_summary s ON s.banner_id = b.banner_id
+            LEFT JOIN pull_history ph ON ph.pull_id = s.last_pull_id
+            WHERE b.game_id = ?
+        """, (0,)),
+        "banner_by_name": ("SELECT * FROM banners WHERE banner_name = ?", ("",)),
+        "pulls_by_banner": ("SELECT pull_id, entry_name, pity, notes, timestamp FROM pull_history WHERE banner_id = ? ORDER BY timestamp", (0,)),
+        "pulls_page": ("SELECT pull_id, entry_name, pity, notes, timestamp FROM pull_history WHERE banner_id = ? AND (timestamp, pull_id) > (?, ?) ORDER BY timestamp, pull_id LIMIT ?", (0, 0, 0, 10)),
+        "pulls_count": ("SELECT COUNT(*) FROM pull_history WHERE banner_id = ?", (0,)),
+        "pity_column": (f"""
+            SELECT pity, {COIN_FLIP_OUTCOME}
+            FROM pull_history WHERE banner_id = ? ORDER BY timestamp, pull_id
+        """, (0,)),
+        "last_coin_flip": (f"""
+            SELECT {COIN_FLIP_OUTCOME} AS outcome
+            FROM pull_history WHERE banner_id = ? AND outcome IS NOT NULL
+            ORDER BY timestamp DESC, pull_id DESC LIMIT 1
+        """, (0,)),
+        "current_session": (f"""
+            SELECT
+                s.start_time,
+                COALESCE(s.duration, {EPOCH_NOW} - s.start_time),
+                sb.break_start,
+                sb.break_end,
+                COALESCE(sb.duration, {EPOCH_NOW} - sb.break_start)
+            FROM sessions s
+            LEFT JOIN session_breaks sb ON sb.session_id = s.session_id
+            WHERE s.session_id = ?
+            ORDER BY sb.break_id
+        """, (0,)),
+        "currency_for_game": ("SELECT currency, pull_token, goal FROM currency_balance WHERE game_id = ?", (0,)),
+        "currency_logs": ("SELECT amount, action, reason, timestamp FROM currency_logs WHERE game_id = ? ORDER BY timestamp", (0,)),
+        "currency_logs_page": ("SELECT id, amount, action, reason, timestamp FROM currency_logs WHERE game_id = ? AND (timestamp, id) > (?, ?) ORDER BY timestamp, id LIMIT ?", (0, 0, 0, 10)),
+        "currency_daily": ("SELECT day, added, spent FROM currency_daily WHERE game_id = ? AND day >= ? ORDER BY day", (0, "")),
+        "currency_first_day": ("SELECT MIN(day) FROM currency_daily WHERE game_id = ?", (0,)),
+        "sessions_page": ("SELECT session_id, session_name FROM sessions WHERE session_id > ? ORDER BY session_id LIMIT ?", (0, 10)),
+        # writes, EXPLAIN QUERY PLAN still shows how they find their row
+        "add_pull": ("""
+            INSERT INTO pull_history (banner_id, game_id, entry_name, pity, notes)
+            SELECT b.banner_id, b.game_id, ?, ?, ?
+            FROM banners b
+            WHERE b.banner_id = ?
+            RETURNING pull_id, timestamp
+        """, ("", 0, None, 0)),
+        "flush_banner": ("""
+            UPDATE banners
+            SET current_pity = ?, last_updated = MAX(COALESCE(last_updated, 0), ?), last_pull_id = ?
+            WHERE banner_id = ?
+        """, (0, 0, 0, 0)),
+        "update_banner_pity": ("UPDATE banners SET current_pity = ? WHERE banner_id = ?", (0, 0)),
+        # banner_summary upkeep (pull count, pity total, newest pull), always in the same transaction
+        # as the pull_history write it follows so the banner lists can trust it without a scan
+        "summary_add": ("""
+            INSERT INTO banner_summary (banner_id, pull_count, pity_total, last_pull_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (banner_id) DO UPDATE SET
+                pull_count = pull_count + excluded.pull_count,
+                pity_total = pity_total + excluded.pity_total,
+                last_pull_id = excluded.last_pull_id
+        """, (0, 1, 0, 0)),
+        "summary_edit": ("""
+            UPDATE banner_summary
+            SET pity_total = pity_total - COALESCE((SELECT pity FROM pull_history WHERE pull_id = ?), 0) + ?
+            WHERE banner_id = (SELECT banner_id FROM pull_history WHERE pull_id = ?)
+        """, (0, 0, 0)),
+        "summary_remove": ("""
+            UPDATE banner_summary
+            SET pull_count = pull_count - 1,
+                pity_total = pity_total - ?,
+                last_pull_id = CASE WHEN last_pull_id = ? THEN (
+                    SELECT pull_id FROM pull_history
+                    WHERE banner_id = banner_summary.banner_id
+                    ORDER BY timestamp DESC, pull_id DESC LIMIT 1
+                ) ELSE last_pull_id END
+            WHERE banner_id = ?
+        """, (0, 0, 0)),
+    }
+
+    def run_query(self, name, params=(), fetch=None):
+        # fetch="one" / "all" returns the rows, otherwise the cursor (for rowcount).
+        # the cursor is shared, read what you need from it before the next run_query
+        start = time.perf_counter()
+        cur = self.query_cursor.execute(self.HOT_QUERIES[name][0], params)
+        if fetch == "one":
+            result = cur.fetchone()
+        elif fetch == "all":
+            result = cur.fetchall()
+        else:
+            result = cur
+        elapsed = time.perf_counter() - start
+
+        stats = self.query_stats.get(name)
+        if stats is None:
+            self.query_stats[name] = [1, elapsed, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed > stats[2]:
+                stats[2] = elapsed
+        return result
+
+    def get_query_stats(self):
+        # (name, calls, avg ms, slowest ms, total ms) busiest first
+        rows = [
+            (name, calls, total / calls * 1000, slowest * 1000, total * 1000)
+            for name, (calls, total, slowest) in self.query_stats.items()
+        ]
+        rows.sort(key=lambda row: row[4], reverse=True)
+        return Result.ok(
+            code="QUERY_STATS_OBTAINED",
+            message=f"Timing for {len(rows)} statements",
+            data=rows
+        )
+
+    def reset_query_stats(self):
+        self.query_stats.clear()
+
+    def check_query_plans(self):
+        # self check: EXPLAIN QUERY PLAN every hot query, if one of them went back to a full SCAN
+        # (index dropped / query changed) fail so we notice on startup instead of when it gets slow
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't check query plans: Failed to connect to the database"
+            )
+
+        scans = []
         try:
-            cur.executescript("""
-                PRAGMA foreign_keys = ON;
-                -- Meta table
-                CREATE TABLE IF NOT EXISTS meta (
-                    id INTEGER PRIMARY KEY CHECK(id = 1),
-                    version TEXT DEFAULT '0.1',
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    last_modified TEXT DEFAULT CURRENT_TIMESTAMP
-                );
-
-                -- Games table
-                CREATE TABLE IF NOT EXISTS games (
-                    game_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    game_name TEXT NOT NULL,
-                    channel_id TEXT
-                );
-
-                -- Banners table
-                CREATE TABLE IF NOT EXISTS banners (
-                    banner_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    game_id INTEGER,
-                    banner_name TEXT NOT NULL,
-                    current_pity INTEGER DEFAULT 0,
-                    max_pity INTEGER DEFAULT 0,
-                    last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
-                );
-
-                -- Pull history table
-                CREATE TABLE IF NOT EXISTS pull_history (
-                    pull_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    banner_id INTEGER,
-                    game_id INTEGER,
-                    entry_name TEXT NOT NULL,
-                    pity INTEGER DEFAULT 0,
-                    notes TEXT,
-                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (banner_id) REFERENCES banners(banner_id) ON DELETE CASCADE,
-                    FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
-                );
-
-                -- Sessions table
-                CREATE TABLE IF NOT EXISTS sessions (
-                    session_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_name TEXT NOT NULL,
-                    start_time TEXT DEFAULT CURRENT_TIMESTAMP,
-                    end_time TEXT
-                );
-
-                -- Session breaks table
-                CREATE TABLE IF NOT EXISTS session_breaks (
-                    break_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id INTEGER,
-                    break_start TEXT DEFAULT CURRENT_TIMESTAMP,
-                    break_end TEXT,
-                    FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
-                );
-                              
-                -- Currency logging table, for the balance
-                CREATE TABLE IF NOT EXISTS "currency_balance" (
-                    "id"	INTEGER,
-                    "game_id"	INTEGER,
-                    "currency"	INTEGER,
-                    "pull_token"	INTEGER,
-                    "goal"	INTEGER,
-                    PRIMARY KEY("id" AUTOINCREMENT),
-                    FOREIGN KEY("game_id") REFERENCES "" on DELETE CASCADE
-                );
-                              
-                -- currency logging, for the actual logs
-                CREATE TABLE "currency_logs" (
-                    "id"	INTEGER,
-                    "game_id"	INTEGER,
-                    "amount"	INTEGER,
-                    "action"	TEXT NOT NULL CHECK(action IN ('add', 'spend')),
-                    "reason"	REAL,
-                    "timestamp"	TEXT DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY("id" AUTOINCREMENT),
-                    FOREIGN KEY("game_id") REFERENCES "games"("game_id") ON DELETE CASCADE
-                );
-
-                -- Settings table
-                CREATE TABLE IF NOT EXISTS settings (
-                    id INTEGER DEFAULT 1 CHECK(id = 1),
-                    pagination_size INTEGER DEFAULT 10,
-                    features_enabled TEXT DEFAULT '{}',
-                    PRIMARY KEY("id")
-                );
-                              
-                -- triggers
-                DROP TRIGGER IF EXISTS meta_timestamp_to_banner;
-                CREATE TRIGGER meta_timestamp_to_banner
-                AFTER UPDATE ON banners
-                BEGIN
-                    UPDATE meta
-                    SET last_modified = CURRENT_TIMESTAMP
-                    WHERE version = "0.1";
-                END;
-                              
-                DROP TRIGGER IF EXISTS meta_timestamp_to_history;
-                CREATE TRIGGER meta_timestamp_to_history
-                AFTER UPDATE ON pull_history
-                BEGIN
-                    UPDATE meta
-                    SET last_modified = CURRENT_TIMESTAMP
-                    WHERE version = "0.1";
-                END;
-                              
-                DROP TRIGGER IF EXISTS meta_timestamp_to_currency;
-                CREATE TRIGGER meta_timestamp_to_currency
-                AFTER UPDATE ON currency_balance
-                BEGIN
-                    UPDATE meta
-                    SET last_modified = CURRENT_TIMESTAMP
-                    WHERE version = "0.1";
-                END
-                """)
-        except sqlite3.OperationalError as e:
+            cur = self.connection.cursor()
+            for name, (query, params) in self.HOT_QUERIES.items():
+                cur.execute("EXPLAIN QUERY PLAN " + query, params)
+                for row in cur.fetchall():
+                    detail = row[-1]
+                    if detail.startswith("SCAN") or "TEMP B-TREE" in detail:
+                        scans.append(f"{name}: {detail}")
+        except sqlite3.Error as e:
             return Result.fail(
                 code="SQLITE_ERROR",
-                message="SQLite error occurred during table creation",
+                message="SQLite error occurred while checking query plans",
                 error=str(e)
             )
-        
-        self.connection.commit()
+
+        if scans:
+            return Result.fail(
+                code="QUERY_PLAN_REGRESSION",
+                message="Hot queries are not using an index",
+                error="; ".join(scans)
+            )
+
         return Result.ok(
-            code="TABLES_READY",
-            message="Database tables are ready"
+            code="QUERY_PLANS_OK",
+            message="All hot queries use an index"
         )
-    
+
+    #endregion
+
 
     #region EXISTENCE CHECKS
+    # SELECT 1 ... LIMIT 1, we only care if a row is there not what is in it
    
     def game_exists(self, game_id):
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM games WHERE game_id = ?", (game_id,))
+        cur.execute("SELECT 1 FROM games WHERE game_id = ? LIMIT 1", (game_id,))
 
         return cur.fetchone() is not None
     
     def game_exists_with_name(self, game_name):
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM games WHERE game_name = ?", (game_name,))
+        cur.execute("SELECT 1 FROM games WHERE game_name = ? LIMIT 1", (game_name,))
 
         return cur.fetchone() is not None
 
     def game_exists_with_channel_ID(self, channel_id):  
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM games WHERE channel_id = ?", (channel_id,))
+        cur.execute("SELECT 1 FROM games WHERE channel_id = ? LIMIT 1", (channel_id,))
 
         return cur.fetchone() is not None
 
     def banner_exists(self, banner_id):
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM banners WHERE banner_id = ?", (banner_id,))
+        cur.execute("SELECT 1 FROM banners WHERE banner_id = ? LIMIT 1", (banner_id,))
 
         return cur.fetchone() is not None
     
     def banner_name_exists(self, banner_name):
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM banners WHERE banner_name = ?", (banner_name,))
+        cur.execute("SELECT 1 FROM banners WHERE banner_name = ? LIMIT 1", (banner_name,))
 
         return cur.fetchone() is not None
 
     def pull_entry_exists(self, pull_id):
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM pull_history WHERE pull_id = ?",(pull_id,))
+        cur.execute("SELECT 1 FROM pull_history WHERE pull_id = ? LIMIT 1", (pull_id,))
 
         return cur.fetchone() is not None
     
     def session_exists(self, session_id):
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,))
+        cur.execute("SELECT 1 FROM sessions WHERE session_id = ? LIMIT 1", (session_id,))
 
         return cur.fetchone() is not None
     
     def break_session_exists(self, break_id):
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM session_breaks WHERE break_id = ?", (break_id,))
+        cur.execute("SELECT 1 FROM session_breaks WHERE break_id = ? LIMIT 1", (break_id,))
 
         return cur.fetchone() is not None
     
     def currency_for_game_exists(self, game_id):
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM currency_balance WHERE game_id = ?", (game_id,))
+        cur.execute("SELECT 1 FROM currency_balance WHERE game_id = ? LIMIT 1", (game_id,))
 
         return cur.fetchone() is not None
     
@@ -243,6 +470,8 @@ class DatabaseManager:
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't get current pity for the banner: Failed to connect to the database"
             ) 
+
+        self.flush_banner_writes()
         
         cur = self.connection.cursor()
         cur.execute("SELECT current_pity FROM banners WHERE banner_id = ?", (banner_id,))
@@ -259,21 +488,18 @@ class DatabaseManager:
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't update pity: Failed to connect to the database"
             ) 
+
+        self.flush_banner_writes()
         
-        if not self.banner_exists(banner_id):
-            print("banner does not exists")
-            return Result.fail(
-                code="BANNER_NOT_FOUND",
-                message="Couldn't update pity: Banner does not exist"
-            ) 
         try:
             with self.connection:
                 cur = self.connection.cursor()
                 cur.execute("UPDATE banners SET current_pity = ? WHERE banner_id = ?", (pity, banner_id,))
+                # no row touched = no banner with that id, no need for a separate exists query
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="BANNER_PITY_UPDATE_FAIL",
-                        message="Couldn't update pity"
+                        code="BANNER_NOT_FOUND",
+                        message="Couldn't update pity: Banner does not exist"
                     ) 
                 else:
                     return Result.ok(
@@ -370,7 +596,7 @@ class DatabaseManager:
                         message="Version does not exist"
                     )
                 else:
-                    cur.execute("UPDATE meta SET last_modified = CURRENT_TIMESTAMP WHERE version = ?", (version,))
+                    cur.execute(f"UPDATE meta SET last_modified = {EPOCH_NOW} WHERE version = ?", (version,))
                     return Result.ok(
                         code="VERSION_UPDATED",
                         message="Version update successfully!"
@@ -395,21 +621,21 @@ class DatabaseManager:
                 message="Couldn't add game: Failed to connect to the database"
             ) 
         
-        # check if game already exists 
-        if self.game_exists_with_name(game):
-            return Result.fail(
-                code="GAME_ALREADY_EXISTS",
-                message="A game already exists for this channel"
-            )
-        
         try: 
             with self.connection:        
                 cur = self.connection.cursor()
-                cur.execute("INSERT INTO games (game_name, channel_id) VALUES (?, ?)", (game, ch_id,))
+                # only inserts when no game has this name or channel yet, nothing inserted = already exists
+                cur.execute("""
+                    INSERT INTO games (game_name, channel_id)
+                    SELECT ?, ?
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM games WHERE game_name = ? OR channel_id = ?
+                    )
+                """, (game, ch_id, game, ch_id))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="GAME_CREATE_FAILED",
-                        message="Failed to add game"
+                        code="GAME_ALREADY_EXISTS",
+                        message="A game already exists for this channel"
                     )
                 else:
                     return Result.ok(
@@ -431,12 +657,6 @@ class DatabaseManager:
                 message="Couldn't get game by id: Failed to connect to the database"
             )
         
-        if not self.game_exists(game_id):
-            return Result.fail(
-                code="GAME_NOT_FOUND",
-                message=f"game with game id: {game_id} does not exists."
-            )
-        
         cur = self.connection.cursor()
         cur.execute("SELECT * FROM games WHERE game_id = ?",(game_id,))
         res = cur.fetchone()
@@ -459,15 +679,7 @@ class DatabaseManager:
                 message="Couldn't get game by ch id: Failed to connect to the database"
             )
         
-        if not self.game_exists_with_channel_ID(ch_id):
-            return Result.fail(
-                code="GAME_NOT_FOUND",
-                message=f"game with channel id: {ch_id} does not exists."
-            )
-        
-        cur = self.connection.cursor()
-        cur.execute("SELECT * FROM games WHERE channel_id = ?",(ch_id,))
-        res = cur.fetchone()
+        res = self.run_query("game_by_channel", (ch_id,), fetch="one")
         if res is None:
             return Result.fail(
                 code="GAME_NOT_FOUND",
@@ -509,20 +721,14 @@ class DatabaseManager:
                 message="couldn't update game name: Failed to connect to the database"
             ) 
         
-        if not self.game_exists(game_id):
-            return Result.fail(
-                code="GAME_NOT_FOUND",
-                message=f"Game with id: {game_id} does not exists."
-            )
-        
         try: 
             with self.connection:        
                 cur = self.connection.cursor()
                 cur.execute("UPDATE games SET game_name = ? WHERE game_id = ?", (game_name, game_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="GAME_UPDATE_FAILED",
-                        message="Failed to update game name"
+                        code="GAME_NOT_FOUND",
+                        message=f"Game with game id: {game_id} does not exists."
                     )
                 else:
                     return Result.ok(
@@ -544,20 +750,14 @@ class DatabaseManager:
                 message="Couldn't update game channel id: Failed to connect to the database"
             ) 
         
-        if not self.game_exists(game_id):
-            return Result.fail(
-                code="GAME_NOT_FOUND",
-                message=f"game with game id: {game_id} does not exists."
-            )
-        
         try: 
             with self.connection:        
                 cur = self.connection.cursor()
                 cur.execute("UPDATE games SET channel_id = ? WHERE game_id = ?", (channel_id, game_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="GAME_UPDATE_FAILED",
-                        message="Failed to update game channel"
+                        code="GAME_NOT_FOUND",
+                        message=f"Game with game id: {game_id} does not exists."
                     )
                 else:
                     return Result.ok(
@@ -579,20 +779,14 @@ class DatabaseManager:
                 message="Couldn't delete game: Failed to connect to the database"
             ) 
         
-        if not self.game_exists(game_id):
-            return Result.fail(
-                code="GAME_NOT_FOUND",
-                message=f"game with game id: {game_id} does not exists."
-            )
-        
         try: 
             with self.connection:        
                 cur = self.connection.cursor()
                 cur.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="GAME_DELETE_FAILED",
-                        message="Failed to delete game"
+                        code="GAME_NOT_FOUND",
+                        message=f"Game with game id: {game_id} does not exists."
                     )
                 else:
                     return Result.ok(
@@ -620,21 +814,19 @@ class DatabaseManager:
                 message="Couldn't add banner: Failed to connect to the database"
             ) 
         
-        # check if banner already exists first 
-        if self.banner_name_exists(banner_name):
-            return Result.fail(
-                code="BANNER_ALREADY_EXISTS",
-                message="A banner already exists with this name"
-            )
-        
         try: 
             with self.connection:        
                 cur = self.connection.cursor()
-                cur.execute("INSERT INTO banners (game_id, banner_name, current_pity, max_pity) VALUES (?, ?, ?, ?)", (game_id, banner_name,current_pity, max_pity,))
+                # nothing inserted = the name is already taken
+                cur.execute("""
+                    INSERT INTO banners (game_id, banner_name, current_pity, max_pity)
+                    SELECT ?, ?, ?, ?
+                    WHERE NOT EXISTS (SELECT 1 FROM banners WHERE banner_name = ?)
+                """, (game_id, banner_name, current_pity, max_pity, banner_name))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                            code="BANNER_CREATE_FAILED",
-                            message="Failed to add banner"
+                            code="BANNER_ALREADY_EXISTS",
+                            message="A banner already exists with this name"
                         )
                 else:
                     return Result.ok(
@@ -655,9 +847,15 @@ class DatabaseManager:
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't get banner: Failed to connect to the database"
             ) 
+
+        self.flush_banner_writes()
         
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM banners WHERE banner_id = ?", (banner_id,))
+        # columns spelled out, callers unpack exactly these six
+        cur.execute("""
+            SELECT banner_id, game_id, banner_name, current_pity, max_pity, last_updated
+            FROM banners WHERE banner_id = ?
+        """, (banner_id,))
         res = cur.fetchone()
         if res is None:
             return Result.fail(
@@ -677,6 +875,8 @@ class DatabaseManager:
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't get game banners: Failed to connect to the database"
             ) 
+
+        self.flush_banner_writes()
         
         if not self.game_exists(game_id):
             print(f"Game id: {game_id} does not exists")
@@ -685,9 +885,7 @@ class DatabaseManager:
                 message="Game does not exist"
             ) 
         
-        cur = self.connection.cursor()
-        cur.execute("SELECT banner_id, banner_name, current_pity, last_updated FROM banners WHERE game_id = ?", (game_id,))
-        res = cur.fetchall()
+        res = self.run_query("game_banners", (game_id,), fetch="all")
         if not res:
             return Result.fail(
                 code="NO_BANNERS_FOUND",
@@ -706,12 +904,8 @@ class DatabaseManager:
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't update banner name: Failed to connect to the database"
             ) 
-        
-        if not self.banner_exists(banner_id):
-            return Result.fail(
-                code="BANNER_NOT_FOUND",
-                message=f"Banner with banner id: {banner_id} does not exists."
-            ) 
+
+        self.flush_banner_writes()
         
         try: 
             with self.connection:        
@@ -719,8 +913,8 @@ class DatabaseManager:
                 cur.execute("UPDATE banners SET banner_name = ? WHERE banner_id = ?", (new_banner_name, banner_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                    code="BANNER_UPDATE_FAILED",
-                    message="Failed to update banner name"
+                    code="BANNER_NOT_FOUND",
+                    message=f"Banner with banner id: {banner_id} does not exists."
                 ) 
                 else:
                     return Result.ok(
@@ -742,21 +936,16 @@ class DatabaseManager:
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't update banner pity: Failed to connect to the database"
             ) 
-        
-        if not self.banner_exists(banner_id):
-            return Result.fail(
-                code="BANNER_NOT_FOUND",
-                message=f"Banner with banner id: {banner_id} does not exists."
-            ) 
+
+        self.flush_banner_writes()
         
         try: 
             with self.connection:        
-                cur = self.connection.cursor()
-                cur.execute("UPDATE banners SET current_pity = ? WHERE banner_id = ?", (new_pity, banner_id,))
+                cur = self.run_query("update_banner_pity", (new_pity, banner_id))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="BANNER_PITY_UPDATE_FAILED",
-                        message="Couldn't update banner pity"
+                        code="BANNER_NOT_FOUND",
+                        message=f"Banner with banner id: {banner_id} does not exists."
                     ) 
                 else:
                     return Result.ok(
@@ -777,12 +966,8 @@ class DatabaseManager:
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't update banner's max pity: Failed to connect to the database"
             ) 
-        
-        if not self.banner_exists(banner_id):
-            return Result.fail(
-                code="BANNER_NOT_FOUND",
-                message=f"Banner with banner id: {banner_id} does not exists."
-            ) 
+
+        self.flush_banner_writes()
         
         try: 
             with self.connection:        
@@ -790,8 +975,8 @@ class DatabaseManager:
                 cur.execute("UPDATE banners SET max_pity = ? WHERE banner_id = ?", (new_max_pity, banner_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="BANNER_MAXPITY_UPDATE_FAILED",
-                        message="Couldn't update banner pity"
+                        code="BANNER_NOT_FOUND",
+                        message=f"Banner with banner id: {banner_id} does not exists."
                     ) 
                 else:
                     return Result.ok(
@@ -806,17 +991,74 @@ class DatabaseManager:
                 error=str(e)
             )
 
-    def delete_banner(self, banner_id):
+    def get_banner_rates(self, banner_id):
+        # (current_pity, max_pity, base_rate, soft_pity, soft_pity_step, featured_rate) for the simulator
         if not self.is_connected():
             return Result.fail(
                 code="DB_CONNECTION_FAILED",
-                message="Couldn't delete banner: Failed to connect to the database"
-            ) 
-        
-        if not self.banner_exists(banner_id):
+                message="Couldn't get banner rates: Failed to connect to the database"
+            )
+
+        self.flush_banner_writes()
+
+        cur = self.connection.cursor()
+        cur.execute("""
+            SELECT current_pity, max_pity, base_rate, soft_pity, soft_pity_step, featured_rate
+            FROM banners WHERE banner_id = ?
+        """, (banner_id,))
+        res = cur.fetchone()
+        if res is None:
             return Result.fail(
                 code="BANNER_NOT_FOUND",
-                message=f"Banner with banner id: {banner_id} does not exists."
+                message="Banner not found"
+            )
+        else:
+            return Result.ok(
+                code="BANNER_RATES_FOUND",
+                message="Banner rates retrieved successfully",
+                data=res
+            )
+
+    def update_banner_rates(self, banner_id, base_rate, soft_pity, soft_pity_step, featured_rate):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't update banner rates: Failed to connect to the database"
+            )
+
+        self.flush_banner_writes()
+
+        try:
+            with self.connection:
+                cur = self.connection.cursor()
+                cur.execute("""
+                    UPDATE banners
+                    SET base_rate = ?, soft_pity = ?, soft_pity_step = ?, featured_rate = ?
+                    WHERE banner_id = ?
+                """, (base_rate, soft_pity, soft_pity_step, featured_rate, banner_id))
+                if not cur.rowcount > 0:
+                    return Result.fail(
+                        code="BANNER_NOT_FOUND",
+                        message=f"Banner with banner id: {banner_id} does not exists."
+                    )
+                else:
+                    return Result.ok(
+                        code="BANNER_RATES_UPDATED",
+                        message="Banner rates updated successfully"
+                    )
+
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error during X",
+                error=str(e)
+            )
+
+    def delete_banner(self, banner_id):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't delete banner: Failed to connect to the database"
             ) 
         
         try: 
@@ -825,8 +1067,8 @@ class DatabaseManager:
                 cur.execute("DELETE FROM banners WHERE banner_id = ?", (banner_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="BANNER_DELETE_FAILED",
-                        message="Failed to delete banner"
+                        code="BANNER_NOT_FOUND",
+                        message=f"Banner with banner id: {banner_id} does not exists."
                     ) 
                 else:
                     return Result.ok(
@@ -843,6 +1085,100 @@ class DatabaseManager:
         
     # endregion
 
+    #region WRITE BEHIND for banner pity !!
+    # a .pull used to be 2 transactions: insert the pull + touch the banner, then set the banner pity.
+    # now only the pull is written right away, the banner's (pity, last_updated) waits in
+    # pending_banners where rapid pulls on one banner overwrite each other, and
+    # flush_banner_writes puts them all in with ONE transaction. it runs:
+    #   - a short moment after the first buffered pull (AsyncDatabaseManager sets on_pending)
+    #   - before anything that reads or writes banners, so nobody ever sees the old pity
+    #   - in close_db, so a normal shutdown loses nothing
+    # crash safety: a pull is only acked after its own commit, so a crash can only lose the buffered
+    # banner row, never a pull. that row is exactly "pity + time of the newest pull", and the flush
+    # also stores that pull's id in banners.last_pull_id. recover_banner_writes (startup / after a
+    # restore) rebuilds the row from pull_history for every banner with a newer pull than that.
+    # (not last_updated: timestamps are whole seconds, a crash in the same second would be missed)
+
+    def buffer_banner_write(self, banner_id, pity, pull_id, timestamp):
+        first = not self.pending_banners
+        self.pending_banners[banner_id] = (pity, pull_id, timestamp)
+        if first and self.on_pending is not None:
+            self.on_pending()
+
+    def flush_banner_writes(self):
+        if not self.pending_banners or not self.is_connected():
+            return Result.ok(
+                code="NOTHING_TO_FLUSH",
+                message="No buffered banner updates"
+            )
+
+        pending = self.pending_banners
+        try:
+            with self.connection:
+                for banner_id, (pity, pull_id, timestamp) in pending.items():
+                    self.run_query("flush_banner", (pity, timestamp, pull_id, banner_id))
+        except sqlite3.Error as e:
+            # kept for the next flush, recover_banner_writes covers it if that never comes
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error occurred while flushing banner updates",
+                error=str(e)
+            )
+
+        self.pending_banners = {}
+        return Result.ok(
+            code="BANNER_WRITES_FLUSHED",
+            message=f"Flushed {len(pending)} banner updates",
+            data=len(pending)
+        )
+
+    def recover_banner_writes(self):
+        # buffered banner updates lost in a crash: newest pull per banner wins, index lookups only
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't recover banner updates: Failed to connect to the database"
+            )
+
+        self.pending_banners = {}
+        try:
+            with self.connection:
+                cur = self.connection.cursor()
+                cur.execute("""
+                    WITH newest AS (
+                        SELECT b.banner_id, (
+                            SELECT pull_id FROM pull_history
+                            WHERE banner_id = b.banner_id
+                            ORDER BY timestamp DESC, pull_id DESC LIMIT 1
+                        ) AS pull_id
+                        FROM banners b
+                    )
+                    UPDATE banners
+                    SET current_pity = ph.pity,
+                        last_updated = MAX(COALESCE(banners.last_updated, 0), ph.timestamp),
+                        last_pull_id = ph.pull_id
+                    FROM newest
+                    JOIN pull_history ph ON ph.pull_id = newest.pull_id
+                    WHERE newest.banner_id = banners.banner_id
+                    AND ph.pull_id > COALESCE(banners.last_pull_id, 0)
+                """)
+                # rowcount stays -1 for a statement starting with WITH, changes() doesnt count the meta trigger
+                recovered = cur.execute("SELECT changes()").fetchone()[0]
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error occurred while recovering banner updates",
+                error=str(e)
+            )
+
+        return Result.ok(
+            code="BANNER_WRITES_RECOVERED",
+            message=f"Recovered {recovered} banners from their pull history",
+            data=recovered
+        )
+
+    #endregion
+
     #region for the pull history !! 
     # browse a list history of a particular banner, delete an entry
 
@@ -853,35 +1189,24 @@ class DatabaseManager:
                 message="Couldn't add pull entry: Failed to connect to the database"
             ) 
         
-        # check if banner for this pull actually xists 
-        if not self.banner_exists(banner_id):
-            return Result.fail(
-                    code="BANNER_NOT_FOUND",
-                    message=f"Banner with banner id: {banner_id} does not exists."
-                )
         try: 
             with self.connection:        
-                cur = self.connection.cursor()            
-                cur.execute("""
-                    INSERT INTO pull_history (banner_id, game_id, entry_name, pity, notes)
-                    SELECT
-                        b.banner_id, b.game_id, ?, ?, ?
-                    FROM banners b
-                    WHERE b.banner_id = ?
-                """, (entry_name, pity, notes, banner_id))
+                res = self.run_query("add_pull", (entry_name, pity, notes, banner_id), fetch="one")
 
-                if not cur.rowcount > 0:
+                # the insert selects from banners, so nothing inserted = banner doesnt exist
+                if res is None:
                     return Result.fail(
-                        code="ADD_PULL_ENTRY_FAILED",
-                        message="Couldn't add pull entry"
+                        code="BANNER_NOT_FOUND",
+                        message=f"Banner with banner id: {banner_id} does not exists."
                     ) 
-                else:
-                    cur.execute("UPDATE banners SET last_updated = CURRENT_TIMESTAMP WHERE banner_id = ?",
-                                (banner_id,))
-                    return Result.ok(
-                        code="PULL_ENTRY_ADDED",
-                        message="Pull entry added successfully"
-                    )     
+                self.run_query("summary_add", (banner_id, 1, pity or 0, res[0]))
+
+            # the pull is committed, the banner's pity + last_updated go through the write behind buffer
+            self.buffer_banner_write(banner_id, pity, *res)
+            return Result.ok(
+                code="PULL_ENTRY_ADDED",
+                message="Pull entry added successfully"
+            )     
                                               
         except sqlite3.Error as e:
             return Result.fail(
@@ -889,22 +1214,74 @@ class DatabaseManager:
                 message="SQLite error during X",
                 error=str(e)
             )
-    
+
+    def add_pulls(self, banner_id, pulls):
+        # bulk version of add_pull for a whole 10 pull, pulls = [(entry_name, pity, notes), ...] in order.
+        # one transaction: the banner update doubles as the exists check and hands us the game id,
+        # then every row goes in with one executemany. banner ends at the pity of the last row
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't add pull entries: Failed to connect to the database"
+            )
+
+        self.flush_banner_writes()
+
+        try:
+            with self.connection:
+                cur = self.connection.cursor()
+                cur.execute(f"""
+                    UPDATE banners
+                    SET current_pity = ?, last_updated = {EPOCH_NOW}
+                    WHERE banner_id = ?
+                    RETURNING game_id
+                """, (pulls[-1][1], banner_id))
+                res = cur.fetchone()
+
+                if res is None:
+                    return Result.fail(
+                        code="BANNER_NOT_FOUND",
+                        message=f"Banner with banner id: {banner_id} does not exists."
+                    )
+
+                game_id = res[0]
+                cur.executemany("""
+                    INSERT INTO pull_history (banner_id, game_id, entry_name, pity, notes)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [(banner_id, game_id, entry_name, pity, notes) for entry_name, pity, notes in pulls])
+                added = cur.rowcount
+
+                # the banner is up to date with the last of these, see recover_banner_writes
+                cur.execute("UPDATE banners SET last_pull_id = last_insert_rowid() WHERE banner_id = ? RETURNING last_pull_id", (banner_id,))
+                last_pull_id = cur.fetchone()[0]
+                self.run_query("summary_add", (banner_id, added, sum(pity or 0 for _, pity, _ in pulls), last_pull_id))
+
+                return Result.ok(
+                    code="PULL_ENTRIES_ADDED",
+                    message=f"Added {added} pull entries",
+                    data=added
+                )
+
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error during X",
+                error=str(e)
+            )
+
     def edit_pull(self, pull_id, entry_name, pity, notes):
         if not self.is_connected():
             return Result.fail(
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't add pull entry: Failed to connect to the database"
             ) 
+
+        self.flush_banner_writes()
         
-        # check if banner for this pull actually xists 
-        if not self.pull_entry_exists(pull_id):
-            return Result.fail(
-                    code="PULL_NOT_FOUND",
-                    message=f"PULL ENTRY with PULL id: {pull_id} does not exists."
-                )
         try: 
             with self.connection:        
+                # summary first, it reads the old pity of the row
+                self.run_query("summary_edit", (pull_id, pity or 0, pull_id))
                 cur = self.connection.cursor()
                 cur.execute("""
                     UPDATE pull_history
@@ -915,19 +1292,21 @@ class DatabaseManager:
                     WHERE pull_id = ?
                     RETURNING banner_id
                 """, (entry_name, pity, notes, pull_id))
+                res = cur.fetchone()
 
-                if not cur.rowcount > 0:
+                if res is None:
                     return Result.fail(
-                        code="ADD_PULL_ENTRY_FAILED",
-                        message="Couldn't add pull entry"
+                        code="PULL_NOT_FOUND",
+                        message=f"PULL ENTRY with PULL id: {pull_id} does not exists."
                     ) 
                 else:
-                    banner_id = cur.fetchone()[0]
-                    cur.execute("UPDATE banners SET last_updated = CURRENT_TIMESTAMP, current_pity = ? WHERE banner_id = ?",
+                    banner_id = res[0]
+                    cur.execute(f"UPDATE banners SET last_updated = {EPOCH_NOW}, current_pity = ? WHERE banner_id = ?",
                                 (pity, banner_id,))
                     return Result.ok(
                         code="PULL_ENTRY_ADDED",
-                        message="Pull entry added successfully"
+                        message="Pull entry added successfully",
+                        data=banner_id
                     )     
                                               
         except sqlite3.Error as e:
@@ -950,9 +1329,7 @@ class DatabaseManager:
                 message=f"Banner with banner id: {banner_id} does not exists."
             )
         
-        cur = self.connection.cursor()
-        cur.execute("SELECT pull_id, entry_name, pity, notes, timestamp FROM pull_history WHERE banner_id = ?", (banner_id,))
-        res = cur.fetchall()
+        res = self.run_query("pulls_by_banner", (banner_id,), fetch="all")
         if not res:
             return Result.fail(
                     code="GET_BANNER_PULLS_FAILED",
@@ -965,32 +1342,103 @@ class DatabaseManager:
                 data=res
             )
         
-    def delete_pull(self, pull_id):
+    def get_pity_column(self, banner_id):
+        # just the numbers for the stats: (pity, 50/50 outcome) in pull order, see COIN_FLIP_OUTCOME
         if not self.is_connected():
             return Result.fail(
                 code="DB_CONNECTION_FAILED",
-                message="Couldn't delete pull entry: Failed to connect to the database"
+                message="Couldn't get pity history for the banner: Failed to connect to the database"
             )
-        
-        if not self.pull_entry_exists(pull_id):
+
+        try:
+            res = self.run_query("pity_column", (banner_id,), fetch="all")
+        except sqlite3.Error as e:
             return Result.fail(
-                code="PULL_ENTRY_NOT_FOUND",
-                message=f"Cannot be deleted. pull entry id: {pull_id} does not exist."
+                code="SQLITE_ERROR",
+                message="SQLite error occurred while getting pity history",
+                error=str(e)
             )
-        
+
+        return Result.ok(
+            code="BANNER_PITY_COLUMN_OBTAINED",
+            message="Pity history for the banner retrieved successfully",
+            data=res
+        )
+
+    def get_last_coin_flip(self, banner_id):
+        # outcome of the newest pull whose notes say how the 50/50 went, None if none of them do
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get the last 50/50: Failed to connect to the database"
+            )
+
+        res = self.run_query("last_coin_flip", (banner_id,), fetch="one")
+
+        return Result.ok(
+            code="LAST_COIN_FLIP_OBTAINED",
+            message="Last 50/50 for the banner retrieved successfully",
+            data=None if res is None else res[0]
+        )
+
+    def get_pulls_page(self, banner_id, limit, after=None):
+        # keyset pagination on (timestamp, pull_id): after = key of the last row of the previous page.
+        # rides idx_pull_history_banner_time so page 500 costs the same as page 1, no OFFSET, no fetchall of the banner
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get pulls page: Failed to connect to the database"
+            )
+
+        # first page = after (-1, 0), timestamps are unix seconds so every row comes after it
+        after_timestamp, after_pull_id = after if after is not None else (-1, 0)
+        res = self.run_query("pulls_page", (banner_id, after_timestamp, after_pull_id, limit), fetch="all")
+
+        return Result.ok(
+            code="BANNER_PULLS_PAGE_OBTAINED",
+            message="Successfully retrieved a page of pull entries for this banner",
+            data=res
+        )
+
+    def count_pulls_by_banner(self, banner_id):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't count pulls for the banner: Failed to connect to the database"
+            )
+
+        res = self.run_query("pulls_count", (banner_id,), fetch="one")
+
+        return Result.ok(
+            code="BANNER_PULLS_COUNTED",
+            message="Successfully counted pull entries for this banner",
+            data=res[0]
+        )
+
+    def delete_pull(self, pull_id):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't delete pull entry: Failed to connect to the database"
+            )
+        
         try: 
             with self.connection:        
                 cur = self.connection.cursor()
-                cur.execute("DELETE FROM pull_history WHERE pull_id = ?", (pull_id,))
-                if not cur.rowcount > 0:
+                cur.execute("DELETE FROM pull_history WHERE pull_id = ? RETURNING banner_id, pity", (pull_id,))
+                res = cur.fetchone()
+                if res is None:
                     return Result.fail(
-                        code="DELETE_PULL_ENTRY_FAILED",
-                        message="Couldn't delete pull entry."
+                        code="PULL_ENTRY_NOT_FOUND",
+                        message=f"Cannot be deleted. pull entry id: {pull_id} does not exist."
                     ) 
                 else:
+                    self.run_query("summary_remove", (res[1] or 0, pull_id, res[0]))
+                    # banner id so the services know which banner changed
                     return Result.ok(
                         code="PULL_ENTRY_DELETED",
-                        message="Successfully deleted this pull entry."
+                        message="Successfully deleted this pull entry.",
+                        data=res[0]
                     )
                    
         except sqlite3.Error as e:
@@ -1003,9 +1451,9 @@ class DatabaseManager:
 
     #region for the session history !!
     # add new session, browse history of sessions, delete session
-    # SQLITE CURRENT_TIMESTAMP DEFAULTS TO UTC. JUST CONVERT IT TO LOCAL TIME AFTER BACKEND XD
+    # timestamps are unix seconds (UTC), the services convert them to local time for display XD
 
-    def start_session(self, session_name):
+    def start_session(self, session_name, channel_id=None, user_id=None):
         if not self.is_connected():
             return Result.fail(
                 code="DB_CONNECTION_FAILED",
@@ -1015,7 +1463,10 @@ class DatabaseManager:
         try:
             with self.connection:        
                 cur = self.connection.cursor()            
-                cur.execute("INSERT INTO sessions (session_name) VALUES (?) RETURNING session_id", (session_name,))
+                cur.execute("""
+                    INSERT INTO sessions (session_name, channel_id, user_id) VALUES (?, ?, ?)
+                    RETURNING session_id
+                """, (session_name, channel_id, user_id))
                 res = cur.fetchone()
                 if not cur.rowcount > 0:
                     return Result.fail(
@@ -1043,29 +1494,24 @@ class DatabaseManager:
                 message="Couldn't end session: Failed to connect to the database"
             ) 
         
-        if not self.session_exists(session_id):
-            return Result.fail(
-                    code="SESSION_NOT_FOUND",
-                    message=f"session id: {session_id} does not exists."
-                ) 
-        
         try:
             with self.connection:        
                 cur = self.connection.cursor()
-                cur.execute("""
-                    UPDATE sessions SET end_time = CURRENT_TIMESTAMP WHERE session_id = ?
+                # duration is stored as wall time, what .end reports is without the breaks
+                cur.execute(f"""
+                    UPDATE sessions
+                    SET end_time = {EPOCH_NOW},
+                        duration = {EPOCH_NOW} - start_time
+                    WHERE session_id = ? AND end_time IS NULL
                     RETURNING
-                    (
-                        (julianday(end_time) - julianday(start_time)) * 86400
-                        - COALESCE(total_break_time, 0)
-                    ) AS duration_seconds,
+                    duration - COALESCE(total_break_time, 0) AS duration_seconds,
                     session_name;
                             """, (session_id,))
                 res = cur.fetchone()
-                if not cur.rowcount > 0:
+                if res is None:
                     return Result.fail(
-                        code="END_SESSION_FAILED",
-                        message="Couldn't end the session."
+                        code="SESSION_NOT_FOUND",
+                        message=f"session id: {session_id} does not exists or already ended."
                     ) 
                 else:
                     return Result.ok(
@@ -1081,6 +1527,76 @@ class DatabaseManager:
                 error=str(e)
             )
             
+    def get_open_sessions(self):
+        # every session that hasnt ended + its running break (if any), for rebuilding the registry on startup
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get open sessions: Failed to connect to the database"
+            )
+
+        try:
+            cur = self.connection.cursor()
+            cur.execute("""
+                SELECT
+                    s.session_id,
+                    s.session_name,
+                    s.channel_id,
+                    s.user_id,
+                    (
+                        SELECT MAX(sb.break_id)
+                        FROM session_breaks sb
+                        WHERE sb.session_id = s.session_id AND sb.break_end IS NULL
+                    ) AS open_break_id
+                FROM sessions s
+                WHERE s.end_time IS NULL
+                ORDER BY s.session_id
+            """)
+            return Result.ok(
+                code="OPEN_SESSIONS_FOUND",
+                message="Successfully retrieved open sessions.",
+                data=cur.fetchall()
+            )
+
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error during X",
+                error=str(e)
+            )
+
+    def claim_session(self, session_id, channel_id, user_id):
+        # give an unowned (pre owner columns) open session to a channel + user
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't claim session: Failed to connect to the database"
+            )
+
+        try:
+            with self.connection:
+                cur = self.connection.cursor()
+                cur.execute("""
+                    UPDATE sessions SET channel_id = ?, user_id = ?
+                    WHERE session_id = ? AND channel_id IS NULL AND end_time IS NULL
+                """, (channel_id, user_id, session_id))
+                if not cur.rowcount > 0:
+                    return Result.fail(
+                        code="SESSION_NOT_FOUND",
+                        message=f"session id: {session_id} is not an unowned open session."
+                    )
+                return Result.ok(
+                    code="SESSION_CLAIMED",
+                    message="Session claimed."
+                )
+
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error during X",
+                error=str(e)
+            )
+
     def browse_sessions(self):
         if not self.is_connected():
             return Result.fail(
@@ -1090,8 +1606,7 @@ class DatabaseManager:
         
         cur = self.connection.cursor()
         cur.execute("""
-        SELECT session_id, session_name, start_time, end_time, total_break_time, 
-        ((julianday(end_time) - julianday(start_time)) * 86400)AS duration 
+        SELECT session_id, session_name, start_time, end_time, total_break_time, duration
         FROM sessions
                     """)
         res = cur.fetchall()
@@ -1108,6 +1623,45 @@ class DatabaseManager:
                 data=res
             )
 
+    def browse_sessions_page(self, limit, after=None):
+        # keyset on session_id, after = session_id of the last row on the previous page
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get sessions page: Failed to connect to the database"
+            )
+
+        cur = self.connection.cursor()
+        cur.execute("""
+            SELECT session_id, session_name, start_time, end_time, total_break_time, duration
+            FROM sessions
+            WHERE session_id > ?
+            ORDER BY session_id
+            LIMIT ?
+        """, (after or 0, limit))
+
+        return Result.ok(
+            code="FETCH_SESSIONS_PAGE",
+            message="Successfully retrieved a page of sessions.",
+            data=cur.fetchall()
+        )
+
+    def count_sessions(self):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't count sessions: Failed to connect to the database"
+            )
+
+        cur = self.connection.cursor()
+        cur.execute("SELECT COUNT(*) FROM sessions")
+
+        return Result.ok(
+            code="SESSIONS_COUNTED",
+            message="Successfully counted sessions.",
+            data=cur.fetchone()[0]
+        )
+
     def add_session_break(self, session_id):
         if not self.is_connected():
             return Result.fail(
@@ -1115,21 +1669,20 @@ class DatabaseManager:
                 message="Couldn't add session break: Failed to connect to the database"
             ) 
         
-        if not self.session_exists(session_id):
-            return Result.fail(
-                code="SESSION_NOT_FOUND",
-                message="Couldn't add session break: Session not found!"
-            ) 
-                
         try:
             with self.connection:        
                 cur = self.connection.cursor()            
-                cur.execute("INSERT INTO session_breaks (session_id) VALUES (?) RETURNING break_id", (session_id,))
+                # selecting from sessions, so no row back = session doesnt exist
+                cur.execute("""
+                    INSERT INTO session_breaks (session_id)
+                    SELECT session_id FROM sessions WHERE session_id = ?
+                    RETURNING break_id
+                """, (session_id,))
                 res = cur.fetchone()
-                if not cur.rowcount > 0:
+                if res is None:
                     return Result.fail(
-                        code="END_SESSION_FAILED",
-                        message="Couldn't add break for the session."
+                        code="SESSION_NOT_FOUND",
+                        message="Couldn't add session break: Session not found!"
                     ) 
                 else:
                     return Result.ok(
@@ -1152,46 +1705,37 @@ class DatabaseManager:
                 message="Couldn't end session's break: Failed to connect to the database"
             ) 
         
-        if not self.break_session_exists(break_session_id):
-            return Result.fail(
-                code="SESSION_BREAK_NOT_FOUND",
-                message=f"Couldn't end session break: Break Session id: {break_session_id} does not exists."
-            ) 
-        
         try: 
             with self.connection:
                 cur = self.connection.cursor()
 
-                cur.execute("""
+                # only a running break, ending one twice would count its time twice
+                cur.execute(f"""
                     UPDATE session_breaks
-                    SET break_end = CURRENT_TIMESTAMP
-                    WHERE break_id = ?
+                    SET break_end = {EPOCH_NOW},
+                        duration = {EPOCH_NOW} - break_start
+                    WHERE break_id = ? AND break_end IS NULL
+                    RETURNING session_id, duration
                 """, (break_session_id,))
+                ended = cur.fetchone()
 
+                if ended is None:
+                    return Result.fail(
+                        code="SESSION_BREAK_NOT_FOUND",
+                        message=f"Couldn't end session break: Break Session id: {break_session_id} does not exists or already ended."
+                    ) 
+
+                session_id, break_duration = ended
                 cur.execute("""
                     UPDATE sessions
-                    SET total_break_time = COALESCE(total_break_time, 0) +
-                        (
-                            SELECT strftime('%s', break_end) - strftime('%s', break_start)
-                            FROM session_breaks
-                            WHERE break_id = ?
-                        )
-                    WHERE session_id = (
-                            SELECT session_id
-                            FROM session_breaks
-                            WHERE break_id = ?
-                        )
-                    RETURNING
-                    (
-                        SELECT strftime('%s', break_end) - strftime('%s', break_start)
-                        FROM session_breaks
-                        WHERE break_id = ?
-                    ) AS break_duration_seconds;
-                """, (break_session_id, break_session_id, break_session_id))
+                    SET total_break_time = COALESCE(total_break_time, 0) + ?
+                    WHERE session_id = ?
+                    RETURNING ? AS break_duration_seconds
+                """, (break_duration, session_id, break_duration))
 
                 res = cur.fetchone()
 
-                if not cur.rowcount > 0:
+                if res is None:
                     return Result.fail(
                         code="END_BREAK_SESSION_FAILED",
                         message="Couldn't end break for the session."
@@ -1211,48 +1755,27 @@ class DatabaseManager:
             )
 
     def get_current_session(self, session_id):
+        # one row per break (or one row with NULL break columns), ongoing ones measured up to now
         if not self.is_connected():
             return Result.fail(
                 code="DB_CONNECTION_FAILED",
                 message="Couldn't get current session: Failed to connect to the database"
             ) 
         
-        if not self.session_exists(session_id):
-            return Result.fail(
-                code="SESSION_NOT_FOUND",
-                message="Couldn't get current session: Session not found!"
-            ) 
         try: 
-            with self.connection:        
-                cur = self.connection.cursor()
-                cur.execute("""
-                    SELECT
-                        s.start_time,                        
-                        strftime('%s', CURRENT_TIMESTAMP) - strftime('%s', s.start_time)
-                            AS duration_seconds,
-
-                        EXISTS (
-                            SELECT 1
-                            FROM session_breaks sb
-                            WHERE sb.session_id = s.session_id
-                        ) AS has_break
-
-                    FROM sessions s
-                    WHERE s.session_id = ?;
-                            """, (session_id,))
-                res = cur.fetchone()
+            res = self.run_query("current_session", (session_id,), fetch="all")
 
-                if res is None:
-                    return Result.fail(
-                        code="NO_SESSIONS_FOUND",
-                        message="Couldn't fetch current session."
-                    ) 
-                else:
-                    return Result.ok(
-                        code="CURRENT_SESSION_FOUND",
-                        message="Session found!",
-                        data=res
-                    )
+            if not res:
+                return Result.fail(
+                    code="SESSION_NOT_FOUND",
+                    message="Couldn't get current session: Session not found!"
+                ) 
+            else:
+                return Result.ok(
+                    code="CURRENT_SESSION_FOUND",
+                    message="Session found!",
+                    data=res
+                )
                 
         except sqlite3.Error as e:
             return Result.fail(
@@ -1260,63 +1783,6 @@ class DatabaseManager:
                 message="SQLite error during X",
                 error=str(e)
             )
-        
-    def get_breaks_for_session(self, session_id):
-        if not self.is_connected():
-            return Result.fail(
-                code="DB_CONNECTION_FAILED",
-                message="Couldn't get breaks for the session: Failed to connect to the database"
-            ) 
-        
-        if not self.session_exists(session_id):
-            return Result.fail(
-                code="SESSION_NOT_FOUND",
-                message="Couldn't get breaks for this session: Session not found!"
-            ) 
-        
-        try: 
-            with self.connection:        
-                cur = self.connection.cursor()
-                cur.execute("""
-                    SELECT
-                        break_start,
-                        break_end,
-
-                        CASE
-                            WHEN break_end IS NOT NULL THEN
-                                strftime('%s', break_end) - strftime('%s', break_start)
-                            ELSE
-                                strftime('%s', CURRENT_TIMESTAMP) - strftime('%s', break_start)
-                        END AS duration_seconds,
-
-                        -- 1 if finished, 0 if still ongoing
-                        CASE
-                            WHEN break_end IS NOT NULL THEN 1
-                            ELSE 0
-                        END AS is_fin
-
-                    FROM session_breaks
-                    WHERE session_id = ?;
-                            """, (session_id,))
-                res = cur.fetchall()
-                if res is None:
-                    return Result.fail(
-                        code="NO_BREAK_SESSIONS_FOUND",
-                        message="Couldn't fetch breaks for this session."
-                    ) 
-                else:
-                    return Result.ok(
-                        code="BREAK_SESSIONS_FOUND",
-                        message="Breaks found for this session",
-                        data=res
-                    )
-                   
-        except sqlite3.Error as e:
-            return Result.fail(
-                code="SQLITE_ERROR",
-                message="SQLite error during X",
-                error=str(e)
-            )
 
     def delete_session(self, session_id):
         if not self.is_connected():
@@ -1325,20 +1791,14 @@ class DatabaseManager:
                 message="Couldn't delete session: Failed to connect to the database"
             )
                 
-        if not self.session_exists(session_id):
-            return Result.fail(
-                code="SESSION_NOT_FOUND",
-                message=f"Cannot be deleted. session id: {session_id} does not exist."
-            ) 
-        
         try: 
             with self.connection:        
                 cur = self.connection.cursor()
                 cur.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                        code="DELETE_SESSION_FAILED",
-                        message="Couldn't delete the session."
+                        code="SESSION_NOT_FOUND",
+                        message=f"Cannot be deleted. session id: {session_id} does not exist."
                     ) 
                 else:
                     return Result.ok(
@@ -1360,23 +1820,23 @@ class DatabaseManager:
                 message="Couldn't delete break session: Failed to connect to the database"
             )
             
-        if not self.break_session_exists(break_id):
-            return Result.fail(
-                code="SESSION_BREAK_NOT_FOUND",
-                message=f"Couldn't delete break: Break Session id: {break_id} does not exists."
-            ) 
-        
         try:
             with self.connection:
                 cur = self.connection.cursor()
-                cur.execute("DELETE FROM session_breaks WHERE break_id = ?", (break_id,))
+                cur.execute("DELETE FROM session_breaks WHERE break_id = ? RETURNING session_id, duration", (break_id,))
+                deleted = cur.fetchone()
 
-                # TODO: we also have to decrease the total break time on session lol
+                # the break doesnt count towards the session anymore
+                if deleted is not None and deleted[1]:
+                    cur.execute("""
+                        UPDATE sessions SET total_break_time = MAX(COALESCE(total_break_time, 0) - ?, 0)
+                        WHERE session_id = ?
+                    """, (deleted[1], deleted[0]))
 
-                if not cur.rowcount > 0:
+                if deleted is None:
                     return Result.fail(
-                        code="DELETE_BREAK_SESSION_FAILED",
-                        message="Couldn't delete the break for this session."
+                        code="SESSION_BREAK_NOT_FOUND",
+                        message=f"Couldn't delete break: Break Session id: {break_id} does not exists."
                     ) 
                 else:
                     return Result.ok(
@@ -1400,21 +1860,19 @@ class DatabaseManager:
                 message="Couldn't add currency to the game: Failed to connect to the database"
             ) 
         
-        # check if currency already exists first 
-        if self.currency_for_game_exists(game_id):
-            return Result.fail(
-                code="CURRENCY_ALREADY_EXISTS",
-                message="A currency for the game already exists"
-            )
-        
         try:
             with self.connection:        
                 cur = self.connection.cursor()
-                cur.execute("INSERT INTO currency_balance('game_id','currency','pull_token') VALUES (?, ?, ?)", (game_id, currency, pull_token,))
+                # one balance row per game, nothing inserted = already exists
+                cur.execute("""
+                    INSERT INTO currency_balance (game_id, currency, pull_token)
+                    SELECT ?, ?, ?
+                    WHERE NOT EXISTS (SELECT 1 FROM currency_balance WHERE game_id = ?)
+                """, (game_id, currency, pull_token, game_id))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                            code="CURRENCY_ADD_FAILED",
-                            message="Failed to add currency for the game"
+                            code="CURRENCY_ALREADY_EXISTS",
+                            message="A currency for the game already exists"
                         )
                 else:
                     return Result.ok(
@@ -1437,21 +1895,14 @@ class DatabaseManager:
                 message="Couldn't set currency goal: Failed to connect to the database"
             ) 
         
-        # check if currency already exists first 
-        if not self.currency_for_game_exists(game_id):
-            return Result.fail(
-                code="CURRENCY_DOES_NOT_EXISTS",
-                message="Currency for the game does not exists"
-            )
-        
         try:
             with self.connection:        
                 cur = self.connection.cursor()
                 cur.execute("UPDATE currency_balance SET 'goal' = ? WHERE game_id = ?", (goal, game_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                            code="SET_CURRENCY_GOAL_FAILED",
-                            message="Failed to set currency goal for the game"
+                            code="CURRENCY_DOES_NOT_EXISTS",
+                            message="Currency for the game does not exists"
                         )
                 else:
                     return Result.ok(
@@ -1474,21 +1925,14 @@ class DatabaseManager:
                 message="Couldn't unset currency goal: Failed to connect to the database"
             ) 
         
-        # check if currency already exists first 
-        if not self.currency_for_game_exists(game_id):
-            return Result.fail(
-                code="CURRENCY_DOES_NOT_EXISTS",
-                message="Currency for the game does not exists"
-            )
-        
         try:
             with self.connection:        
                 cur = self.connection.cursor()
                 cur.execute("UPDATE currency_balance SET 'goal' = 0 WHERE game_id = ?", (game_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                            code="UNSET_CURRENCY_GOAL_FAILED",
-                            message="Failed to unset currency goal for the game"
+                            code="CURRENCY_DOES_NOT_EXISTS",
+                            message="Currency for the game does not exists"
                         )
                 else:
                     return Result.ok(
@@ -1511,22 +1955,13 @@ class DatabaseManager:
                 message="Couldn't get currency for the game: Failed to connect to the database"
             ) 
         
-        # check if currency already exists first 
-        if not self.currency_for_game_exists(game_id):
-            return Result.fail(
-                code="CURRENCY_DOES_NOT_EXISTS",
-                message="Currency for the game does not exists"
-            )
-        
         try:
             with self.connection:        
-                cur = self.connection.cursor()
-                cur.execute("SELECT currency, pull_token, goal FROM currency_balance WHERE game_id = ?", (game_id,))
-                res = cur.fetchone()
+                res = self.run_query("currency_for_game", (game_id,), fetch="one")
                 if res is None:
                     return Result.fail(
-                            code="GET_CURRENCY_FAILED",
-                            message="Failed to unset currency goal for the game"
+                            code="CURRENCY_DOES_NOT_EXISTS",
+                            message="Currency for the game does not exists"
                         )
                 else:
                     return Result.ok(
@@ -1550,18 +1985,17 @@ class DatabaseManager:
                 message="Couldn't update currency amount: Failed to connect to the database"
             ) 
         
-        # check if currency already exists first 
-        if not self.currency_for_game_exists(game_id):
-            return Result.fail(
-                code="CURRENCY_DOES_NOT_EXISTS",
-                message="Currency for the game does not exists"
-            )
-        
         try:
             with self.connection:        
                 cur = self.connection.cursor()
                 cur.execute("SELECT currency, goal FROM currency_balance WHERE game_id = ?", (game_id,))
                 old_val = cur.fetchone()
+                # we need the old value anyway, so it doubles as the exists check
+                if old_val is None:
+                    return Result.fail(
+                        code="CURRENCY_DOES_NOT_EXISTS",
+                        message="Currency for the game does not exists"
+                    )
 
                 cur.execute("UPDATE currency_balance SET 'currency' = ? WHERE game_id = ?", (amount, game_id,))
                 if not cur.rowcount > 0:
@@ -1591,18 +2025,16 @@ class DatabaseManager:
                 message="Couldn't update currency token: Failed to connect to the database"
             ) 
         
-        # check if currency already exists first 
-        if not self.currency_for_game_exists(game_id):
-            return Result.fail(
-                code="CURRENCY_DOES_NOT_EXISTS",
-                message="Currency for the game does not exists"
-            )
-        
         try:
             with self.connection:        
                 cur = self.connection.cursor()
                 cur.execute("SELECT pull_token FROM currency_balance WHERE game_id = ?", (game_id,))
                 old_val = cur.fetchone()
+                if old_val is None:
+                    return Result.fail(
+                        code="CURRENCY_DOES_NOT_EXISTS",
+                        message="Currency for the game does not exists"
+                    )
                 cur.execute("UPDATE currency_balance SET 'pull_token' = ? WHERE game_id = ?", (tickets, game_id,))
                 if not cur.rowcount > 0:
                     return Result.fail(
@@ -1624,30 +2056,122 @@ class DatabaseManager:
             ) 
     
     # log adding or spending the currency of a game
-    def log_currency_action(self, game_id, amount, action, reason):
+    def get_currency_daily(self, game_id, since_day):
+        # rollup rows (day, added, spent) from since_day ("YYYY-MM-DD", UTC) on, oldest first
         if not self.is_connected():
             return Result.fail(
                 code="DB_CONNECTION_FAILED",
-                message="Couldn't add currency to the game: Failed to connect to the database"
-            ) 
-        
-        # check if currency does exists first 
-        if not self.currency_for_game_exists(game_id):
+                message="Couldn't get daily currency totals: Failed to connect to the database"
+            )
+
+        res = self.run_query("currency_daily", (game_id, since_day), fetch="all")
+
+        return Result.ok(
+            code="CURRENCY_DAILY_OBTAINED",
+            message="Daily currency totals retrieved successfully",
+            data=res
+        )
+
+    def get_currency_first_day(self, game_id):
+        # first UTC day ("YYYY-MM-DD") with a currency log at all, None if there are none
+        if not self.is_connected():
             return Result.fail(
-                code="CURRENCY_DOES_NOT_EXISTS",
-                message="Currency for the game does exists"
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get the first currency day: Failed to connect to the database"
             )
+
+        res = self.run_query("currency_first_day", (game_id,), fetch="one")
+
+        return Result.ok(
+            code="CURRENCY_FIRST_DAY_OBTAINED",
+            message="First currency day retrieved successfully",
+            data=res[0]
+        )
+
+    def get_pull_budget(self, game_id):
+        # (currency, pull_token, goal, pull_cost) for the simulator
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get the pull budget: Failed to connect to the database"
+            )
+
+        cur = self.connection.cursor()
+        cur.execute("SELECT currency, pull_token, goal, pull_cost FROM currency_balance WHERE game_id = ?", (game_id,))
+        res = cur.fetchone()
+        if res is None:
+            return Result.fail(
+                code="GAME_CURRENCY_NOT_FOUND",
+                message="This game has no currency installed yet"
+            )
+        else:
+            return Result.ok(
+                code="PULL_BUDGET_OBTAINED",
+                message="Pull budget retrieved successfully",
+                data=res
+            )
+
+    def update_pull_cost(self, game_id, pull_cost):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't update the pull cost: Failed to connect to the database"
+            )
+
+        try:
+            with self.connection:
+                cur = self.connection.cursor()
+                cur.execute("UPDATE currency_balance SET pull_cost = ? WHERE game_id = ?", (pull_cost, game_id))
+                if not cur.rowcount > 0:
+                    return Result.fail(
+                        code="GAME_CURRENCY_NOT_FOUND",
+                        message="This game has no currency installed yet"
+                    )
+                else:
+                    return Result.ok(
+                        code="PULL_COST_UPDATED",
+                        message="Pull cost updated successfully"
+                    )
+
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error during X",
+                error=str(e)
+            )
+
+    def log_currency_action(self, game_id, amount, action, reason, unit="currency"):
+        # unit "token" = pull token change, logged but kept out of the currency_daily income
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't add currency to the game: Failed to connect to the database"
+            ) 
         
         try:
             with self.connection:        
                 cur = self.connection.cursor()
-                cur.execute("INSERT INTO currency_logs('game_id','amount','action', 'reason') VALUES (?, ?, ?, ?)", (game_id, amount, action, reason,))
+                # only logs for games that have a balance row
+                cur.execute("""
+                    INSERT INTO currency_logs (game_id, amount, action, reason, unit)
+                    SELECT game_id, ?, ?, ?, ? FROM currency_balance WHERE game_id = ?
+                """, (amount, action, reason, unit, game_id))
                 if not cur.rowcount > 0:
                     return Result.fail(
-                            code="CURRENCY_ADD_LOG_FAILED",
-                            message="Failed to log currency for the game"
+                            code="CURRENCY_DOES_NOT_EXISTS",
+                            message="Currency for the game does not exists"
                         )
                 else:
+                    # same transaction, bump today's rollup (date('now') is the UTC day like the log timestamp)
+                    if unit == "currency":
+                        added, spent = (amount, 0) if action == "add" else (0, amount)
+                        cur.execute("""
+                            INSERT INTO currency_daily (game_id, day, added, spent)
+                            VALUES (?, date('now'), ?, ?)
+                            ON CONFLICT (game_id, day) DO UPDATE SET
+                                added = added + excluded.added,
+                                spent = spent + excluded.spent
+                        """, (game_id, added, spent))
                     return Result.ok(
                         code="CURRENCY_ADDED",
                         message="Currency action successfully logged"
@@ -1677,9 +2201,7 @@ class DatabaseManager:
         
         try:
             with self.connection:        
-                cur = self.connection.cursor()
-                cur.execute("SELECT amount, action, reason, timestamp FROM currency_logs WHERE game_id = ?", (game_id,))
-                res = cur.fetchall()
+                res = self.run_query("currency_logs", (game_id,), fetch="all")
                 if res is None:
                     return Result.fail(
                             code="GET_CURRENCY_LOGS_FAILED",
@@ -1699,8 +2221,349 @@ class DatabaseManager:
                 error=str(e)
             )
     
+    # one page of the logs, keyset on (timestamp, id) over idx_currency_logs_game_time
+    def get_game_currency_logs_page(self, game_id, limit, after=None):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get currency logs page for the game: Failed to connect to the database"
+            )
+
+        # first page = after (-1, 0), same as get_pulls_page
+        after_timestamp, after_id = after if after is not None else (-1, 0)
+        res = self.run_query("currency_logs_page", (game_id, after_timestamp, after_id, limit), fetch="all")
+
+        return Result.ok(
+            code="FETCHED_CURRENCY_LOGS_PAGE",
+            message="Currency logs page for the game fetched successfully",
+            data=res
+        )
+
+    def count_game_currency_logs(self, game_id):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't count currency logs for the game: Failed to connect to the database"
+            )
+
+        cur = self.connection.cursor()
+        cur.execute("SELECT COUNT(*) FROM currency_logs WHERE game_id = ?", (game_id,))
+
+        return Result.ok(
+            code="COUNTED_CURRENCY_LOGS",
+            message="Currency logs for the game counted successfully",
+            data=cur.fetchone()[0]
+        )
+
     #endregion
-    
+
+
+    #region EXPORT !!
+    # table: (query for everything, query for one game or None if the table has no game_id)
+    # ordered by an index so the rows come straight off the b-tree, no sort in memory
+    EXPORT_QUERIES = {
+        "pull_history": (
+            "SELECT pull_id, banner_id, game_id, entry_name, pity, notes, timestamp FROM pull_history ORDER BY pull_id",
+            "SELECT pull_id, banner_id, game_id, entry_name, pity, notes, timestamp FROM pull_history WHERE game_id = ? ORDER BY pull_id",
+        ),
+        "currency_logs": (
+            "SELECT id, game_id, amount, action, reason, unit, timestamp FROM currency_logs ORDER BY id",
+            "SELECT id, game_id, amount, action, reason, unit, timestamp FROM currency_logs WHERE game_id = ? ORDER BY timestamp, id",
+        ),
+        "sessions": (
+            "SELECT session_id, session_name, start_time, end_time, total_break_time, duration FROM sessions ORDER BY session_id",
+            None,
+        ),
+        "session_breaks": (
+            "SELECT break_id, session_id, break_start, break_end, duration FROM session_breaks ORDER BY break_id",
+            None,
+        ),
+    }
+
+    def stream_table(self, table, game_id=None):
+        # data = {"columns": [...], "rows": iterator}. the rows come from iterating the cursor so only
+        # the current sqlite page is in memory, consume it on the db thread before running anything else
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't export table: Failed to connect to the database"
+            )
+
+        if table not in self.EXPORT_QUERIES:
+            return Result.fail(
+                code="UNKNOWN_EXPORT_TABLE",
+                message=f"Can't export {table}, pick one of: {', '.join(self.EXPORT_QUERIES)}"
+            )
+
+        all_rows, game_rows = self.EXPORT_QUERIES[table]
+        # sessions / breaks have no game, exporting all of them when one game was asked for would leak the rest
+        if game_id is not None and game_rows is None:
+            return Result.fail(
+                code="EXPORT_NOT_PER_GAME",
+                message=f"{table} isn't stored per game, export it without a game id"
+            )
+
+        try:
+            cur = self.connection.cursor()
+            if game_id is not None and game_rows is not None:
+                cur.execute(game_rows, (game_id,))
+            else:
+                cur.execute(all_rows)
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error occurred while exporting",
+                error=str(e)
+            )
+
+        return Result.ok(
+            code="EXPORT_STREAM_OPENED",
+            message=f"Streaming rows from {table}",
+            data={
+                "columns": [col[0] for col in cur.description],
+                "rows": cur
+            }
+        )
+
+    #endregion
+
+
+    #region BACKUP !!
+
+    def backup_to(self, target_path, pages=256, sleep=0.005):
+        # online backup with the sqlite backup api, `pages` pages per step and a short sleep between
+        # steps. run it OUTSIDE the db thread (asyncio.to_thread): the connection is serialized so
+        # each step only holds it for a moment and the db thread keeps serving commands in between.
+        # writes made through this same connection are copied into the backup as they happen,
+        # so a busy bot never makes the backup start over
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't back up the database: Failed to connect to the database"
+            )
+
+        progress = {"steps": 0, "pages": 0}
+
+        def on_step(status, remaining, total):
+            progress["steps"] += 1
+            progress["pages"] = total
+
+        try:
+            target = sqlite3.connect(target_path)
+            try:
+                # the last step commits the copy while holding our connection, no fsync in there.
+                # the file gets synced below, after the connection is free again
+                target.execute("PRAGMA journal_mode = OFF").fetchall()
+                target.execute("PRAGMA synchronous = OFF")
+                self.connection.backup(target, pages=pages, progress=on_step, sleep=sleep)
+            finally:
+                target.close()
+
+            with open(target_path, "rb") as file:
+                os.fsync(file.fileno())
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error occurred while backing up",
+                error=str(e)
+            )
+
+        return Result.ok(
+            code="DB_BACKED_UP",
+            message=f"Backed up {progress['pages']} pages in {progress['steps']} steps",
+            data=progress
+        )
+
+    def check_database_file(self, path):
+        # integrity_check on a copy, read only so a broken file never gets "fixed" or created
+        try:
+            check = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                cur = check.cursor()
+                cur.execute("PRAGMA integrity_check")
+                problems = [row[0] for row in cur.fetchall()]
+                cur.execute("PRAGMA user_version")
+                version = cur.fetchone()[0]
+            finally:
+                check.close()
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message=f"Couldn't open {path} as a database",
+                error=str(e)
+            )
+
+        if problems != ["ok"]:
+            return Result.fail(
+                code="INTEGRITY_CHECK_FAILED",
+                message=f"{path} failed the integrity check",
+                error="; ".join(problems[:10])
+            )
+
+        return Result.ok(
+            code="INTEGRITY_OK",
+            message=f"{path} passed the integrity check",
+            data={"schema_version": version}
+        )
+
+    def restore_from(self, source_path):
+        # copy a backup over the live database in one go, on the db thread so nothing else runs mid restore
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't restore the database: Failed to connect to the database"
+            )
+
+        # an older backup can be behind on the schema: migrate a copy in memory first and only swap
+        # it in when that worked, a failed migration leaves the live db as it was
+        staging = DatabaseManager(":memory:", profile="fast")
+        try:
+            connect = staging.connect_db()
+            if not connect.success:
+                return connect
+
+            source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+            try:
+                source.backup(staging.connection)
+            finally:
+                source.close()
+
+            migration = staging.migrate()
+            if not migration.success:
+                return migration
+
+            # buffered banner updates belong to the old data, they must not land on the restored one
+            self.pending_banners = {}
+            staging.connection.backup(self.connection)
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error occurred while restoring",
+                error=str(e)
+            )
+        finally:
+            staging.close_db()
+
+        # the backup may be missing banner updates of its own (taken while they were still buffered)
+        recover = self.recover_banner_writes()
+        if not recover.success:
+            return recover
+
+        return Result.ok(
+            code="DB_RESTORED",
+            message=f"Database restored from {source_path}"
+        )
+
+    #endregion
+
+
+    #region SHARDS !!
+    # helpers for splitting one database into per guild files, see services/shard_router.py
+
+    def get_channel_ids(self):
+        # every channel the data is tied to (games + sessions), for building the channel -> guild map
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get channel ids: Failed to connect to the database"
+            )
+
+        cur = self.connection.cursor()
+        cur.execute("""
+            SELECT channel_id FROM games WHERE channel_id IS NOT NULL
+            UNION
+            SELECT channel_id FROM sessions WHERE channel_id IS NOT NULL
+        """)
+        return Result.ok(
+            code="CHANNEL_IDS_OBTAINED",
+            message="Channel ids retrieved successfully",
+            data=[row[0] for row in cur.fetchall()]
+        )
+
+    def get_shard_summary(self):
+        # row counts + file size for the .shards overview
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't summarize the database: Failed to connect to the database"
+            )
+
+        try:
+            cur = self.connection.cursor()
+            cur.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM games),
+                    (SELECT COUNT(*) FROM banners),
+                    (SELECT COUNT(*) FROM pull_history),
+                    (SELECT COUNT(*) FROM sessions WHERE end_time IS NULL)
+            """)
+            games, banners, pulls, open_sessions = cur.fetchone()
+            page_count = cur.execute("PRAGMA page_count").fetchone()[0]
+            page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error occurred while summarizing the database",
+                error=str(e)
+            )
+
+        return Result.ok(
+            code="SHARD_SUMMARY_RETRIEVED",
+            message="Database summary retrieved successfully",
+            data={
+                "games": games,
+                "banners": banners,
+                "pulls": pulls,
+                "open_sessions": open_sessions,
+                "size_kb": page_count * page_size // 1024
+            }
+        )
+
+    def prune_to_shard(self, channel_ids, guild_id=None):
+        # run on a fresh copy of the database: guild_id set -> keep only the games / sessions / server
+        # settings of those channels, guild_id None (the global shard) -> keep everything NOT in them.
+        # foreign keys are on, so banners, pulls, currency and breaks go with their game / session
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't prune the shard: Failed to connect to the database"
+            )
+
+        # unowned rows (NULL channel) only stay in the global shard
+        if guild_id is not None:
+            drop = "channel_id IS NULL OR channel_id NOT IN (SELECT channel_id FROM shard_channels)"
+        else:
+            drop = "channel_id IN (SELECT channel_id FROM shard_channels)"
+        try:
+            with self.connection:
+                cur = self.connection.cursor()
+                cur.execute("CREATE TEMP TABLE IF NOT EXISTS shard_channels (channel_id TEXT PRIMARY KEY)")
+                cur.execute("DELETE FROM shard_channels")
+                cur.executemany("INSERT OR IGNORE INTO shard_channels VALUES (?)", ((str(c),) for c in channel_ids))
+
+                cur.execute(f"DELETE FROM games WHERE {drop}")
+                games = cur.rowcount
+                cur.execute(f"DELETE FROM sessions WHERE {drop}")
+                sessions = cur.rowcount
+                cur.execute("DELETE FROM guild_settings WHERE guild_id IS NOT ?", (None if guild_id is None else str(guild_id),))
+                cur.execute("DROP TABLE shard_channels")
+
+            self.connection.execute("VACUUM")
+            return Result.ok(
+                code="SHARD_PRUNED",
+                message=f"Removed {games} games and {sessions} sessions that belong to other shards",
+                data={"games_removed": games, "sessions_removed": sessions}
+            )
+
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error occurred while pruning the shard",
+                error=str(e)
+            )
+
+    #endregion
+
 
     #region for the settings table !!
 
@@ -1784,5 +2647,82 @@ class DatabaseManager:
                 message="SQLite error during X",
                 error=str(e)
             )
+
+    def update_features(self, features_json):
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Failed to update features: Failed to connect to the database"
+            )
+
+        try:
+            with self.connection:
+                cur = self.connection.cursor()
+                cur.execute("UPDATE settings SET features_enabled = ? WHERE id = 1", (features_json,))
+                if not cur.rowcount > 0:
+                    return Result.fail(
+                        code="SETTINGS_UPDATE_FAILED",
+                        message="Couldn't update the feature settings."
+                    )
+                return Result.ok(
+                    code="SETTINGS_UPDATE_SUCCESS",
+                    message="Features successfully updated"
+                )
+
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error during X",
+                error=str(e)
+            )
+
+    def get_guild_settings(self):
+        # every guild override row, (guild_id, pagination_size or None, features json)
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Couldn't get guild settings: Failed to connect to the database"
+            )
+
+        cur = self.connection.cursor()
+        cur.execute("SELECT guild_id, pagination_size, features_enabled FROM guild_settings")
+        return Result.ok(
+            code="FETCH_GUILD_SETTINGS_SUCCESS",
+            message="Successfully retrieved guild settings from the database",
+            data=cur.fetchall()
+        )
+
+    def update_guild_settings(self, guild_id, pagination_size, features_json):
+        # whole override row for one guild, a row with nothing overridden is just deleted
+        if not self.is_connected():
+            return Result.fail(
+                code="DB_CONNECTION_FAILED",
+                message="Failed to update guild settings: Failed to connect to the database"
+            )
+
+        try:
+            with self.connection:
+                cur = self.connection.cursor()
+                if pagination_size is None and features_json == "{}":
+                    cur.execute("DELETE FROM guild_settings WHERE guild_id = ?", (guild_id,))
+                else:
+                    cur.execute("""
+                        INSERT INTO guild_settings (guild_id, pagination_size, features_enabled)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT (guild_id) DO UPDATE SET
+                            pagination_size = excluded.pagination_size,
+                            features_enabled = excluded.features_enabled
+                    """, (guild_id, pagination_size, features_json))
+                return Result.ok(
+                    code="GUILD_SETTINGS_UPDATED",
+                    message="Server settings successfully updated"
+                )
+
+        except sqlite3.Error as e:
+            return Result.fail(
+                code="SQLITE_ERROR",
+                message="SQLite error during X",
+                error=str(e)
+            )
         
     #endregion
\ No newline at end of file
@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+from database_manager import DatabaseManager, CONNECTION_PROFILES
+from services.export_service import Export_Service, EXPORT_FORMATS
+
+# offline export, no bot needed XD
+#   python export_cli.py pull_history -f jsonl -o pulls.jsonl --game-id 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a table of the bot database into a file")
+    parser.add_argument("table", choices=list(DatabaseManager.EXPORT_QUERIES))
+    parser.add_argument("-f", "--format", dest="file_format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("-o", "--output", help="output file, default is <table>.<format>")
+    parser.add_argument("--game-id", type=int, help="only rows for this game (pull_history, currency_logs)")
+    parser.add_argument("--db", default="data.db", help="database file, default data.db")
+    parser.add_argument("--profile", choices=list(CONNECTION_PROFILES), default="wal", help="connection profile, default wal")
+    args = parser.parse_args(argv)
+
+    # connecting would create an empty database, nothing to export from that
+    if not os.path.exists(args.db):
+        print(f"No database at {args.db}", file=sys.stderr)
+        return 1
+
+    # same profile as the bot so the journal mode of the file stays what it is
+    db = DatabaseManager(args.db, profile=args.profile)
+    connect = db.connect_db()
+    if not connect.success:
+        print(connect.message, file=sys.stderr)
+        return 1
+
+    output = args.output or f"{args.table}.{args.file_format}"
+    export = Export_Service(db).export_table(args.table, args.file_format, output, args.game_id)
+    db.connection.close()
+
+    if not export.success:
+        print(export.message, file=sys.stderr)
+        return 1
+
+    print(f"{export.message} -> {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,6 @@
 import logging
+from datetime import datetime, timezone
+from functools import lru_cache
 from dataclasses import dataclass
 from typing import Any, Optional
 
@@ -35,3 +37,44 @@ class Result:
             message=message,
             error=error
         )
+
+
+#region TIMESTAMPS
+# stored timestamps are unix seconds (UTC) -> local "Mon DD, YYYY HH:MM AM" for display.
+# shared by every service. the output only shows minutes, so the cache is keyed on the
+# minute (seconds // 60) and every pull/log made in the same minute is one cache hit
+
+@lru_cache(maxsize=8192)
+def _format_minute(minute: int) -> str:
+    local_dt = datetime.fromtimestamp(minute * 60, tz=timezone.utc).astimezone()
+
+    return local_dt.strftime("%b %d, %Y %I:%M %p")
+
+
+def epoch_to_local(seconds: int | None):
+    # from unix seconds to date plus time in 12hrs format
+    if seconds is None:
+        return None
+
+    return _format_minute(seconds // 60)
+
+
+def epochs_to_local(column):
+    # batch version for a whole column of rows, each distinct minute is only converted once
+    seen = {}
+    local_times = []
+    for seconds in column:
+        if seconds is None:
+            local_times.append(None)
+            continue
+
+        minute = seconds // 60
+        local_time = seen.get(minute)
+        if local_time is None:
+            local_time = _format_minute(minute)
+            seen[minute] = local_time
+        local_times.append(local_time)
+
+    return local_times
+
+#endregion
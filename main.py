@@ -7,17 +7,52 @@ from discord.ext import commands
 # import db and services
 from database_manager import DatabaseManager
 from services import Services
+from services.shard_router import Shard_Router, DEFAULT_MAX_OPEN, enter_guild
 
 # import commands here
 from commands.game_commands import setup_game_commands
 from commands.banner_commands import setup_banner_commands
 from commands.session_commands import setup_session_commands
+from commands.export_commands import setup_export_commands
+from commands.backup_commands import setup_backup_commands
+from commands.shard_commands import setup_shard_commands
 
 # load all this?
 load_dotenv()
-db = DatabaseManager()
-db.connect_db()
-services = Services(db)
+DB_PROFILE = os.getenv("DB_PROFILE", "wal")
+# DB_SHARD_DIR set -> one sqlite file per server in that folder (split data.db first with shard_cli.py),
+# not set -> the single data.db like always
+DB_SHARD_DIR = os.getenv("DB_SHARD_DIR")
+# commands .feature cant turn off
+ALWAYS_ENABLED = ("feature", "settings", "h")
+
+if DB_SHARD_DIR:
+    services = Shard_Router(DB_SHARD_DIR, profile=DB_PROFILE, max_open=int(os.getenv("DB_SHARDS_OPEN", str(DEFAULT_MAX_OPEN))))
+else:
+    db = DatabaseManager(profile=DB_PROFILE)
+    db.connect_db()
+
+    # apply any pending schema migrations, cheap version check when already up to date
+    migration = db.migrate()
+    if not migration.success:
+        raise SystemExit(f"{migration.message}: {migration.error}")
+
+    # dont start the bot if a hot query went back to scanning the whole table
+    plan_check = db.check_query_plans()
+    if not plan_check.success:
+        raise SystemExit(f"{plan_check.message}: {plan_check.error}")
+
+    # banner pity still in the write behind buffer when the bot last died
+    recover = db.recover_banner_writes()
+    if not recover.success:
+        raise SystemExit(f"{recover.message}: {recover.error}")
+
+    services = Services(db)
+
+    # sessions that were still running when the bot stopped
+    sessions = services.session_service.load_active_sessions()
+    if not sessions.success:
+        raise SystemExit(f"{sessions.message}: {sessions.error}")
 
 # logger setup
 logger = logging.getLogger()
@@ -47,12 +82,29 @@ bot = commands.Bot(command_prefix=".", intents=discord.Intents.all())
 async def on_ready():
     print(f"{bot.user} is online!")
 
+@bot.before_invoke
+async def route_to_guild(ctx):
+    # which shard the command's service calls go to, opened off the loop and kept open until the
+    # command is done (does nothing without DB_SHARD_DIR)
+    guild_id = getattr(ctx.guild, "id", None)
+    await enter_guild(guild_id)
+
+    # .feature <command> off turns a command off (per server or global), the settings ones stay on
+    # so it can always be turned back on
+    name = ctx.command.qualified_name
+    if name not in ALWAYS_ENABLED and not services.settings_service.feature_enabled(name, guild_id, default=True):
+        raise commands.DisabledCommand(f"{name} is turned off here")
+
 @bot.event
 async def on_command_error(ctx, error):
     if isinstance(error, commands.CommandNotFound):
         await ctx.send("❌ Command not Found.")
         return
 
+    if isinstance(error, commands.DisabledCommand):
+        await ctx.send(f"❌ {error}, *.feature {ctx.command.qualified_name} on* turns it back on.", delete_after=10)
+        return
+
     if isinstance(error, commands.CommandInvokeError):
         await ctx.send("❌ An internal error occurred.")
         # Optional: log the real error
@@ -64,6 +116,9 @@ async def on_command_error(ctx, error):
 setup_game_commands(bot, services)
 setup_banner_commands(bot, services)
 setup_session_commands(bot, services)
+setup_export_commands(bot, services)
+setup_backup_commands(bot, services, every_hours=float(os.getenv("BACKUP_HOURS", "24")))
+setup_shard_commands(bot, services)
 
 # just try command XD
 @bot.command()
@@ -73,8 +128,12 @@ async def h(ctx):
 # incase you forgot to close db on browser XD
 @bot.command()
 async def connect(ctx):
-    db.connect_db()
+    await services.adb.connect_db()
     await ctx.send("Trying to connect to the database")
 
-# run the bot
-bot.run(BOT_TOKEN)
\ No newline at end of file
+# run the bot. guarded: on windows (spawn) the .sim process pool workers import this file again
+if __name__ == "__main__":
+    bot.run(BOT_TOKEN)
+
+    # let the db thread(s) finish whatever is still queued
+    services.close(wait=True)
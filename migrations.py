@@ -0,0 +1,475 @@
+# ordered schema migrations, keyed off PRAGMA user_version (a plain int in the db file header).
+# DatabaseManager.migrate() runs every step newer than the file's version, each one inside a
+# single transaction together with its version bump, so a failing step leaves the db untouched.
+# NEVER edit a step that already shipped, add a new one at the end of MIGRATIONS instead !!
+
+
+def column_exists(cur, table, column):
+    cur.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cur.fetchall())
+
+
+def _baseline_tables(cur):
+    # tables for games, banner_name, pull_history, sessions, settings
+    # IF NOT EXISTS everywhere so databases made before the migrations existed go through this too
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            version TEXT DEFAULT '0.1',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            last_modified TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS games (
+            game_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_name TEXT NOT NULL,
+            channel_id TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS banners (
+            banner_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            banner_name TEXT NOT NULL,
+            current_pity INTEGER DEFAULT 0,
+            max_pity INTEGER DEFAULT 0,
+            last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pull_history (
+            pull_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            banner_id INTEGER,
+            game_id INTEGER,
+            entry_name TEXT NOT NULL,
+            pity INTEGER DEFAULT 0,
+            notes TEXT,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (banner_id) REFERENCES banners(banner_id) ON DELETE CASCADE,
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_name TEXT NOT NULL,
+            start_time TEXT DEFAULT CURRENT_TIMESTAMP,
+            end_time TEXT,
+            total_break_time INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS session_breaks (
+            break_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            break_start TEXT DEFAULT CURRENT_TIMESTAMP,
+            break_end TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS currency_balance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            currency INTEGER,
+            pull_token INTEGER,
+            goal INTEGER,
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS currency_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            amount INTEGER,
+            action TEXT NOT NULL CHECK(action IN ('add', 'spend')),
+            reason REAL,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            id INTEGER DEFAULT 1 CHECK(id = 1),
+            pagination_size INTEGER DEFAULT 10,
+            features_enabled TEXT DEFAULT '{}',
+            PRIMARY KEY (id)
+        )
+        """,
+        # the single meta/settings rows, everything else expects them to be there
+        "INSERT OR IGNORE INTO meta (id) VALUES (1)",
+        "INSERT OR IGNORE INTO settings (id) VALUES (1)",
+    ]
+    for statement in statements:
+        cur.execute(statement)
+
+
+def _session_total_break_time(cur):
+    # end_session / end_session_break use this column but the old script never declared it
+    if not column_exists(cur, "sessions", "total_break_time"):
+        cur.execute("ALTER TABLE sessions ADD COLUMN total_break_time INTEGER DEFAULT 0")
+
+
+def _currency_balance_foreign_key(cur):
+    # old script had FOREIGN KEY("game_id") REFERENCES "" which breaks every insert once
+    # foreign keys are enforced. sqlite cant alter a constraint so rebuild the table
+    cur.execute("PRAGMA foreign_key_list(currency_balance)")
+    if all(row[2] == "games" for row in cur.fetchall()):
+        return
+
+    cur.execute("""
+        CREATE TABLE currency_balance_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            currency INTEGER,
+            pull_token INTEGER,
+            goal INTEGER,
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        )
+    """)
+    cur.execute("""
+        INSERT INTO currency_balance_new (id, game_id, currency, pull_token, goal)
+        SELECT id, game_id, currency, pull_token, goal FROM currency_balance
+    """)
+    cur.execute("DROP TABLE currency_balance")
+    cur.execute("ALTER TABLE currency_balance_new RENAME TO currency_balance")
+
+
+def _meta_triggers(cur):
+    # keyed on the single meta row instead of the hard coded version = "0.1"
+    for table in ("banner", "history", "currency"):
+        cur.execute(f"DROP TRIGGER IF EXISTS meta_timestamp_to_{table}")
+
+    for name, table in (("banner", "banners"), ("history", "pull_history"), ("currency", "currency_balance")):
+        cur.execute(f"""
+            CREATE TRIGGER meta_timestamp_to_{name}
+            AFTER UPDATE ON {table}
+            BEGIN
+                UPDATE meta
+                SET last_modified = CURRENT_TIMESTAMP
+                WHERE id = 1;
+            END
+        """)
+
+
+def _lookup_indexes(cur):
+    # every column the DatabaseManager lookups filter on gets an index, otherwise sqlite scans the
+    # whole table. composite ones with timestamp so history reads come out already ordered
+    statements = [
+        "CREATE INDEX IF NOT EXISTS idx_games_channel_id ON games (channel_id)",
+        "CREATE INDEX IF NOT EXISTS idx_games_game_name ON games (game_name)",
+        "CREATE INDEX IF NOT EXISTS idx_banners_game_id ON banners (game_id)",
+        "CREATE INDEX IF NOT EXISTS idx_banners_banner_name ON banners (banner_name)",
+        "CREATE INDEX IF NOT EXISTS idx_pull_history_banner_time ON pull_history (banner_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_pull_history_game_id ON pull_history (game_id)",
+        "CREATE INDEX IF NOT EXISTS idx_session_breaks_session_id ON session_breaks (session_id)",
+        "CREATE INDEX IF NOT EXISTS idx_currency_balance_game_id ON currency_balance (game_id)",
+        "CREATE INDEX IF NOT EXISTS idx_currency_logs_game_time ON currency_logs (game_id, timestamp)",
+    ]
+    for statement in statements:
+        cur.execute(statement)
+
+
+def _pull_rate_columns(cur):
+    # per banner drop rates for the .sim simulator, defaults are the usual 90 pity banner:
+    # 0.6% base, +6% per pull from pull 74 on, 50/50 on the featured unit.
+    # pull_cost is how much currency one pull costs in that game
+    columns = [
+        ("banners", "base_rate", "REAL DEFAULT 0.006"),
+        ("banners", "soft_pity", "INTEGER DEFAULT 74"),
+        ("banners", "soft_pity_step", "REAL DEFAULT 0.06"),
+        ("banners", "featured_rate", "REAL DEFAULT 0.5"),
+        ("currency_balance", "pull_cost", "INTEGER DEFAULT 160"),
+    ]
+    for table, column, definition in columns:
+        if not column_exists(cur, table, column):
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _currency_daily_rollups(cur):
+    # per game per day (UTC) totals of the currency logs so income never has to scan currency_logs.
+    # DatabaseManager.log_currency_action keeps it up to date, this fills it from the logs we already have
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS currency_daily (
+            game_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            added INTEGER DEFAULT 0,
+            spent INTEGER DEFAULT 0,
+            PRIMARY KEY (game_id, day),
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    cur.execute("DELETE FROM currency_daily")
+    cur.execute("""
+        INSERT INTO currency_daily (game_id, day, added, spent)
+        SELECT
+            game_id,
+            date(timestamp),
+            SUM(CASE WHEN action = 'add' THEN amount ELSE 0 END),
+            SUM(CASE WHEN action = 'spend' THEN amount ELSE 0 END)
+        FROM currency_logs
+        WHERE game_id IS NOT NULL
+        GROUP BY game_id, date(timestamp)
+    """)
+
+
+def _session_owner_columns(cur):
+    # who started a session and where, so every channel/user can have its own running session
+    # and the bot can find the open ones again after a restart (Session_Service.load_active_sessions).
+    # sessions started before this stay unowned (NULL), the next session command claims them
+    if not column_exists(cur, "sessions", "channel_id"):
+        cur.execute("ALTER TABLE sessions ADD COLUMN channel_id TEXT")
+    if not column_exists(cur, "sessions", "user_id"):
+        cur.execute("ALTER TABLE sessions ADD COLUMN user_id TEXT")
+    # one open session per channel + user, NULLs (unowned) dont collide with each other
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_open_owner
+        ON sessions (channel_id, user_id) WHERE end_time IS NULL
+    """)
+
+
+def _session_durations(cur):
+    # durations in whole seconds, written once by end_session / end_session_break
+    # instead of redoing the julianday / strftime math on every .sessions and .sesh_stats
+    if not column_exists(cur, "sessions", "duration"):
+        cur.execute("ALTER TABLE sessions ADD COLUMN duration INTEGER")
+    if not column_exists(cur, "session_breaks", "duration"):
+        cur.execute("ALTER TABLE session_breaks ADD COLUMN duration INTEGER")
+    cur.execute("""
+        UPDATE session_breaks
+        SET duration = strftime('%s', break_end) - strftime('%s', break_start)
+        WHERE break_end IS NOT NULL
+    """)
+    # wall time start -> end, the breaks are in total_break_time
+    cur.execute("""
+        UPDATE sessions
+        SET duration = strftime('%s', end_time) - strftime('%s', start_time)
+        WHERE end_time IS NOT NULL
+    """)
+
+
+# unix seconds, for the INTEGER timestamp defaults (unixepoch() needs sqlite 3.38)
+EPOCH_NOW = "(CAST(strftime('%s', 'now') AS INTEGER))"
+# rows copied per INSERT while rebuilding a table
+EPOCH_BATCH = 50000
+
+# table -> (create statement for the INTEGER timestamp version, timestamp columns)
+EPOCH_TABLES = {
+    "meta": (f"""
+        CREATE TABLE meta_new (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            version TEXT DEFAULT '0.1',
+            created_at INTEGER DEFAULT {EPOCH_NOW},
+            last_modified INTEGER DEFAULT {EPOCH_NOW}
+        )
+    """, ("created_at", "last_modified")),
+    "banners": (f"""
+        CREATE TABLE banners_new (
+            banner_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            banner_name TEXT NOT NULL,
+            current_pity INTEGER DEFAULT 0,
+            max_pity INTEGER DEFAULT 0,
+            last_updated INTEGER DEFAULT {EPOCH_NOW},
+            base_rate REAL DEFAULT 0.006,
+            soft_pity INTEGER DEFAULT 74,
+            soft_pity_step REAL DEFAULT 0.06,
+            featured_rate REAL DEFAULT 0.5,
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        )
+    """, ("last_updated",)),
+    "pull_history": (f"""
+        CREATE TABLE pull_history_new (
+            pull_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            banner_id INTEGER,
+            game_id INTEGER,
+            entry_name TEXT NOT NULL,
+            pity INTEGER DEFAULT 0,
+            notes TEXT,
+            timestamp INTEGER DEFAULT {EPOCH_NOW},
+            FOREIGN KEY (banner_id) REFERENCES banners(banner_id) ON DELETE CASCADE,
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        )
+    """, ("timestamp",)),
+    "sessions": (f"""
+        CREATE TABLE sessions_new (
+            session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_name TEXT NOT NULL,
+            start_time INTEGER DEFAULT {EPOCH_NOW},
+            end_time INTEGER,
+            total_break_time INTEGER DEFAULT 0,
+            channel_id TEXT,
+            user_id TEXT,
+            duration INTEGER
+        )
+    """, ("start_time", "end_time")),
+    "session_breaks": (f"""
+        CREATE TABLE session_breaks_new (
+            break_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            break_start INTEGER DEFAULT {EPOCH_NOW},
+            break_end INTEGER,
+            duration INTEGER,
+            FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
+        )
+    """, ("break_start", "break_end")),
+    "currency_logs": (f"""
+        CREATE TABLE currency_logs_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            amount INTEGER,
+            action TEXT NOT NULL CHECK(action IN ('add', 'spend')),
+            reason REAL,
+            timestamp INTEGER DEFAULT {EPOCH_NOW},
+            FOREIGN KEY (game_id) REFERENCES games(game_id) ON DELETE CASCADE
+        )
+    """, ("timestamp",)),
+}
+
+
+def _epoch_timestamps(cur):
+    # every timestamp column goes from TEXT 'YYYY-MM-DD HH:MM:SS' (UTC) to INTEGER unix seconds:
+    # 8 bytes or less instead of 19, range scans compare ints, the read side never parses a string.
+    # a TEXT column would turn stored ints back into text (column affinity), so each table is rebuilt.
+    # foreign keys are off during migrations so dropping a parent table doesnt cascade
+    cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'meta_timestamp_to_%'")
+    for (trigger,) in cur.fetchall():
+        # they write CURRENT_TIMESTAMP into meta, remade below
+        cur.execute(f"DROP TRIGGER {trigger}")
+
+    for table, (create, timestamp_columns) in EPOCH_TABLES.items():
+        cur.execute(create)
+        columns = [row[1] for row in cur.execute("PRAGMA table_info(" + table + "_new)").fetchall()]
+        select = ", ".join(
+            # typeof check so a value that already is an int isnt read as a julian day
+            f"CASE WHEN typeof({column}) = 'integer' THEN {column} ELSE CAST(strftime('%s', {column}) AS INTEGER) END"
+            if column in timestamp_columns else column
+            for column in columns
+        )
+
+        low, high = cur.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+        while low is not None and low <= high:
+            cur.execute(f"""
+                INSERT INTO {table}_new ({", ".join(columns)})
+                SELECT {select} FROM {table} WHERE rowid >= ? AND rowid < ?
+            """, (low, low + EPOCH_BATCH))
+            low += EPOCH_BATCH
+
+        # indexes go away with the old table, the AUTOINCREMENT counter too
+        indexes = [row[0] for row in cur.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+        ).fetchall()]
+        sequence = cur.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+
+        cur.execute(f"DROP TABLE {table}")
+        cur.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        for index in indexes:
+            cur.execute(index)
+        if sequence is not None:
+            cur.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence[0], table))
+            if not cur.rowcount:
+                cur.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, sequence[0]))
+
+    for name, table in (("banner", "banners"), ("history", "pull_history"), ("currency", "currency_balance")):
+        cur.execute(f"""
+            CREATE TRIGGER meta_timestamp_to_{name}
+            AFTER UPDATE ON {table}
+            BEGIN
+                UPDATE meta
+                SET last_modified = {EPOCH_NOW}
+                WHERE id = 1;
+            END
+        """)
+
+
+def _guild_settings(cur):
+    # per guild overrides on top of the global settings row, NULL / missing flag = use the global one
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id TEXT PRIMARY KEY,
+            pagination_size INTEGER,
+            features_enabled TEXT DEFAULT '{}'
+        ) WITHOUT ROWID
+    """)
+
+
+def _banner_last_pull(cur):
+    # newest pull already applied to the banner's pity, recover_banner_writes compares against it.
+    # existing banners count as up to date so a pity set by hand doesnt get replaced on the next start
+    if not column_exists(cur, "banners", "last_pull_id"):
+        cur.execute("ALTER TABLE banners ADD COLUMN last_pull_id INTEGER")
+    cur.execute("""
+        UPDATE banners SET last_pull_id = (
+            SELECT pull_id FROM pull_history
+            WHERE banner_id = banners.banner_id
+            ORDER BY timestamp DESC, pull_id DESC LIMIT 1
+        )
+    """)
+
+
+def _drop_meta_triggers(cur):
+    # they ran an UPDATE meta for every updated row, DatabaseManager now touches meta once per
+    # write transaction instead (Meta_Connection in database_manager.py)
+    for name in ("banner", "history", "currency"):
+        cur.execute(f"DROP TRIGGER IF EXISTS meta_timestamp_to_{name}")
+
+
+def _banner_summary(cur):
+    # per banner pull count / pity total / newest pull, kept up to date by the pull writes in
+    # DatabaseManager so the banner lists never scan pull_history. banners without pulls have no row
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS banner_summary (
+            banner_id INTEGER PRIMARY KEY,
+            pull_count INTEGER NOT NULL DEFAULT 0,
+            pity_total INTEGER NOT NULL DEFAULT 0,
+            last_pull_id INTEGER,
+            FOREIGN KEY (banner_id) REFERENCES banners(banner_id) ON DELETE CASCADE
+        )
+    """)
+    cur.execute("DELETE FROM banner_summary")
+    cur.execute("""
+        INSERT INTO banner_summary (banner_id, pull_count, pity_total, last_pull_id)
+        SELECT
+            b.banner_id,
+            COUNT(*),
+            COALESCE(SUM(ph.pity), 0),
+            (SELECT pull_id FROM pull_history
+             WHERE banner_id = b.banner_id
+             ORDER BY timestamp DESC, pull_id DESC LIMIT 1)
+        FROM banners b
+        JOIN pull_history ph ON ph.banner_id = b.banner_id
+        GROUP BY b.banner_id
+    """)
+
+
+def _currency_log_units(cur):
+    # pull token changes were logged as plain add/spend rows next to the currency ones, so they
+    # ended up in the currency_daily income. new rows say which one they are, the old ones cant be
+    # told apart anymore and stay counted as currency
+    if not column_exists(cur, "currency_logs", "unit"):
+        cur.execute("ALTER TABLE currency_logs ADD COLUMN unit TEXT NOT NULL DEFAULT 'currency' CHECK(unit IN ('currency', 'token'))")
+
+
+# (version, description, step) in the order they have to run
+MIGRATIONS = [
+    (1, "baseline tables", _baseline_tables),
+    (2, "sessions.total_break_time column", _session_total_break_time),
+    (3, "currency_balance foreign key to games", _currency_balance_foreign_key),
+    (4, "meta last_modified triggers", _meta_triggers),
+    (5, "lookup indexes", _lookup_indexes),
+    (6, "banner drop rates and pull cost", _pull_rate_columns),
+    (7, "currency daily rollups", _currency_daily_rollups),
+    (8, "session owner columns", _session_owner_columns),
+    (9, "stored session and break durations", _session_durations),
+    (10, "integer epoch timestamps", _epoch_timestamps),
+    (11, "guild settings overrides", _guild_settings),
+    (12, "banners.last_pull_id for buffered pity", _banner_last_pull),
+    (13, "meta last_modified once per transaction", _drop_meta_triggers),
+    (14, "banner summary table", _banner_summary),
+    (15, "currency_logs.unit for pull tokens", _currency_log_units),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
@@ -4,14 +4,49 @@ from services.pull_service import Pull_Service
 from services.session_service import Session_Service
 from services.currency_service import Currency_Service
 from services.settings_service import Setting_Service
+from services.export_service import Export_Service
+from services.backup_service import Backup_Service
+from services.stats_service import Stats_Service
+from services.simulation_service import Simulation_Service
 from database_manager import DatabaseManager
+from async_database_manager import AsyncDatabaseManager
 
 class Services():
-    def __init__(self, db: DatabaseManager):
+    def __init__(self, db: DatabaseManager, backup_dir: str = None):
         self.db = db
+        # async facade, all the db work goes through its worker thread
+        self.adb = AsyncDatabaseManager(db)
         self.settings_service = Setting_Service(db)
         self.game_service = Game_Service(db)
         self.banner_service = Banner_Service(db)
         self.pull_service = Pull_Service(db)
         self.session_service = Session_Service(db)
-        self.currency_service = Currency_Service(db)
\ No newline at end of file
+        self.currency_service = Currency_Service(db)
+        self.export_service = Export_Service(db)
+        self.backup_service = Backup_Service(db, backup_dir)
+        self.stats_service = Stats_Service(db)
+        self.simulation_service = Simulation_Service(db)
+        # stats for a banner go stale when one of its pulls changes
+        self.pull_service.change_listeners.append(self.stats_service.invalidate)
+
+    async def run(self, func, *args, **kwargs):
+        # await service.run(service.pull_service.add_pull_to_banner, ...) so the sync service
+        # and its db calls run on the db thread instead of blocking the event loop
+        return await self.adb.run(func, *args, **kwargs)
+
+    async def all_shards(self):
+        # one database = one shard, same shape as Shard_Router.all_shards for the admin commands
+        yield "data", self
+
+    async def aggregate(self, func, *args, **kwargs):
+        # func(services, *args) on the db thread, {shard name: result} like the router
+        return {"data": await self.run(func, self, *args, **kwargs)}
+
+    def close(self, wait=False):
+        # queued work finishes first, then the connection closes on the db thread itself.
+        # wait=True blocks until that happened (shutdown), the router evicting a shard doesnt wait
+        # but gets the future of the close back
+        closed = self.adb.executor.submit(self.db.close_db)
+        self.adb.close(wait)
+        self.simulation_service.close()
+        return closed
@@ -0,0 +1,154 @@
+import os
+import time
+from datetime import datetime
+from help import Result
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from database_manager import DatabaseManager
+
+BACKUP_PREFIX = "data-"
+BACKUP_SUFFIX = ".db"
+# copies of the live db taken right before a .restore. own prefix so they are never the default
+# .restore pick (a second .restore would undo the first) and never rotated out by normal backups
+SAFETY_PREFIX = "pre-restore-"
+
+
+class Backup_Service:
+    def __init__(self, db: "DatabaseManager", backup_dir: str = None, keep: int = None, keep_safety: int = None):
+        self.db = db
+        # BACKUP_DIR / BACKUP_KEEP in the .env, defaults: ./backups and the newest 7 copies
+        self.backup_dir = backup_dir or os.getenv("BACKUP_DIR", "backups")
+        self.keep = keep or int(os.getenv("BACKUP_KEEP", "7"))
+        # BACKUP_KEEP_PRE_RESTORE, pre-restore copies are kept apart from the normal ones
+        self.keep_safety = keep_safety or int(os.getenv("BACKUP_KEEP_PRE_RESTORE", "3"))
+
+    def list_backups(self, prefix = BACKUP_PREFIX):
+        # newest first, only files we made ourselves. list_backups(SAFETY_PREFIX) for the pre-restore copies
+        if not os.path.isdir(self.backup_dir):
+            return []
+        names = [
+            name for name in os.listdir(self.backup_dir)
+            if name.startswith(prefix) and name.endswith(BACKUP_SUFFIX)
+        ]
+        return sorted(names, reverse=True)
+
+    def create_backup(self, label = None, rotate = True, prefix = BACKUP_PREFIX):
+        # NOT on the db thread: await asyncio.to_thread(service.backup_service.create_backup)
+        # copy into a .tmp file, verify it, then rename so a half written backup never looks valid
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"{prefix}{stamp}{'-' + label if label else ''}{BACKUP_SUFFIX}"
+        path = os.path.join(self.backup_dir, name)
+        # two in the same second (a .restore of the pre-restore copy it just made) must not overwrite it
+        copy = 1
+        while os.path.exists(path):
+            copy += 1
+            name = f"{prefix}{stamp}-{copy}{'-' + label if label else ''}{BACKUP_SUFFIX}"
+            path = os.path.join(self.backup_dir, name)
+        tmp_path = path + ".tmp"
+
+        start = time.perf_counter()
+        backup = self.db.backup_to(tmp_path)
+        if not backup.success:
+            self.remove_file(tmp_path)
+            return Result.fail(
+                code="BACKUP_FAILED",
+                message=backup.message,
+                error=backup.error
+            )
+        copy_time = time.perf_counter() - start
+
+        check = self.db.check_database_file(tmp_path)
+        if not check.success:
+            self.remove_file(tmp_path)
+            return Result.fail(
+                code="BACKUP_FAILED",
+                message=check.message,
+                error=check.error
+            )
+
+        os.replace(tmp_path, path)
+        removed = self.rotate(prefix) if rotate else []
+
+        return Result.ok(
+            code="BACKUP_CREATED",
+            message=f"Backup {name} created ({os.path.getsize(path) / 1e6:.1f}MB, "
+                    f"{copy_time:.1f}s copy, {time.perf_counter() - start - copy_time:.1f}s verify)",
+            data={
+                "name": name,
+                "path": path,
+                "pages": backup.data["pages"],
+                "steps": backup.data["steps"],
+                "removed": removed
+            }
+        )
+
+    def rotate(self, prefix = BACKUP_PREFIX, spare = None):
+        # keep the newest `keep` backups (`keep_safety` pre-restore copies), returns the names it deleted.
+        # `spare` is never deleted, the pre-restore copy a .restore just came from
+        keep = self.keep_safety if prefix == SAFETY_PREFIX else self.keep
+        removed = [name for name in self.list_backups(prefix)[keep:] if name != spare]
+        for name in removed:
+            self.remove_file(os.path.join(self.backup_dir, name))
+        return removed
+
+    def restore_backup(self, name = None):
+        # runs on the db thread: await service.run(service.backup_service.restore_backup, name)
+        # default is the newest normal backup, a pre-restore copy only when it is named (undo).
+        # the live db is backed up first so a restore can be undone
+        backups = self.list_backups()
+        if not name and not backups:
+            return Result.fail(
+                code="NO_BACKUPS_FOUND",
+                message="There are no backups to restore"
+            )
+
+        name = name or backups[0]
+        if name not in backups and name not in self.list_backups(SAFETY_PREFIX):
+            return Result.fail(
+                code="BACKUP_NOT_FOUND",
+                message=f"No backup called {name}"
+            )
+
+        path = os.path.join(self.backup_dir, name)
+        check = self.db.check_database_file(path)
+        if not check.success:
+            return Result.fail(
+                code="RESTORE_FAILED",
+                message=check.message,
+                error=check.error
+            )
+
+        # we are already on the db thread here so nothing else writes while this copy runs.
+        # rotated after the restore, this could be restoring one of the pre-restore copies
+        safety = self.create_backup(rotate=False, prefix=SAFETY_PREFIX)
+        if not safety.success:
+            return Result.fail(
+                code="RESTORE_FAILED",
+                message="Couldn't back up the current database before restoring",
+                error=safety.error
+            )
+
+        # restore_from migrates an older backup before it replaces anything
+        restore = self.db.restore_from(path)
+        if not restore.success:
+            return Result.fail(
+                code="RESTORE_FAILED",
+                message=restore.message,
+                error=restore.error
+            )
+
+        self.rotate(SAFETY_PREFIX, spare=name)
+
+        return Result.ok(
+            code="BACKUP_RESTORED",
+            message=f"Restored {name}, undo with .restore {safety.data['name']}",
+            data={"name": name, "safety": safety.data["name"]}
+        )
+
+    def remove_file(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
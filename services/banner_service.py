@@ -1,6 +1,5 @@
-from help import Result
+from help import Result, epoch_to_local, epochs_to_local
 from typing import TYPE_CHECKING
-from datetime import datetime, timezone, timedelta
 
 if TYPE_CHECKING:
     from database_manager import DatabaseManager
@@ -9,16 +8,6 @@ class Banner_Service:
     def __init__(self, db: "DatabaseManager"):
         self.db = db
 
-    def utc_string_to_local(self, dt_string: str | None):
-        # from UTC timestamp(sqlite default) to date plus time in 12hrs format
-        if dt_string is None:
-            return None
-
-        dt = datetime.strptime(dt_string, "%Y-%m-%d %H:%M:%S")
-        local_dt = dt.replace(tzinfo=timezone.utc).astimezone()
-
-        return local_dt.strftime("%b %d, %Y %I:%M %p")
-
     def create_banner(self, game_id, banner_name, current_pity, max_pity):
         if not game_id:
             return Result.fail(
@@ -32,14 +21,7 @@ class Banner_Service:
                 message="Banner name is empty"
             )
         
-        banner_exists = self.db.banner_name_exists(banner_name)
-
-        if banner_exists:
-            return Result.fail(
-                code="BANNER_ALREADY_EXITS",
-                message="Banner name already exists in the table"
-            )
-        
+        # add_banner already refuses duplicate names in the same insert
         create_banner = self.db.add_banner(game_id, banner_name, current_pity, max_pity)
 
         if not create_banner.success:
@@ -72,14 +54,24 @@ class Banner_Service:
         
         banner_list = []
 
-        for banner in banners.data:
-            banner_id, banner_name, current_pity, last_updated = banner
-            local_last_updated = self.utc_string_to_local(last_updated)
+        local_updates = epochs_to_local(banner[3] for banner in banners.data)
+        local_last_pulls = epochs_to_local(banner[8] for banner in banners.data)
+
+        # pull stats come from banner_summary, no pull history scan per banner
+        for banner, local_last_updated, local_last_pull in zip(banners.data, local_updates, local_last_pulls):
+            banner_id, banner_name, current_pity, last_updated, pulls, pity_total, last_name, last_pity, last_time = banner
             banner_list.append({
                 "Banner_ID": banner_id,
                 "Banner_Name": banner_name, 
                 "Current_Pity": current_pity, 
-                "Last_Updated": local_last_updated
+                "Last_Updated": local_last_updated,
+                "Pulls": pulls,
+                "Avg_Pity": round(pity_total / pulls, 1) if pulls else None,
+                "Last_Pull": {
+                    "Name": last_name,
+                    "Pity": last_pity,
+                    "Timestamp": local_last_pull
+                } if last_name is not None else None
             })
 
         return Result.ok(
@@ -105,7 +97,7 @@ class Banner_Service:
             )
         
         banner_id, game_id, banner_name, current_pity, max_pity, last_updated = banner.data
-        local_last_updated = self.utc_string_to_local(last_updated)
+        local_last_updated = epoch_to_local(last_updated)
         banner_data = {
             "Banner_id":banner_id,
             "Game_id":game_id,
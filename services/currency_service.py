@@ -1,25 +1,21 @@
-from help import Result
+import math
+from datetime import datetime, timedelta, timezone
+from help import Result, epoch_to_local, epochs_to_local
+from services.pages import Keyset_Pages
 from typing import TYPE_CHECKING
-from datetime import datetime, timezone, timedelta
 
 if TYPE_CHECKING:
     from database_manager import DatabaseManager
 
+# income windows in days
+INCOME_WEEK_DAYS = 7
+INCOME_MONTH_DAYS = 30
+
 class Currency_Service:
     def __init__(self, db: "DatabaseManager"):
         self.db = db
 
     # helper functions: timestamp convert, error if empty
-    def utc_string_to_local(self, dt_string: str | None):
-        # from UTC timestamp(sqlite default) to date plus time in 12hrs format
-        if dt_string is None:
-            return None
-
-        dt = datetime.strptime(dt_string, "%Y-%m-%d %H:%M:%S")
-        local_dt = dt.replace(tzinfo=timezone.utc).astimezone()
-
-        return local_dt.strftime("%b %d, %Y %I:%M %p")
-    
     def require_params_with_codes(self, param_map):
         for name, value in param_map.items():
             if value is None:
@@ -32,7 +28,7 @@ class Currency_Service:
     # 1: add currency for a game, 2: set a currency goal for the game, 3: unset goal
     # 4: get the currency info for a game, 5: update the currency amount, 6: update currency token
     # 7: log currency actions, 8: get the game currency logs, 
-    # 9: INCOME calculation <-- TODO: figure this out, calculate per week or something
+    # 9: INCOME calculation, weekly / monthly rate from the daily rollups (get_income)
 
     def install_game_currency(self, game_id, currency, pull_token):
         param_e = self.require_params_with_codes({
@@ -167,10 +163,10 @@ class Currency_Service:
         elif difference > 0:
             self.log_currency_action(game_id, difference, "add", reason)
         
-        # check if goal is reached
-        goal = int(currency_amount.data[1])
+        # check if goal is reached, no goal (NULL or unset to 0) is never reached
+        goal = int(currency_amount.data[1] or 0)
 
-        if new_value >= goal:
+        if goal and new_value >= goal:
             goal_data = {
                 "Goal": goal
             }
@@ -211,18 +207,19 @@ class Currency_Service:
 
         difference = new_value - old_value
 
+        # logged as tokens so they stay out of the currency income
         if difference < 0:
-            self.log_currency_action(game_id, abs(difference), "spend", reason)
+            self.log_currency_action(game_id, abs(difference), "spend", reason, unit="token")
 
         elif difference > 0:
-            self.log_currency_action(game_id, difference, "add", reason)
+            self.log_currency_action(game_id, difference, "add", reason, unit="token")
         
         return Result.ok(
             code="UPDATE_CURRENCY_TOKEN_SUCCESSFULLY",
             message=currency_token.message
         )
         
-    def log_currency_action(self, game_id, amount, action, reason):
+    def log_currency_action(self, game_id, amount, action, reason, unit="currency"):
         param_e = self.require_params_with_codes({
             "game_id": game_id,
             "amount": amount,
@@ -233,7 +230,7 @@ class Currency_Service:
         if param_e:
             return param_e
         
-        log_action = self.db.log_currency_action(game_id, amount, action, reason)
+        log_action = self.db.log_currency_action(game_id, amount, action, reason, unit)
         
         if not log_action.success:
             return Result.fail(
@@ -266,9 +263,10 @@ class Currency_Service:
         
         currency_log_list = []
 
-        for logs in currency_logs.data:
+        local_timestamps = epochs_to_local(logs[3] for logs in currency_logs.data)
+
+        for logs, local_timestamp in zip(currency_logs.data, local_timestamps):
             amount, action, reason, timestamp = logs
-            local_timestamp = self.utc_string_to_local(timestamp)
             currency_log_list.append({
                 "Amount": amount,
                 "Action": action, 
@@ -282,4 +280,135 @@ class Currency_Service:
             data=currency_log_list
         )
 
-        
\ No newline at end of file
+    def get_game_currency_logs_page(self, game_id, page_size, after=None):
+        param_e = self.require_params_with_codes({
+            "game_id": game_id
+        })
+
+        if param_e:
+            return param_e
+
+        currency_logs = self.db.get_game_currency_logs_page(game_id, page_size, after)
+
+        if not currency_logs.success:
+            return Result.fail(
+                code="GET_CURRENCY_LOGS_FAILED",
+                message=currency_logs.message,
+                error=currency_logs.error
+            )
+
+        currency_log_list = []
+
+        local_timestamps = epochs_to_local(logs[4] for logs in currency_logs.data)
+
+        for logs, local_timestamp in zip(currency_logs.data, local_timestamps):
+            log_id, amount, action, reason, timestamp = logs
+            currency_log_list.append({
+                "Amount": amount,
+                "Action": action, 
+                "Reason": reason, 
+                "Timestamp": local_timestamp
+            })
+
+        last_key = None
+        if currency_logs.data:
+            last_key = (currency_logs.data[-1][4], currency_logs.data[-1][0])
+
+        return Result.ok(
+            code="CURRENCY_LOGS_PAGE_RETRIEVED",
+            message=currency_logs.message,
+            data={
+                "items": currency_log_list,
+                "last_key": last_key
+            }
+        )
+
+    def currency_log_pages(self, game_id, page_size):
+        # page provider for the .cur-logs table, see services/pages.py
+        return Keyset_Pages(
+            fetch=lambda limit, after: self.get_game_currency_logs_page(game_id, limit, after),
+            count=lambda: self.db.count_game_currency_logs(game_id),
+            page_size=page_size
+        )
+
+    def get_income(self, game_id):
+        # 9: income from the currency_daily rollups only, never the raw logs.
+        # weekly = last 7 days, monthly = last 30 days (UTC days, same as the log timestamps)
+        param_e = self.require_params_with_codes({
+            "game_id": game_id
+        })
+
+        if param_e:
+            return param_e
+
+        today = datetime.now(timezone.utc).date()
+        month_start = today - timedelta(days=INCOME_MONTH_DAYS - 1)
+        week_start = today - timedelta(days=INCOME_WEEK_DAYS - 1)
+
+        daily = self.db.get_currency_daily(game_id, month_start.isoformat())
+        if not daily.success:
+            return Result.fail(
+                code="GET_INCOME_FAILED",
+                message=daily.message,
+                error=daily.error
+            )
+
+        # first day of logging at all, not the first active day in the window: 30 days of history
+        # with the first spend 5 days ago still averages over the whole 30
+        first_day = self.db.get_currency_first_day(game_id)
+        if not first_day.success:
+            return Result.fail(
+                code="GET_INCOME_FAILED",
+                message=first_day.message,
+                error=first_day.error
+            )
+
+        currency = self.db.get_currency_for_game(game_id)
+        if not currency.success:
+            return Result.fail(
+                code="GET_INCOME_FAILED",
+                message=currency.message,
+                error=currency.error
+            )
+        balance, _, goal = currency.data
+
+        def window(start, days):
+            rows = [row for row in daily.data if row[0] >= start.isoformat()]
+            added = sum(row[1] or 0 for row in rows)
+            spent = sum(row[2] or 0 for row in rows)
+            # only count the days since logging started if that was inside the window
+            if first_day.data:
+                logged_days = (today - datetime.strptime(first_day.data, "%Y-%m-%d").date()).days + 1
+                days = max(1, min(days, logged_days))
+            return {
+                "Added": added,
+                "Spent": spent,
+                "Net": added - spent,
+                "Per_Day": round((added - spent) / days, 1) if first_day.data else 0
+            }
+
+        weekly = window(week_start, INCOME_WEEK_DAYS)
+        monthly = window(month_start, INCOME_MONTH_DAYS)
+
+        # projection off the monthly rate, the weekly one if the month is flat or negative
+        projection = None
+        if goal and balance is not None and balance < goal:
+            rate = monthly["Per_Day"] if monthly["Per_Day"] > 0 else weekly["Per_Day"]
+            if rate > 0:
+                days_left = math.ceil((goal - balance) / rate)
+                projection = {
+                    "Days": days_left,
+                    "Date": (today + timedelta(days=days_left)).strftime("%b %d, %Y")
+                }
+
+        return Result.ok(
+            code="INCOME_CALCULATED",
+            message="Income calculated from the daily totals",
+            data={
+                "Currency": balance,
+                "Goal": goal,
+                "Weekly": weekly,
+                "Monthly": monthly,
+                "Projection": projection
+            }
+        )
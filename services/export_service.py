@@ -0,0 +1,136 @@
+import csv
+import json
+import sqlite3
+from help import Result
+from typing import TYPE_CHECKING
+
+# parquet is optional, only there if pyarrow is installed
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+if TYPE_CHECKING:
+    from database_manager import DatabaseManager
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+# parquet needs a fixed schema, these are the integer columns, everything else is text
+PARQUET_INT_COLUMNS = {
+    "pull_id", "banner_id", "game_id", "pity", "id", "amount",
+    "session_id", "total_break_time", "break_id", "duration",
+}
+# unix seconds since the epoch migration, written as parquet timestamps so readers get dates not ints
+PARQUET_TIMESTAMP_COLUMNS = {
+    "timestamp", "start_time", "end_time", "break_start", "break_end",
+}
+
+
+class Export_Service:
+    def __init__(self, db: "DatabaseManager", batch_size: int = 5000):
+        self.db = db
+        # rows held at once for parquet row groups, csv/jsonl write row by row
+        self.batch_size = batch_size
+
+    def export_table(self, table, file_format, path, game_id = None):
+        # stream one table into a file at path, runs on the db thread: await service.run(...)
+        if file_format not in EXPORT_FORMATS:
+            return Result.fail(
+                code="UNKNOWN_EXPORT_FORMAT",
+                message=f"Can't export as {file_format}, pick one of: {', '.join(EXPORT_FORMATS)}"
+            )
+
+        if file_format == "parquet" and pa is None:
+            return Result.fail(
+                code="PARQUET_UNAVAILABLE",
+                message="Parquet export needs pyarrow installed, use csv or jsonl instead"
+            )
+
+        stream = self.db.stream_table(table, game_id)
+        if not stream.success:
+            return Result.fail(
+                code="FAILED_EXPORTING_TABLE",
+                message=stream.message,
+                error=stream.error
+            )
+
+        columns = stream.data["columns"]
+        rows = stream.data["rows"]
+        writers = {
+            "csv": self.write_csv,
+            "jsonl": self.write_jsonl,
+            "parquet": self.write_parquet,
+        }
+
+        try:
+            count = writers[file_format](path, columns, rows)
+        # sqlite errors come from iterating the cursor halfway through the file, not from stream_table
+        except (OSError, ValueError, sqlite3.Error) as e:
+            return Result.fail(
+                code="FAILED_EXPORTING_TABLE",
+                message=f"Couldn't write the {file_format} file",
+                error=str(e)
+            )
+
+        return Result.ok(
+            code="TABLE_EXPORTED",
+            message=f"Exported {count} rows from {table}",
+            data={
+                "path": path,
+                "rows": count
+            }
+        )
+
+    def write_csv(self, path, columns, rows):
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        return count
+
+    def write_jsonl(self, path, columns, rows):
+        count = 0
+        with open(path, "w", encoding="utf-8") as file:
+            for row in rows:
+                file.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                file.write("\n")
+                count += 1
+        return count
+
+    def write_parquet(self, path, columns, rows):
+        # one row group per batch so only batch_size rows are ever in memory
+        schema = pa.schema([(name, self.parquet_type(name)) for name in columns])
+        count = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    writer.write_table(self.parquet_batch(schema, columns, batch))
+                    count += len(batch)
+                    batch = []
+            if batch or not count:
+                writer.write_table(self.parquet_batch(schema, columns, batch))
+                count += len(batch)
+        return count
+
+    def parquet_type(self, name):
+        if name in PARQUET_TIMESTAMP_COLUMNS:
+            return pa.timestamp("s", tz="UTC")
+        if name in PARQUET_INT_COLUMNS:
+            return pa.int64()
+        return pa.string()
+
+    def parquet_batch(self, schema, columns, batch):
+        data = {}
+        for i, name in enumerate(columns):
+            if name in PARQUET_INT_COLUMNS or name in PARQUET_TIMESTAMP_COLUMNS:
+                data[name] = [row[i] for row in batch]
+            else:
+                data[name] = [None if row[i] is None else str(row[i]) for row in batch]
+        return pa.Table.from_pydict(data, schema=schema)
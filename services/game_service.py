@@ -7,6 +7,33 @@ if TYPE_CHECKING:
 class Game_Service:
     def __init__(self, db: "DatabaseManager"):
         self.db = db
+        # channel_id -> game dict, almost every command starts with get_game_for_channel so keep it in memory.
+        # filled lazily, dropped by create/rename/delete/channel update.
+        # only touched from the db worker thread so no lock needed
+        self.channel_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # CACHE HELPERS
+    def invalidate_channel(self, channel_id):
+        self.channel_cache.pop(str(channel_id), None)
+
+    def invalidate_game(self, game_id):
+        # we only know the game id on rename/delete so look for its channel
+        for channel_id, game in list(self.channel_cache.items()):
+            if str(game["Game_ID"]) == str(game_id):
+                del self.channel_cache[channel_id]
+
+    def cache_stats(self):
+        return Result.ok(
+            code="GAME_CACHE_STATS",
+            message="Channel to game cache stats",
+            data={
+                "Size": len(self.channel_cache),
+                "Hits": self.cache_hits,
+                "Misses": self.cache_misses
+            }
+        )
 
     # existence checks already on db so no need to put it on service layers, just validate variable passed from the command
 
@@ -25,22 +52,17 @@ class Game_Service:
                 message="Channel ID for the command is empty"
             )
         
-        game_exists = self.db.game_exists_with_channel_ID(channel_id)
-
-        if game_exists:
-            return Result.fail(
-                code="GAME_ALREADY_EXISTS",
-                message="Couldn't create game. Game already exists"
-            )
-        
+        # add_games only inserts when the name and channel are both free
         add_result = self.db.add_games(game_name, channel_id)
         
         if not add_result.success:
             return Result.fail(
                 code="CREATE_GAME_FAILED",
-                message="Failed creating new game",
+                message=add_result.message,
                 error=add_result.error
             )
+
+        self.invalidate_channel(channel_id)
         
         return Result.ok(
             code="GAME_CREATED",
@@ -55,6 +77,17 @@ class Game_Service:
                 message="Channel ID for the command is empty"
             )
         
+        # channel ids come in as int from discord but are stored as TEXT, key the cache on the text
+        cached = self.channel_cache.get(str(channel_id))
+        if cached is not None:
+            self.cache_hits += 1
+            return Result.ok(
+                code="GAME_FETCHED",
+                message="Game retrieved successfully",
+                data=cached
+            )
+
+        self.cache_misses += 1
         get_game = self.db.get_game_by_channel_id(channel_id)
 
         if not get_game.success:
@@ -71,6 +104,7 @@ class Game_Service:
             "Game_Name" : game_name,
             "Game_Channel_ID" : game_ch_id
         }
+        self.channel_cache[str(channel_id)] = game
 
         return Result.ok(
             code="GAME_FETCHED",
@@ -133,6 +167,8 @@ class Game_Service:
                 message=rename.message,
                 error=rename.error
             )
+
+        self.invalidate_game(game_id)
         
         return Result.ok(
             code="GAME_RENAMED",
@@ -155,11 +191,43 @@ class Game_Service:
                 message=delete.message,
                 error=delete.error
             )
+
+        self.invalidate_game(game_id)
         
         return Result.ok(
             code="DELETE_GAME_SUCCESSFULLY",
             message=delete.message
         )
-    
-    
-    # update game channel to be followed
\ No newline at end of file
+
+
+    # update game channel to be followed
+    def update_game_channel(self, game_id, channel_id):
+        if not game_id:
+            return Result.fail(
+                code="EMPTY_GAME_ID",
+                message="Game ID for the command is empty"
+            )
+
+        if not channel_id:
+            return Result.fail(
+                code="EMPTY_CHANNEL_ID",
+                message="Channel ID for the command is empty"
+            )
+
+        update = self.db.update_game_channel(game_id, channel_id)
+
+        if not update.success:
+            return Result.fail(
+                code="UPDATE_GAME_CHANNEL_FAILED",
+                message=update.message,
+                error=update.error
+            )
+
+        # old channel entry points at this game, new channel might have been cached as something else
+        self.invalidate_game(game_id)
+        self.invalidate_channel(channel_id)
+
+        return Result.ok(
+            code="GAME_CHANNEL_UPDATED",
+            message=update.message
+        )
\ No newline at end of file
@@ -5,13 +5,28 @@ from services.pull_service import Pull_Service
 from services.session_service import Session_Service
 from services.settings_service import Setting_Service
 from services.currency_service import Currency_Service
+from services.export_service import Export_Service
+from services.backup_service import Backup_Service
+from services.stats_service import Stats_Service
+from services.simulation_service import Simulation_Service
 from database_manager import DatabaseManager
+from async_database_manager import AsyncDatabaseManager
 
 class ServicesProtocol(Protocol):
     db: DatabaseManager
+    adb: AsyncDatabaseManager
     banner_service: Banner_Service
     game_service: Game_Service
     pull_service: Pull_Service
     settings_service: Setting_Service
     session_service: Session_Service
-    currency_service: Currency_Service
\ No newline at end of file
+    currency_service: Currency_Service
+    export_service: Export_Service
+    backup_service: Backup_Service
+    stats_service: Stats_Service
+    simulation_service: Simulation_Service
+
+    async def run(self, func, *args, **kwargs): ...
+    def all_shards(self): ...
+    async def aggregate(self, func, *args, **kwargs): ...
+    def close(self, wait=False): ...
@@ -0,0 +1,58 @@
+from help import Result
+
+
+class Keyset_Pages:
+    # page provider for the lazy PaginatedTable / SelectionMenu: page index -> one keyset read.
+    #   fetch(limit, after) -> Result, data = {"items": [...], "last_key": key of the last row or None}
+    #   count()             -> Result, data = total rows
+    # remembers the last key of every page it served so going forward or back is always a single
+    # indexed range query, and the total is only counted once per view.
+    # get_page runs on the db thread: await service.run(pages.get_page, page)
+    def __init__(self, fetch, count, page_size, empty_message=None):
+        self.fetch = fetch
+        self.count = count
+        self.page_size = page_size
+        # if set, an empty source is an error with this message instead of an empty page
+        self.empty_message = empty_message
+        self.total = None
+        self.page_keys = {}  # page index -> key of its last row
+
+    def get_page(self, page):
+        if self.total is None:
+            count = self.count()
+            if not count.success:
+                return Result.fail(
+                    code="FAILED_COUNTING_ENTRIES",
+                    message=count.message,
+                    error=count.error
+                )
+            if not count.data and self.empty_message is not None:
+                return Result.fail(
+                    code="NO_ENTRIES_FOUND",
+                    message=self.empty_message
+                )
+            self.total = count.data
+
+        # walk from the closest page we already know the key for (normally page - 1)
+        start = page
+        while start > 0 and (start - 1) not in self.page_keys:
+            start -= 1
+
+        items = []
+        for current in range(start, page + 1):
+            result = self.fetch(self.page_size, self.page_keys.get(current - 1))
+            if not result.success:
+                return result
+            items = result.data["items"]
+            if result.data["last_key"] is None:
+                break
+            self.page_keys[current] = result.data["last_key"]
+
+        return Result.ok(
+            code="PAGE_RETRIEVED",
+            message="Page retrieved successfully",
+            data={
+                "items": items,
+                "total": self.total
+            }
+        )
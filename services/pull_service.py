@@ -1,6 +1,9 @@
-from help import Result
+import csv
+import io
+import json
+from help import Result, epoch_to_local, epochs_to_local
+from services.pages import Keyset_Pages
 from typing import TYPE_CHECKING
-from datetime import datetime, timezone, timedelta
 
 if TYPE_CHECKING:
     from database_manager import DatabaseManager
@@ -8,17 +11,13 @@ if TYPE_CHECKING:
 class Pull_Service:
     def __init__(self, db: "DatabaseManager"):
         self.db = db
+        # called with the banner id after a pull is added / edited / deleted (stats cache etc)
+        self.change_listeners = []
 
-    def utc_string_to_local(self, dt_string: str | None):
-        # from UTC timestamp(sqlite default) to date plus time in 12hrs format
-        if dt_string is None:
-            return None
+    def notify_change(self, banner_id):
+        for listener in self.change_listeners:
+            listener(banner_id)
 
-        dt = datetime.strptime(dt_string, "%Y-%m-%d %H:%M:%S")
-        local_dt = dt.replace(tzinfo=timezone.utc).astimezone()
-
-        return local_dt.strftime("%b %d, %Y %I:%M %p")
-    
     def add_pull_to_banner(self, entry_name, banner_id, pity, notes = None):
         if not entry_name:
             return Result.fail(
@@ -37,8 +36,19 @@ class Pull_Service:
                 code="EMPTY_PITY",
                 message="Pity number for the command is empty"
             )
+
+        # same rule as every line of .pulls, pity counts from 1
+        try:
+            pity = int(pity)
+        except (TypeError, ValueError):
+            pity = 0
+        if pity < 1:
+            return Result.fail(
+                code="INVALID_PITY",
+                message="Pity has to be a whole number of at least 1"
+            )
         
-        # add to pull history
+        # add to pull history, the banner pity follows through the db's write behind buffer
         pull_entry = self.db.add_pull(entry_name, banner_id, pity, notes)
         
         if not pull_entry.success:
@@ -48,21 +58,112 @@ class Pull_Service:
                 error=pull_entry.error
             )
         
-        # update banner pity too
-        update_pity = self.db.update_banner_pity(banner_id, pity)
-
-        if not update_pity.success:            
-            return Result.fail(
-                code="FAILED_ADDING_PULL_ENTRY",
-                message=update_pity.message,
-                error=update_pity.error            
-            )
-        
+        self.notify_change(banner_id)
         return Result.ok(
             code="PULL_ENTRY_ADDED",
             message=pull_entry.message
         )
     
+    def parse_pulls(self, text, file_name = None):
+        # rows for add_pulls_to_banner from a .pulls message block or an attached file
+        #   block / .csv : one pull per line -> Entry Name, pity, Notes(optional). header line is skipped
+        #   .json        : [{"entry_name": ..., "pity": ..., "notes": ...}, ...] or [[name, pity, notes], ...]
+        if file_name and file_name.lower().endswith(".json"):
+            try:
+                raw_rows = json.loads(text)
+            except json.JSONDecodeError as e:
+                return Result.fail(
+                    code="INVALID_PULL_FILE",
+                    message="Couldn't read the JSON file",
+                    error=str(e)
+                )
+            if not isinstance(raw_rows, list):
+                return Result.fail(
+                    code="INVALID_PULL_FILE",
+                    message="JSON file has to be a list of pulls"
+                )
+            rows = []
+            for row in raw_rows:
+                if isinstance(row, dict):
+                    row = [row.get("entry_name", row.get("name")), row.get("pity"), row.get("notes")]
+                elif not isinstance(row, list):
+                    row = [row]
+                rows.append(row)
+        else:
+            rows = [row for row in csv.reader(io.StringIO(text), skipinitialspace=True) if any(row)]
+            if rows and rows[0] and rows[0][0].strip().lower() in ("entry_name", "entry", "name"):
+                rows = rows[1:]
+
+        pulls = []
+        for line, row in enumerate(rows, start=1):
+            if len(row) < 2 or len(row) > 3:
+                return Result.fail(
+                    code="INVALID_PULL_ROW",
+                    message=f"Line {line}: expected `Entry Name`, `pity`, `Notes: Optional`"
+                )
+            entry_name = str(row[0] or "").strip()
+            notes = str(row[2]).strip() or None if len(row) == 3 and row[2] is not None else None
+            try:
+                pity = int(row[1])
+            except (TypeError, ValueError):
+                return Result.fail(
+                    code="INVALID_PULL_ROW",
+                    message=f"Line {line}: pity has to be a number"
+                )
+            if pity < 1:
+                return Result.fail(
+                    code="INVALID_PULL_ROW",
+                    message=f"Line {line}: pity has to be at least 1"
+                )
+            if not entry_name:
+                return Result.fail(
+                    code="INVALID_PULL_ROW",
+                    message=f"Line {line}: entry name is empty"
+                )
+            pulls.append((entry_name, pity, notes))
+
+        if not pulls:
+            return Result.fail(
+                code="EMPTY_PULL_ENTRIES",
+                message="No pull entries to add"
+            )
+
+        return Result.ok(
+            code="PULL_ENTRIES_PARSED",
+            message=f"Read {len(pulls)} pull entries",
+            data=pulls
+        )
+
+    def add_pulls_to_banner(self, banner_id, pulls):
+        # whole batch in one transaction, banner pity ends at the last pull (same as .pull one by one)
+        if not banner_id:
+            return Result.fail(
+                code="EMPTY_BANNER_ID",
+                message="Banner ID for the command is empty"
+            )
+
+        if not pulls:
+            return Result.fail(
+                code="EMPTY_PULL_ENTRIES",
+                message="No pull entries to add"
+            )
+
+        pull_entries = self.db.add_pulls(banner_id, pulls)
+
+        if not pull_entries.success:
+            return Result.fail(
+                code="FAILED_ADDING_PULL_ENTRIES",
+                message=pull_entries.message,
+                error=pull_entries.error
+            )
+
+        self.notify_change(banner_id)
+        return Result.ok(
+            code="PULL_ENTRIES_ADDED",
+            message=pull_entries.message,
+            data=pull_entries.data
+        )
+
     def edit_pull(self, pull_id, entry_name, pity, notes = None):
         if not entry_name:
             return Result.fail(
@@ -92,6 +193,7 @@ class Pull_Service:
                 error=pull_entry.error
             )
         
+        self.notify_change(pull_entry.data)
         return Result.ok(
             code="PULL_ENTRY_EDITED",
             message=pull_entry.message
@@ -122,9 +224,10 @@ class Pull_Service:
         
         pull_history = []
 
-        for pull in banner_pulls.data:
+        timestamps = epochs_to_local(pull[4] for pull in banner_pulls.data)
+
+        for pull, timestamp in zip(banner_pulls.data, timestamps):
             id, entry, pity, notes, time = pull
-            timestamp = self.utc_string_to_local(time)
             pull_history.append({
                 "ID": id,
                 "Timestamp": timestamp,
@@ -139,6 +242,60 @@ class Pull_Service:
             data=pull_history
         )
 
+    def get_banner_pulls_page(self, banner_id, page_size, after=None):
+        # one page of history only, after = (timestamp, pull_id) of the last row on the previous page
+        if not banner_id:
+            return Result.fail(
+                code="EMPTY_BANNER_ID",
+                message="Banner ID for the command is empty"
+            )
+
+        page = self.db.get_pulls_page(banner_id, page_size, after)
+
+        if not page.success:
+            return Result.fail(
+                code="FAILED_FETCHING_PULL_HISTORY",
+                message=page.message,
+                error=page.error
+            )
+
+        pull_history = []
+
+        timestamps = epochs_to_local(pull[4] for pull in page.data)
+
+        for pull, timestamp in zip(page.data, timestamps):
+            id, entry, pity, notes, time = pull
+            pull_history.append({
+                "ID": id,
+                "Timestamp": timestamp,
+                "Pity": pity,
+                "Name": entry,
+                "Notes": notes
+            })
+
+        # raw key of the last row, the next page starts after it
+        last_key = None
+        if page.data:
+            last_key = (page.data[-1][4], page.data[-1][0])
+
+        return Result.ok(
+            code="PULL_HISTORY_PAGE_RETRIEVED",
+            message=page.message,
+            data={
+                "items": pull_history,
+                "last_key": last_key
+            }
+        )
+
+    def history_pages(self, banner_id, page_size):
+        # page provider for the history table, see services/pages.py
+        return Keyset_Pages(
+            fetch=lambda limit, after: self.get_banner_pulls_page(banner_id, limit, after),
+            count=lambda: self.db.count_pulls_by_banner(banner_id),
+            page_size=page_size,
+            empty_message="Couldn't get pull entries for this banner."
+        )
+
     def delete_pull(self, pull_id):
         if not pull_id:
             return Result.fail(
@@ -155,7 +312,9 @@ class Pull_Service:
                 error=delete.error
             )
         
+        self.notify_change(delete.data)
         return Result.ok(
             code="PULL_ENTRY_DELETED",
             message=delete.message
-        )
\ No newline at end of file
+        )
+
@@ -1,6 +1,7 @@
-from help import Result
+from help import Result, epoch_to_local
+from services.pages import Keyset_Pages
 from typing import TYPE_CHECKING
-from datetime import datetime, timezone, timedelta
+from datetime import timedelta
 
 if TYPE_CHECKING:
     from database_manager import DatabaseManager
@@ -8,6 +9,68 @@ if TYPE_CHECKING:
 class Session_Service:
     def __init__(self, db: "DatabaseManager"):
         self.db = db
+        # (channel_id, user_id) -> {"session_id", "session_name", "break_id"} for every running session.
+        # only touched inside service methods and those all run on the one db thread (service.run),
+        # so the "already running?" check and the insert can't interleave between two commands
+        self.active = {}
+        # open sessions from before sessions had an owner, the next session command claims one
+        self.unowned = []
+
+    # SESSION REGISTRY
+    def session_key(self, channel_id, user_id):
+        # ids come in as int from discord but are stored as TEXT, same as the game channel cache
+        return (str(channel_id), str(user_id))
+
+    def load_active_sessions(self):
+        # rebuild the registry from the sessions that never got an end_time (startup / after a restore)
+        open_sessions = self.db.get_open_sessions()
+        if not open_sessions.success:
+            return Result.fail(
+                code="FAILED_LOADING_SESSIONS",
+                message=open_sessions.message,
+                error=open_sessions.error
+            )
+
+        self.active = {}
+        self.unowned = []
+        for session_id, session_name, channel_id, user_id, break_id in open_sessions.data:
+            entry = {
+                "session_id": session_id,
+                "session_name": session_name,
+                "break_id": break_id
+            }
+            if channel_id is None:
+                self.unowned.append(entry)
+            else:
+                self.active[self.session_key(channel_id, user_id)] = entry
+
+        return Result.ok(
+            code="SESSIONS_LOADED",
+            message=f"Loaded {len(self.active) + len(self.unowned)} open sessions",
+            data=len(self.active) + len(self.unowned)
+        )
+
+    def get_active(self, channel_id, user_id):
+        key = self.session_key(channel_id, user_id)
+        entry = self.active.get(key)
+        if entry is None and self.unowned:
+            # old single session from before the owner columns, whoever asks first gets it
+            claim = self.db.claim_session(self.unowned[0]["session_id"], *key)
+            if claim.success:
+                entry = self.unowned.pop(0)
+                self.active[key] = entry
+        return entry
+
+    def forget_session(self, session_id):
+        for key, entry in list(self.active.items()):
+            if entry["session_id"] == session_id:
+                del self.active[key]
+        self.unowned = [entry for entry in self.unowned if entry["session_id"] != session_id]
+
+    def forget_break(self, break_id):
+        for entry in list(self.active.values()) + self.unowned:
+            if entry["break_id"] == break_id:
+                entry["break_id"] = None
 
     # HELPER FUNCTIONS 
     def require_params_with_codes(self, param_map):
@@ -25,20 +88,9 @@ class Session_Service:
             return None
         return str(timedelta(seconds=int(seconds)))
         
-    def utc_string_to_local(self, dt_string: str | None):
-        # from UTC timestamp(sqlite default) to date plus time in 12hrs format
-        if dt_string is None:
-            return None
-
-        dt = datetime.strptime(dt_string, "%Y-%m-%d %H:%M:%S")
-        local_dt = dt.replace(tzinfo=timezone.utc).astimezone()
-
-        return local_dt.strftime("%b %d, %Y %I:%M %p")
-
     
     # session service things !!
-    # SQLITE CURRENT_TIMESTAMP DEFAULTS TO UTC. JUST CONVERT IT TO LOCAL TIME AFTER BACKEND XD
-    # ^^^ done?
+    # timestamps come out of the db as unix seconds (UTC), epoch_to_local makes them local time XD
 
     def start_session(self, name):
         # check for missing parameter, if theres error, return it
@@ -94,6 +146,133 @@ class Session_Service:
             data=session_detail
         )        
     
+    # the channel + user versions the commands use, they find the session in the registry
+    def start_active_session(self, name, channel_id, user_id):
+        if self.get_active(channel_id, user_id) is not None:
+            return Result.fail(
+                code="SESSION_ALREADY_ACTIVE",
+                message="Session already started. Cannot start another session."
+            )
+
+        param_e = self.require_params_with_codes({
+            "name": name
+        })
+
+        if param_e:
+            return param_e
+
+        key = self.session_key(channel_id, user_id)
+        start = self.db.start_session(name, *key)
+        if not start.success:
+            return Result.fail(
+                code="START_SESSION_FAILED",
+                message=start.message,
+                error=start.error
+            )
+
+        session_id = start.data[0]
+        self.active[key] = {
+            "session_id": session_id,
+            "session_name": name,
+            "break_id": None
+        }
+
+        return Result.ok(
+            code="SESSION_STARTED",
+            message=start.message,
+            data=session_id
+        )
+
+    def end_active_session(self, channel_id, user_id):
+        entry = self.get_active(channel_id, user_id)
+        if entry is None:
+            return Result.fail(
+                code="NO_ACTIVE_SESSION",
+                message="No active session to end."
+            )
+
+        # a running break counts towards the break time, end it first
+        if entry["break_id"] is not None:
+            end_break = self.end_break(entry["break_id"])
+            if not end_break.success:
+                return end_break
+            entry["break_id"] = None
+
+        end = self.end_session(entry["session_id"])
+        if not end.success:
+            return end
+
+        self.forget_session(entry["session_id"])
+        return end
+
+    def start_active_break(self, channel_id, user_id):
+        entry = self.get_active(channel_id, user_id)
+        if entry is None:
+            return Result.fail(
+                code="NO_ACTIVE_SESSION",
+                message="No active session to add break to."
+            )
+
+        if entry["break_id"] is not None:
+            return Result.fail(
+                code="BREAK_ALREADY_ACTIVE",
+                message="Break session already active."
+            )
+
+        start_break = self.add_session_break(entry["session_id"])
+        if not start_break.success:
+            return start_break
+
+        entry["break_id"] = start_break.data
+        return Result.ok(
+            code="BREAK_STARTED",
+            message=start_break.message,
+            data=entry["session_name"]
+        )
+
+    def end_active_break(self, channel_id, user_id):
+        entry = self.get_active(channel_id, user_id)
+        if entry is None:
+            return Result.fail(
+                code="NO_ACTIVE_SESSION",
+                message="No active session to end break for."
+            )
+
+        if entry["break_id"] is None:
+            return Result.fail(
+                code="NO_ACTIVE_BREAK",
+                message="No active break session to end."
+            )
+
+        end = self.end_break(entry["break_id"])
+        if not end.success:
+            return end
+
+        entry["break_id"] = None
+        return Result.ok(
+            code="BREAK_ENDED",
+            message=end.message,
+            data={
+                "session_name": entry["session_name"],
+                "duration": end.data
+            }
+        )
+
+    def get_active_session(self, channel_id, user_id):
+        entry = self.get_active(channel_id, user_id)
+        if entry is None:
+            return Result.fail(
+                code="NO_ACTIVE_SESSION",
+                message="No active session."
+            )
+
+        session = self.get_current_session(entry["session_id"])
+        if not session.success:
+            return session
+
+        session.data["session_name"] = entry["session_name"]
+        return session
+
     def get_current_session(self, session_id):
         param_e = self.require_params_with_codes({
             "session_id": session_id
@@ -110,43 +289,34 @@ class Session_Service:
                 error=session.error
             )
 
+        # rows = session start + elapsed, then the break columns (NULL when there are no breaks)
+        start_time, elapsed = session.data[0][0], session.data[0][1]
+        break_rows = [row[2:] for row in session.data if row[2] is not None]
+
         # convert duration (secs) to hh:mm:ss
-        duration = session.data[1]
-        duration_hms = self.format_seconds_to_hms(duration)
         session_detail = {
-            "session_start_time": self.utc_string_to_local(session.data[0]),
-            "elapsed_duration": duration_hms,
-            "has_break": session.data[2], # add list of breaks here
+            "session_start_time": epoch_to_local(start_time),
+            "elapsed_duration": self.format_seconds_to_hms(elapsed),
+            "has_break": 1 if break_rows else 0,
             "breaks": []
         }
         
-        # check for session breaks, if we have session breaks, get the list
-        if session.data[2] == 1:
-            breaks = self.db.get_breaks_for_session(session_id)
-            if not breaks.success:
-                return Result.fail(
-                code="FETCH_BREAKS_FOR_CURRENT_SESSION_FAILED",
-                message=breaks.message,
-                error=breaks.error
-            )
-            break_list = []
-            for sesh in breaks.data:
-                break_start, break_end, duration, is_fin = sesh
-                # convert timestamp to local time
-                start_local_time = self.utc_string_to_local(break_start)
-                if break_end is not None:
-                    end_local_time = self.utc_string_to_local(break_end)
-                else:
-                    end_local_time = None                
-                # convert duration
-                duration_hms = self.format_seconds_to_hms(duration)
-                break_list.append({
-                    "Start_Time": start_local_time,
-                    "End_Time": end_local_time,
-                    "Duration": duration_hms,
-                    "is_finished": is_fin
-                })
-            session_detail["breaks"] = break_list
+        break_list = []
+        for break_start, break_end, duration in break_rows:
+            # convert timestamp to local time
+            start_local_time = epoch_to_local(break_start)
+            if break_end is not None:
+                end_local_time = epoch_to_local(break_end)
+            else:
+                end_local_time = None                
+            # convert duration
+            break_list.append({
+                "Start_Time": start_local_time,
+                "End_Time": end_local_time,
+                "Duration": self.format_seconds_to_hms(duration),
+                "is_finished": 1 if break_end is not None else 0
+            })
+        session_detail["breaks"] = break_list
 
         return Result.ok(
             code="SESSION_LIST_RETRIEVED",
@@ -172,31 +342,61 @@ class Session_Service:
                 error=sessions.error
             )
         
-        sessions_list = []
+        sessions_list = [self.format_session_row(session) for session in sessions.data]
+
+        return Result.ok(
+            code="SESSION_LIST_RETRIEVED",
+            message=sessions.message,
+            data=sessions_list
+        )
 
-        for session in sessions.data:
-            session_id, session_name, start_time, end_time, total_break_time, duration = session
-            
-            start_local_time = self.utc_string_to_local(start_time)
-            end_local_time = self.utc_string_to_local(end_time)
-            duration_hms = str(self.format_seconds_to_hms(duration)) + " elapsed"
-            name_formatted = "└──> " + str(session_id) + " - " + str(session_name)
+    def format_session_row(self, session):
+        session_id, session_name, start_time, end_time, total_break_time, duration = session
+        
+        start_local_time = epoch_to_local(start_time)
+        end_local_time = epoch_to_local(end_time)
+        duration_hms = str(self.format_seconds_to_hms(duration)) + " elapsed"
+        name_formatted = "└──> " + str(session_id) + " - " + str(session_name)
 
-            if total_break_time is not None:
-                total_break_time = str(total_break_time) + " s"
+        if total_break_time is not None:
+            total_break_time = str(total_break_time) + " s"
 
-            sessions_list.append({
-                "Start_Time": start_local_time,
-                "End_Time": end_local_time,
-                "Total_Break_Time": total_break_time,
-                "Session_Name": name_formatted,
-                "Duration": duration_hms
-            })
+        return {
+            "Start_Time": start_local_time,
+            "End_Time": end_local_time,
+            "Total_Break_Time": total_break_time,
+            "Session_Name": name_formatted,
+            "Duration": duration_hms
+        }
+
+    def get_sessions_page(self, page_size, after=None):
+        sessions = self.db.browse_sessions_page(page_size, after)
+
+        if not sessions.success:
+            return Result.fail(
+                code="FAILED_FETCHING_SESSION_LIST",
+                message=sessions.message,
+                error=sessions.error
+            )
+
+        last_key = sessions.data[-1][0] if sessions.data else None
 
         return Result.ok(
-            code="SESSION_LIST_RETRIEVED",
+            code="SESSION_PAGE_RETRIEVED",
             message=sessions.message,
-            data=sessions_list
+            data={
+                "items": [self.format_session_row(session) for session in sessions.data],
+                "last_key": last_key
+            }
+        )
+
+    def session_pages(self, page_size):
+        # page provider for the .sessions table, see services/pages.py
+        return Keyset_Pages(
+            fetch=lambda limit, after: self.get_sessions_page(limit, after),
+            count=self.db.count_sessions,
+            page_size=page_size,
+            empty_message="Couldn't fetch all session."
         )
 
     def add_session_break(self, session_id):
@@ -265,6 +465,8 @@ class Session_Service:
                 error=delete_s.error
             )        
         
+        # deleting a running session ends it too
+        self.forget_session(session_id)
         return Result.ok(
             code="SESSION_DELETED",
             message=delete_s.message
@@ -287,6 +489,7 @@ class Session_Service:
                 error=delete_B.error
             )
         
+        self.forget_break(break_id)
         return Result.ok(
             code="BREAK_DELETED",
             message=delete_B.message
@@ -1,28 +1,55 @@
-from help import Result
-from typing import TYPE_CHECKING
-from datetime import datetime, timezone
+import json
+import logging
+import weakref
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from help import Result, epoch_to_local
+from typing import TYPE_CHECKING, Mapping
 
 if TYPE_CHECKING:
     from database_manager import DatabaseManager
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGINATION = 5
+# SelectionMenu shows one button per item + the 2 nav buttons, a discord View holds 25 items at most
+MAX_PAGINATION = 25 - 2
+# update_guild: leave this part of the override as it is
+KEEP = object()
+
+
+@dataclass(frozen=True)
+class Settings:
+    pagination: int = DEFAULT_PAGINATION
+    # feature name -> on/off, read only
+    features: Mapping[str, bool] = field(default_factory=lambda: MappingProxyType({}))
+
+
+def parse_features(raw):
+    # features_enabled column -> {name: bool}, parsed once when loaded instead of on every check
+    try:
+        features = json.loads(raw or "{}")
+    except (TypeError, ValueError):
+        logger.warning("features_enabled is not valid JSON, ignoring it: %r", raw)
+        return {}
+    if not isinstance(features, dict):
+        return {}
+    return {str(name).lower(): bool(enabled) for name, enabled in features.items()}
+
+
 class Setting_Service:
     def __init__(self, db: "DatabaseManager"):
         self.db = db
-        self.pagination = int(5) 
+        # global settings row, guild_id -> (pagination or None, {feature: bool}) overrides,
+        # and guild_id -> Settings with the overrides already applied so a read is one dict get
+        self.defaults = Settings(features=MappingProxyType({}))
+        self.overrides = {}
+        self.resolved = {}
+        self.subscribers = []
         
         # update pagination based on settings
         self.get_all_settings()
 
-    def utc_string_to_local(self, dt_string: str | None):
-        # from UTC timestamp(sqlite default) to date plus time in 12hrs format
-        if dt_string is None:
-            return None
-
-        dt = datetime.strptime(dt_string, "%Y-%m-%d %H:%M:%S")
-        local_dt = dt.replace(tzinfo=timezone.utc).astimezone()
-
-        return local_dt.strftime("%b %d, %Y %I:%M %p")
-    
     # db META stuff
     def update_db_version(self):
         version = "0.1"
@@ -53,8 +80,8 @@ class Setting_Service:
         
         meta = {
             **v.data,
-            "created_at": self.utc_string_to_local(v.data["created_at"]),
-            "last_modified": self.utc_string_to_local(v.data["last_modified"])
+            "created_at": epoch_to_local(v.data["created_at"]),
+            "last_modified": epoch_to_local(v.data["last_modified"])
         }
         
         return Result.ok(
@@ -63,6 +90,27 @@ class Setting_Service:
             data=meta
         )
     
+    def get_query_stats(self, reset=False):
+        # timing of the registry statements since startup (or the last reset), busiest first
+        stats = self.db.get_query_stats()
+        if reset:
+            self.db.reset_query_stats()
+
+        return Result.ok(
+            code="QUERY_STATS_OBTAINED",
+            message=stats.message,
+            data=[
+                {
+                    "Name": name,
+                    "Calls": calls,
+                    "Avg_ms": round(avg, 3),
+                    "Max_ms": round(slowest, 3),
+                    "Total_ms": round(total, 1)
+                }
+                for name, calls, avg, slowest, total in stats.data
+            ]
+        )
+
     # settings
 
     def initialize_settings(self):
@@ -81,6 +129,7 @@ class Setting_Service:
         )
 
     def get_all_settings(self):
+        # (re)load the global row + every guild override into memory, runs once on startup
         all_setting = self.db.get_settings()
 
         if not all_setting.success:
@@ -89,6 +138,14 @@ class Setting_Service:
                 message=all_setting.message,
                 error=all_setting.error
             )
+
+        guild_rows = self.db.get_guild_settings()
+        if not guild_rows.success:
+            return Result.fail(
+                code="FETCH_SETTINGS_FAILED",
+                message=guild_rows.message,
+                error=guild_rows.error
+            )
         
         settings = []
         
@@ -99,20 +156,99 @@ class Setting_Service:
                 "Features": features
             })
 
-            self.pagination = pagination
+            # capped, rows saved back when the limit was 25 would break every SelectionMenu
+            self.defaults = Settings(min(pagination or DEFAULT_PAGINATION, MAX_PAGINATION), MappingProxyType(parse_features(features)))
+
+        self.overrides = {
+            guild_id: (pagination, parse_features(features))
+            for guild_id, pagination, features in guild_rows.data
+        }
+        self.resolve_all()
 
         return Result.ok(
             code="ALL_SETTINGS_RETRIEVED",
             message=all_setting.message,
             data = settings
         )
+
+    # in memory reads, these never touch the db
+    @property
+    def pagination(self):
+        # global page size, same attribute the views always read
+        return self.defaults.pagination
+
+    def get(self, guild_id=None):
+        if guild_id is None:
+            return self.defaults
+        return self.resolved.get(str(guild_id), self.defaults)
+
+    def page_size(self, guild_id=None):
+        return self.get(guild_id).pagination
+
+    def feature_enabled(self, name, guild_id=None, default=False):
+        # features are command names for now, main.py turns a command off where its feature is off
+        return self.get(guild_id).features.get(name, default)
+
+    def subscribe(self, callback):
+        # callback(guild_id, settings) after every change, guild_id None = the global ones changed.
+        # runs on the db thread (the change is a service.run). returns the unsubscribe function.
+        # bound methods are held weakly, a view nobody stops (timeout=None) doesnt live on through this list
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else lambda: callback
+        self.subscribers = [*self.subscribers, ref]
+
+        def unsubscribe():
+            self.subscribers = [other for other in self.subscribers if other is not ref]
+        return unsubscribe
+
+    def resolve(self, guild_id):
+        pagination, features = self.overrides[guild_id]
+        return Settings(
+            pagination=min(pagination, MAX_PAGINATION) if pagination else self.defaults.pagination,
+            features=MappingProxyType({**self.defaults.features, **features})
+        )
+
+    def resolve_all(self):
+        # new dicts swapped in whole, readers on the event loop never see a half built one
+        self.resolved = {guild_id: self.resolve(guild_id) for guild_id in self.overrides}
+
+    def notify(self, guild_id):
+        settings = self.get(guild_id)
+        dead = False
+        for ref in self.subscribers:
+            callback = ref()
+            if callback is None:
+                dead = True
+                continue
+            callback(guild_id, settings)
+        if dead:
+            self.subscribers = [ref for ref in self.subscribers if ref() is not None]
+
+    # write through: db first, memory only once it is saved
+    def validate_pagination(self, size):
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            size = 0
+        if not 1 <= size <= MAX_PAGINATION:
+            return None
+        return size
     
-    def update_pagination(self, size):
+    def update_pagination(self, size, guild_id=None):
         if not size:
             return Result.fail(
                 code="EMPTY_PAGINATION_SIZE",
                 message="Failed updating pagination, no pagination size inputted"                
             )
+
+        size = self.validate_pagination(size)
+        if size is None:
+            return Result.fail(
+                code="INVALID_PAGINATION_SIZE",
+                message=f"Pagination size has to be between 1 and {MAX_PAGINATION}"
+            )
+
+        if guild_id is not None:
+            return self.update_guild(guild_id, pagination=size)
         
         update = self.db.update_pagination(size)
 
@@ -123,12 +259,98 @@ class Setting_Service:
                 error=update.error
             )
         
-        self.pagination = size
+        self.defaults = replace(self.defaults, pagination=size)
+        self.resolve_all()
+        self.notify(None)
         
         return Result.ok(
             code="UPDATE_PAGINATION_SUCCESS",
             message=update.message
         )
 
-    # feature to be added : idk yet so no need XD !
-        
\ No newline at end of file
+    def reset_guild_pagination(self, guild_id):
+        return self.update_guild(guild_id, pagination=None)
+
+    def set_feature(self, name, enabled, guild_id=None):
+        # enabled None = drop the override (guild) / the flag (global)
+        name = str(name or "").strip().lower()
+        if not name:
+            return Result.fail(
+                code="EMPTY_FEATURE_NAME",
+                message="Feature name is empty"
+            )
+
+        if guild_id is not None:
+            _, features = self.overrides.get(str(guild_id), (None, {}))
+            features = {**features, name: enabled}
+            if enabled is None:
+                del features[name]
+            return self.update_guild(guild_id, features=features)
+
+        features = {**self.defaults.features, name: enabled}
+        if enabled is None:
+            del features[name]
+
+        update = self.db.update_features(json.dumps(features))
+        if not update.success:
+            return Result.fail(
+                code="FAILED_UPDATING_FEATURES",
+                message=update.message,
+                error=update.error
+            )
+
+        self.defaults = replace(self.defaults, features=MappingProxyType(features))
+        self.resolve_all()
+        self.notify(None)
+
+        return Result.ok(
+            code="UPDATE_FEATURES_SUCCESS",
+            message=update.message
+        )
+
+    def update_guild(self, guild_id, pagination=KEEP, features=KEEP):
+        guild_id = str(guild_id)
+        old_pagination, old_features = self.overrides.get(guild_id, (None, {}))
+        pagination = old_pagination if pagination is KEEP else pagination
+        features = old_features if features is KEEP else features
+
+        update = self.db.update_guild_settings(guild_id, pagination, json.dumps(features))
+        if not update.success:
+            return Result.fail(
+                code="FAILED_UPDATING_GUILD_SETTINGS",
+                message=update.message,
+                error=update.error
+            )
+
+        overrides = dict(self.overrides)
+        resolved = dict(self.resolved)
+        if pagination is None and not features:
+            overrides.pop(guild_id, None)
+            resolved.pop(guild_id, None)
+        else:
+            overrides[guild_id] = (pagination, features)
+        self.overrides = overrides
+        if guild_id in overrides:
+            resolved[guild_id] = self.resolve(guild_id)
+        self.resolved = resolved
+        self.notify(guild_id)
+
+        return Result.ok(
+            code="UPDATE_GUILD_SETTINGS_SUCCESS",
+            message=update.message
+        )
+
+    def describe(self, guild_id=None):
+        # what .settings shows: effective values + which ones this server overrides
+        settings = self.get(guild_id)
+        pagination, features = self.overrides.get(str(guild_id), (None, {})) if guild_id is not None else (None, {})
+        return Result.ok(
+            code="SETTINGS_RETRIEVED",
+            message="Settings retrieved",
+            data={
+                "Pagination": settings.pagination,
+                "Pagination_Overridden": pagination is not None,
+                "Features": dict(settings.features),
+                "Overridden_Features": sorted(features)
+            }
+        )
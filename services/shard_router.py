@@ -0,0 +1,289 @@
+import asyncio
+import contextvars
+import os
+import re
+from collections import OrderedDict
+from contextlib import aclosing
+from help import Result
+from database_manager import DatabaseManager
+from services import Services
+
+# guild of the command / button being handled right now, set by bot.before_invoke and the views.
+# None (DMs) goes to the global shard
+current_guild = contextvars.ContextVar("current_guild", default=None)
+
+GLOBAL_SHARD = "global"
+SHARD_SUFFIX = ".db"
+DEFAULT_MAX_OPEN = 32
+
+# the Shard_Router the bot runs on (None with a single data.db). the views only have a guild id,
+# they reach the router through enter_guild / hold_guild
+active_router = None
+
+
+def use_guild(guild_id):
+    # route every service call after this (in the same task) to that guild's shard
+    current_guild.set(guild_id)
+
+
+async def enter_guild(guild_id):
+    # use_guild + with a router: open the shard off the event loop and keep it open until the
+    # current task (the command / the button press) is done
+    use_guild(guild_id)
+    router = active_router
+    if router is None:
+        return
+
+    name = shard_name(guild_id)
+    await router.acquire(name)
+    asyncio.current_task().add_done_callback(lambda _: router.release(name))
+
+
+def hold_guild(guild_id):
+    # keep the guild's (open) shard open past the current task, for views whose lazy pages hold on
+    # to that shard's services. returns the release function, calling it twice is fine
+    router = active_router
+    if router is None:
+        return lambda: None
+
+    name = shard_name(guild_id)
+    router.pins[name] = router.pins.get(name, 0) + 1
+    held = [True]
+
+    def release():
+        if held[0]:
+            held[0] = False
+            router.release(name)
+
+    return release
+
+
+def shard_name(guild_id):
+    return GLOBAL_SHARD if guild_id is None else f"guild-{guild_id}"
+
+
+def open_shard(path, profile="wal", backup_dir=None):
+    # connect + migrate + plan check + banner recovery + running sessions, the same startup main.py does for one db
+    db = DatabaseManager(path, profile=profile)
+    for step in (db.connect_db, db.migrate, db.check_query_plans, db.recover_banner_writes):
+        result = step()
+        if not result.success:
+            db.close_db()
+            return Result.fail(
+                code="FAILED_OPENING_SHARD",
+                message=f"{path}: {result.message}",
+                error=result.error
+            )
+
+    services = Services(db, backup_dir=backup_dir)
+    sessions = services.session_service.load_active_sessions()
+    if not sessions.success:
+        services.close()
+        return Result.fail(
+            code="FAILED_OPENING_SHARD",
+            message=f"{path}: {sessions.message}",
+            error=sessions.error
+        )
+
+    return Result.ok(
+        code="SHARD_OPENED",
+        message=f"Opened shard {path}",
+        data=services
+    )
+
+
+class Shard_Router:
+    # one sqlite file (and one Services with its own db thread) per guild, same interface as Services
+    # so the commands dont know the difference: service.pull_service / service.run(...) go to the
+    # shard of current_guild. shards open on first use (enter_guild, off the event loop) and only
+    # max_open stay open: the least recently used one that nobody pins gets closed when another opens.
+    # a pin = a command / button press still running or a view still paging through that shard
+    def __init__(self, shard_dir, profile="wal", max_open=DEFAULT_MAX_OPEN, backup_dir=None):
+        global active_router
+        self.shard_dir = shard_dir
+        self.profile = profile
+        self.max_open = max(1, max_open)
+        # every shard gets its own folder under BACKUP_DIR, backup names dont say which db they are from
+        self.backup_dir = backup_dir or os.getenv("BACKUP_DIR", "backups")
+        # shard name -> Services, oldest use first
+        self.shards = OrderedDict()
+        # shard name -> how many users it has right now, pinned shards never get closed
+        self.pins = {}
+        # shard name -> asyncio.Lock, one open at a time per shard
+        self.opening = {}
+        # shard name -> future of an evicted shard's close_db, it reopens only after that finished
+        self.closing = {}
+        os.makedirs(shard_dir, exist_ok=True)
+        active_router = self
+
+    def shard_path(self, name):
+        return os.path.join(self.shard_dir, name + SHARD_SUFFIX)
+
+    def shard_names(self):
+        # every shard on disk (+ the open ones, a new shard has no file until it connects)
+        names = {
+            file_name[:-len(SHARD_SUFFIX)] for file_name in os.listdir(self.shard_dir)
+            if file_name.endswith(SHARD_SUFFIX) and (file_name.startswith("guild-") or file_name == GLOBAL_SHARD + SHARD_SUFFIX)
+        }
+        return sorted(names | set(self.shards))
+
+    async def acquire(self, name, recent=True):
+        # open the shard if needed (connect + migrate + ... on a worker thread) and pin it.
+        # recent=False leaves it at the old end of the LRU, for walks over every shard
+        while name not in self.shards:
+            lock = self.opening.setdefault(name, asyncio.Lock())
+            async with lock:
+                if name in self.shards:
+                    break
+
+                closing = self.closing.pop(name, None)
+                if closing is not None:
+                    # the evicted copy is still flushing its buffered banner writes
+                    await asyncio.wrap_future(closing)
+
+                opened = await asyncio.to_thread(open_shard, self.shard_path(name), self.profile, os.path.join(self.backup_dir, name))
+                if not opened.success:
+                    # nothing sensible to answer with, the command errors out like a broken db would
+                    raise RuntimeError(f"{opened.message}: {opened.error}")
+
+                self.shards[name] = opened.data
+                if not recent:
+                    self.shards.move_to_end(name, last=False)
+
+        if recent:
+            self.shards.move_to_end(name)
+        # no await between the open and the pin, nothing can close it in between
+        self.pins[name] = self.pins.get(name, 0) + 1
+        self.evict()
+        return self.shards[name]
+
+    def release(self, name):
+        pins = self.pins.get(name, 0) - 1
+        if pins > 0:
+            self.pins[name] = pins
+        else:
+            self.pins.pop(name, None)
+        self.evict()
+
+    def evict(self):
+        # close the oldest unpinned shards until max_open are left. all pinned -> stay over the limit
+        # for now, the next release tries again
+        for name in list(self.shards):
+            if len(self.shards) <= self.max_open:
+                break
+            if self.pins.get(name):
+                continue
+            # queued work of that shard finishes first, close_db runs after it on its own db thread
+            self.closing[name] = self.shards.pop(name).close()
+
+    def current(self):
+        name = shard_name(current_guild.get())
+        services = self.shards.get(name)
+        if services is None:
+            # opening here would block the event loop, every command / button goes through enter_guild
+            raise RuntimeError(f"Shard {name} isn't open, call enter_guild first")
+        return services
+
+    def __getattr__(self, name):
+        # service.pull_service, service.db, service.adb ... of the current guild's shard
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.current(), name)
+
+    async def run(self, func, *args, **kwargs):
+        # same thread as the shard func came from, both were looked up with the same current_guild
+        return await self.current().run(func, *args, **kwargs)
+
+    async def all_shards(self):
+        # (name, Services) of every shard. closed ones open at the old end of the LRU and close again
+        # right after, so a walk over all of them doesnt push the busy shards out
+        for name in self.shard_names():
+            shard = await self.acquire(name, recent=False)
+            try:
+                yield name, shard
+            finally:
+                self.release(name)
+
+    async def aggregate(self, func, *args, **kwargs):
+        # func(shard_services, *args) on every shard's own db thread -> {shard name: result}
+        results = {}
+        async with aclosing(self.all_shards()) as shards:
+            async for name, shard in shards:
+                results[name] = await shard.run(func, shard, *args, **kwargs)
+        return results
+
+    def close(self, wait=False):
+        global active_router
+        while self.shards:
+            _, services = self.shards.popitem(last=False)
+            services.close(wait)
+        if wait:
+            for closing in self.closing.values():
+                closing.result()
+        self.closing = {}
+        if active_router is self:
+            active_router = None
+
+
+def split_database(source_path, shard_dir, guild_channels, profile="wal"):
+    # one data.db -> shard_dir/guild-<id>.db per guild + global.db for channels nobody mapped.
+    # guild_channels = {guild_id: [channel_id, ...]}, .shard_map makes it from the live bot
+    source = DatabaseManager(source_path, profile=profile)
+    connect = source.connect_db()
+    if not connect.success:
+        return connect
+
+    # the split copies must have the current schema, otherwise every shard migrates on its own later
+    migration = source.migrate()
+    if not migration.success:
+        source.close_db()
+        return migration
+
+    mapped = [str(channel) for channels in guild_channels.values() for channel in channels]
+    targets = [(str(guild_id), channels) for guild_id, channels in guild_channels.items()]
+    targets.append((None, mapped))
+
+    # check the whole map before the first copy, a bad entry halfway would leave half the shards written
+    for guild_id, _ in targets:
+        if guild_id is not None and not re.fullmatch(r"\d+", guild_id):
+            source.close_db()
+            return Result.fail(
+                code="INVALID_GUILD_ID",
+                message=f"Guild id {guild_id} is not a discord id"
+            )
+
+        path = os.path.join(shard_dir, shard_name(guild_id) + SHARD_SUFFIX)
+        if os.path.exists(path):
+            source.close_db()
+            return Result.fail(
+                code="SHARD_EXISTS",
+                message=f"{path} already exists, split into an empty folder"
+            )
+
+    os.makedirs(shard_dir, exist_ok=True)
+    summary = {}
+    try:
+        for guild_id, channels in targets:
+            name = shard_name(guild_id)
+            path = os.path.join(shard_dir, name + SHARD_SUFFIX)
+            copy = source.backup_to(path, pages=-1, sleep=0)
+            if not copy.success:
+                return copy
+
+            shard = DatabaseManager(path, profile=profile)
+            shard.connect_db()
+            prune = shard.prune_to_shard(channels, guild_id)
+            shard.close_db()
+            if not prune.success:
+                return prune
+
+            summary[name] = prune.data
+
+    finally:
+        source.close_db()
+
+    return Result.ok(
+        code="DATABASE_SPLIT",
+        message=f"Split {source_path} into {len(summary)} shards in {shard_dir}",
+        data=summary
+    )
@@ -0,0 +1,242 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from help import Result
+from typing import TYPE_CHECKING
+
+# numpy is optional, .sim just says so when it is missing
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from database_manager import DatabaseManager
+
+DEFAULT_TRIALS = 20000
+# simulated pulls per trial are capped so a silly balance cant keep a worker busy forever
+MAX_HORIZON = 5000
+
+# 50/50 outcome codes, same as DatabaseManager.COIN_FLIP_OUTCOME
+LOST = 0
+
+
+def pull_rates(max_pity, base_rate, soft_pity, soft_pity_step):
+    # rates[k] = chance of the 5 star on the k-th pull since the last one, 1.0 at hard pity
+    k = np.arange(max_pity + 1)
+    rates = np.where(k >= soft_pity, base_rate + soft_pity_step * (k - soft_pity + 1), base_rate)
+    rates = np.clip(rates, 0.0, 1.0)
+    rates[max_pity] = 1.0
+    return rates
+
+
+def simulate_pulls(params, trials=DEFAULT_TRIALS, seed=None):
+    # runs in the process pool, only plain data in and out.
+    # all trials move forward one pull per step together, so the python loop is over pulls
+    # (a few hundred) while every step is one numpy op over all the trials
+    rng = np.random.default_rng(seed)
+    max_pity = params["max_pity"]
+    rates = pull_rates(max_pity, params["base_rate"], params["soft_pity"], params["soft_pity_step"])
+    budget = min(params["budget_pulls"], MAX_HORIZON)
+    goal = min(params["goal_pulls"] or 0, MAX_HORIZON)
+
+    # long enough that every trial gets the featured one: rest of this pity + a lost 50/50 + one more pity
+    worst_case = (max_pity - params["current_pity"]) + (0 if params["guaranteed"] else max_pity)
+    horizon = min(max(budget, goal, worst_case), MAX_HORIZON)
+
+    pity = np.full(trials, params["current_pity"], dtype=np.int64)
+    guaranteed = np.full(trials, params["guaranteed"], dtype=bool)
+    five_stars = np.zeros(trials, dtype=np.int64)
+    featured = np.zeros(trials, dtype=np.int64)
+    featured_by_goal = np.zeros(trials, dtype=bool)
+    first_featured = np.full(trials, -1, dtype=np.int64)
+
+    for pull in range(1, horizon + 1):
+        pity += 1
+        hit = rng.random(trials) < rates[np.minimum(pity, max_pity)]
+        won = hit & (guaranteed | (rng.random(trials) < params["featured_rate"]))
+        # a win (or guarantee) resets the 50/50, a loss makes the next one guaranteed
+        guaranteed = (guaranteed & ~hit) | (hit & ~won)
+        pity[hit] = 0
+
+        if pull <= budget:
+            five_stars += hit
+            featured += won
+        if pull <= goal:
+            featured_by_goal |= won
+        first_featured[won & (first_featured < 0)] = pull
+
+        if pull >= max(budget, goal) and (first_featured >= 0).all():
+            break
+
+    needed = first_featured[first_featured >= 0]
+    featured_counts = np.bincount(np.minimum(featured, 3), minlength=4) / trials
+
+    return {
+        "Trials": trials,
+        "Simulated_Pulls": budget,
+        "Five_Star_Chance": float((five_stars > 0).mean()),
+        "Featured_Chance": float((featured > 0).mean()),
+        "Expected_Five_Stars": float(five_stars.mean()),
+        # chance of exactly 0, 1, 2 and 3 or more featured within the budget
+        "Featured_Counts": [float(x) for x in featured_counts],
+        "Goal_Featured_Chance": float(featured_by_goal.mean()) if goal else None,
+        "Pulls_Needed": {
+            p: int(np.percentile(needed, p)) if needed.size else None
+            for p in (50, 90, 99)
+        },
+    }
+
+
+class Simulation_Service:
+    def __init__(self, db: "DatabaseManager", workers: int = 2):
+        self.db = db
+        self.workers = workers
+        self.pool = None
+
+    def get_pool(self):
+        # made on first use with the platform's default start method. the workers only ever run
+        # simulate_pulls (numpy, no db), on spawn platforms they re-import main.py which is why
+        # bot.run there sits behind __name__ == "__main__"
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def get_simulation_input(self, game_id, banner_id):
+        # runs on the db thread: live balance + banner rates + whether the next 5 star is guaranteed
+        if np is None:
+            return Result.fail(
+                code="SIMULATION_UNAVAILABLE",
+                message="The simulator needs numpy installed on the bot"
+            )
+
+        budget = self.db.get_pull_budget(game_id)
+        if not budget.success:
+            return Result.fail(
+                code="FAILED_FETCHING_BALANCE",
+                message=budget.message,
+                error=budget.error
+            )
+        currency, pull_token, goal, pull_cost = budget.data
+
+        rates = self.db.get_banner_rates(banner_id)
+        if not rates.success:
+            return Result.fail(
+                code="FAILED_FETCHING_BANNER",
+                message=rates.message,
+                error=rates.error
+            )
+        current_pity, max_pity, base_rate, soft_pity, soft_pity_step, featured_rate = rates.data
+
+        if not max_pity or max_pity <= 0:
+            return Result.fail(
+                code="NO_HARD_PITY",
+                message="Set the banner's max pity first (*.ubp*), the simulator needs a hard pity"
+            )
+
+        last_flip = self.db.get_last_coin_flip(banner_id)
+        if not last_flip.success:
+            return Result.fail(
+                code="FAILED_FETCHING_PITY_HISTORY",
+                message=last_flip.message,
+                error=last_flip.error
+            )
+
+        pull_cost = pull_cost or 1
+        return Result.ok(
+            code="SIMULATION_INPUT_READY",
+            message="Simulation input ready",
+            data={
+                "currency": currency or 0,
+                "pull_token": pull_token or 0,
+                "pull_cost": pull_cost,
+                "budget_pulls": (currency or 0) // pull_cost + (pull_token or 0),
+                "goal_pulls": (goal or 0) // pull_cost + (pull_token or 0) if goal else None,
+                "current_pity": min(current_pity or 0, max_pity - 1),
+                "max_pity": max_pity,
+                "base_rate": base_rate,
+                "soft_pity": soft_pity,
+                "soft_pity_step": soft_pity_step,
+                "featured_rate": featured_rate,
+                # after a lost 50/50 the next 5 star is the featured one
+                "guaranteed": last_flip.data == LOST,
+            }
+        )
+
+    async def simulate(self, params, trials=DEFAULT_TRIALS):
+        # awaited straight from the command, the numpy work happens in another process
+        loop = asyncio.get_running_loop()
+        try:
+            outcome = await loop.run_in_executor(self.get_pool(), simulate_pulls, params, trials)
+        except Exception as e:
+            return Result.fail(
+                code="SIMULATION_FAILED",
+                message="Simulation worker failed",
+                error=str(e)
+            )
+
+        return Result.ok(
+            code="SIMULATION_DONE",
+            message=f"Simulated {trials} trials",
+            data=outcome
+        )
+
+    def update_banner_rates(self, banner_id, base_rate, soft_pity, soft_pity_step, featured_rate):
+        try:
+            base_rate = float(base_rate)
+            soft_pity = int(soft_pity)
+            soft_pity_step = float(soft_pity_step)
+            featured_rate = float(featured_rate)
+        except (TypeError, ValueError):
+            return Result.fail(
+                code="INVALID_BANNER_RATES",
+                message="Rates have to be numbers: base rate, soft pity, soft pity step, featured rate"
+            )
+
+        # rates are given as chances (0.006), not percents
+        if not (0 < base_rate <= 1 and 0 <= soft_pity_step <= 1 and 0 <= featured_rate <= 1 and soft_pity > 0):
+            return Result.fail(
+                code="INVALID_BANNER_RATES",
+                message="Rates are chances between 0 and 1 (0.6% = 0.006) and soft pity has to be positive"
+            )
+
+        update = self.db.update_banner_rates(banner_id, base_rate, soft_pity, soft_pity_step, featured_rate)
+        if not update.success:
+            return Result.fail(
+                code="FAILED_UPDATING_BANNER_RATES",
+                message=update.message,
+                error=update.error
+            )
+
+        return Result.ok(
+            code="BANNER_RATES_UPDATED",
+            message=update.message
+        )
+
+    def update_pull_cost(self, game_id, pull_cost):
+        try:
+            pull_cost = int(pull_cost)
+        except (TypeError, ValueError):
+            pull_cost = 0
+        if pull_cost <= 0:
+            return Result.fail(
+                code="INVALID_PULL_COST",
+                message="Pull cost has to be a positive number"
+            )
+
+        update = self.db.update_pull_cost(game_id, pull_cost)
+        if not update.success:
+            return Result.fail(
+                code="FAILED_UPDATING_PULL_COST",
+                message=update.message,
+                error=update.error
+            )
+
+        return Result.ok(
+            code="PULL_COST_UPDATED",
+            message=update.message
+        )
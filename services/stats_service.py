@@ -0,0 +1,140 @@
+from help import Result
+from typing import TYPE_CHECKING
+
+# numpy is optional, .stats just says so when it is missing
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from database_manager import DatabaseManager
+
+# pity bucket width for the histogram
+HISTOGRAM_BIN = 10
+MAX_BUCKETS = 20
+
+# 50/50 outcome codes from DatabaseManager.get_pity_column
+LOST, WON, GUARANTEED = 0, 1, 2
+
+
+def longest_run(mask):
+    # longest streak of True in a bool array, no python loop over the pulls
+    if not mask.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+
+class Stats_Service:
+    def __init__(self, db: "DatabaseManager"):
+        self.db = db
+        # banner id -> computed stats, dropped by invalidate() whenever a pull of that banner changes
+        self.cache = {}
+
+    def invalidate(self, banner_id):
+        try:
+            self.cache.pop(int(banner_id), None)
+        except (TypeError, ValueError):
+            self.cache.clear()
+
+    def clear(self):
+        self.cache.clear()
+
+    def get_banner_stats(self, banner_id):
+        if np is None:
+            return Result.fail(
+                code="STATS_UNAVAILABLE",
+                message="Stats need numpy installed on the bot"
+            )
+
+        try:
+            banner_id = int(banner_id)
+        except (TypeError, ValueError):
+            return Result.fail(
+                code="INVALID_BANNER_ID",
+                message="Banner ID has to be a number"
+            )
+
+        # banner row every time (cheap pk lookup) so a deleted banner never answers from the cache
+        banner = self.db.get_banner(banner_id)
+        if not banner.success:
+            return Result.fail(
+                code="FAILED_FETCHING_BANNER",
+                message=banner.message,
+                error=banner.error
+            )
+        _, _, banner_name, current_pity, max_pity, _ = banner.data
+
+        stats = self.cache.get(banner_id)
+        if stats is None:
+            column = self.db.get_pity_column(banner_id)
+            if not column.success:
+                return Result.fail(
+                    code="FAILED_FETCHING_PITY_HISTORY",
+                    message=column.message,
+                    error=column.error
+                )
+            if not column.data:
+                return Result.fail(
+                    code="NO_PULL_ENTRIES_FOUND",
+                    message="No pulls logged for this banner yet"
+                )
+
+            stats = self.compute_stats(column.data, max_pity)
+            self.cache[banner_id] = stats
+
+        return Result.ok(
+            code="BANNER_STATS_RETRIEVED",
+            message="Banner stats computed successfully",
+            data={
+                "Banner_Name": banner_name,
+                "Current_Pity": current_pity,
+                "Max_Pity": max_pity,
+                **stats
+            }
+        )
+
+    def compute_stats(self, rows, max_pity):
+        # rows = [(pity, outcome), ...] in pull order, outcome None when the notes dont say
+        pity = np.fromiter((row[0] or 0 for row in rows), dtype=np.int64, count=len(rows))
+        outcome = np.fromiter((-1 if row[1] is None else row[1] for row in rows), dtype=np.int8, count=len(rows))
+
+        p25, p50, p75, p90 = np.percentile(pity, [25, 50, 75, 90])
+        mean = float(pity.mean())
+
+        # histogram buckets of HISTOGRAM_BIN pity up to the hard pity (or the highest logged one),
+        # wider buckets on huge pity banners so it stays at most MAX_BUCKETS lines in the embed
+        top = max(int(max_pity or 0), int(pity.max()), 1)
+        width = HISTOGRAM_BIN * max(1, -(-top // (HISTOGRAM_BIN * MAX_BUCKETS)))
+        edges = np.arange(0, top + width, width)
+        counts, edges = np.histogram(pity, bins=edges)
+
+        # 50/50s only, guaranteed pulls and unknown ones are not a coin flip
+        coin_flips = outcome[(outcome == WON) | (outcome == LOST)]
+        won = int((coin_flips == WON).sum())
+        lost = int((coin_flips == LOST).sum())
+
+        return {
+            "Pulls": int(pity.size),
+            "Mean": round(mean, 1),
+            "Median": float(p50),
+            "Std": round(float(pity.std()), 1),
+            "Min": int(pity.min()),
+            "Max": int(pity.max()),
+            "Percentiles": {"p25": float(p25), "p75": float(p75), "p90": float(p90)},
+            # (low, high, count), numpy's last bucket includes its right edge
+            "Histogram": [
+                (int(edges[i]), int(edges[i + 1]) - (i < len(counts) - 1), int(counts[i]))
+                for i in range(len(counts))
+            ],
+            "Lucky_Streak": longest_run(pity < mean),
+            "Unlucky_Streak": longest_run(pity >= mean),
+            "Won": won,
+            "Lost": lost,
+            "Guaranteed": int((outcome == GUARANTEED).sum()),
+            "Win_Rate": round(won / coin_flips.size * 100, 1) if coin_flips.size else None,
+            "Loss_Streak": longest_run(coin_flips == LOST),
+        }
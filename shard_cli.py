@@ -0,0 +1,52 @@
+import argparse
+import json
+import os
+import sys
+from database_manager import CONNECTION_PROFILES
+from services.shard_router import split_database
+
+# offline split of data.db into one file per server, stop the bot first XD
+#   .shard_map in discord -> shard_map.json
+#   python shard_cli.py split --guild-map shard_map.json --out shards
+#   DB_SHARD_DIR=shards in the .env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split the bot database into one file per server")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    split = sub.add_parser("split", help="copy the database into per server shards")
+    split.add_argument("--guild-map", required=True, help="json {guild_id: [channel_id, ...]} from .shard_map")
+    split.add_argument("--out", default="shards", help="folder for the shards, has to be empty, default shards")
+    split.add_argument("--source", default="data.db", help="database file, default data.db")
+    split.add_argument("--profile", choices=list(CONNECTION_PROFILES), default="wal", help="connection profile, default wal")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"No database at {args.source}", file=sys.stderr)
+        return 1
+
+    try:
+        with open(args.guild_map, encoding="utf-8") as file:
+            guild_map = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Couldn't read the guild map: {e}", file=sys.stderr)
+        return 1
+
+    if not isinstance(guild_map, dict) or not all(isinstance(channels, list) for channels in guild_map.values()):
+        print("Guild map has to be {guild_id: [channel_id, ...]}", file=sys.stderr)
+        return 1
+
+    result = split_database(args.source, args.out, guild_map, args.profile)
+    if not result.success:
+        print(result.message, file=sys.stderr)
+        return 1
+
+    print(result.message)
+    for name, removed in result.data.items():
+        print(f"  {name}: dropped {removed['games_removed']} games, {removed['sessions_removed']} sessions of other shards")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
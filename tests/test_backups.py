@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager
+from services.backup_service import Backup_Service, SAFETY_PREFIX
+
+
+class Backup_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "data.db"))
+        self.db.connect_db()
+        self.db.migrate()
+        self.backups = Backup_Service(self.db, os.path.join(self.tmp.name, "backups"), keep=2, keep_safety=2)
+
+    def tearDown(self):
+        self.db.close_db()
+        self.tmp.cleanup()
+
+    def game_names(self):
+        return [row[0] for row in self.db.connection.execute("SELECT game_name FROM games ORDER BY game_name")]
+
+    def test_second_restore_does_not_undo_the_first(self):
+        self.db.add_games("old", "1")
+        self.assertTrue(self.backups.create_backup().success)
+        self.db.add_games("new", "2")
+
+        first = self.backups.restore_backup()
+        self.assertTrue(first.success)
+        self.assertTrue(first.data["safety"].startswith(SAFETY_PREFIX))
+        self.assertEqual(self.game_names(), ["old"])
+
+        # the default pick is still the normal backup, not the pre-restore copy of "new"
+        second = self.backups.restore_backup()
+        self.assertEqual(second.data["name"], first.data["name"])
+        self.assertEqual(self.game_names(), ["old"])
+
+        # naming the pre-restore copy undoes the restore
+        undo = self.backups.restore_backup(first.data["safety"])
+        self.assertTrue(undo.success)
+        self.assertEqual(self.game_names(), ["new", "old"])
+        self.assertNotEqual(undo.data["safety"], first.data["safety"])
+
+    def test_rotation_keeps_the_sets_apart(self):
+        self.assertTrue(self.backups.create_backup().success)
+        for _ in range(3):
+            self.assertTrue(self.backups.restore_backup().success)
+        safety_copies = self.backups.list_backups(SAFETY_PREFIX)
+        self.assertEqual(len(safety_copies), 2)
+
+        for label in ("a", "b", "c"):
+            self.assertTrue(self.backups.create_backup(label).success)
+        self.assertEqual(len(self.backups.list_backups()), 2)
+        self.assertEqual(self.backups.list_backups(SAFETY_PREFIX), safety_copies)
+
+
+if __name__ == "__main__":
+    unittest.main()
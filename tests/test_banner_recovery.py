@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager
+from migrations import MIGRATIONS, SCHEMA_VERSION
+from services.backup_service import Backup_Service
+
+# child process: pulls go in, their banner pity only sits in the write behind buffer, then the
+# process dies without close_db / a flush (os._exit skips every cleanup, like a kill -9)
+CRASHING_CHILD = """
+import os, sys
+sys.path.insert(0, sys.argv[1])
+from database_manager import DatabaseManager
+db = DatabaseManager(sys.argv[2])
+db.connect_db()
+for pity in range(1, 41):
+    db.add_pull("x", 1, pity, None)
+assert db.pending_banners, "add_pull should have buffered the banner write"
+os._exit(1)
+"""
+
+
+def new_database(path):
+    db = DatabaseManager(path)
+    db.connect_db()
+    db.migrate()
+    db.add_games("game", "1")
+    db.add_banner(1, "banner", 0, 90)
+    return db
+
+
+def banner_row(db):
+    return db.connection.execute("SELECT current_pity, last_updated, last_pull_id FROM banners WHERE banner_id = 1").fetchone()
+
+
+def newest_pull(db):
+    return db.connection.execute("""
+        SELECT pity, timestamp, pull_id FROM pull_history
+        WHERE banner_id = 1 ORDER BY timestamp DESC, pull_id DESC LIMIT 1
+    """).fetchone()
+
+
+class Banner_Recovery_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "data.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_crash_loses_no_banner_update(self):
+        new_database(self.path).close_db()
+
+        child = subprocess.run([sys.executable, "-c", CRASHING_CHILD, ROOT, self.path], capture_output=True, text=True)
+        self.assertEqual(child.returncode, 1, child.stderr)
+
+        db = DatabaseManager(self.path)
+        db.connect_db()
+        self.addCleanup(db.close_db)
+        # every pull made it, the banner row didnt
+        self.assertEqual(db.connection.execute("SELECT COUNT(*) FROM pull_history").fetchone()[0], 40)
+        self.assertEqual(banner_row(db)[0], 0)
+
+        recover = db.recover_banner_writes()
+        self.assertTrue(recover.success)
+        self.assertEqual(recover.data, 1)
+        pity, timestamp, pull_id = newest_pull(db)
+        self.assertEqual(pity, 40)
+        self.assertEqual(banner_row(db), (pity, timestamp, pull_id))
+
+        # second run has nothing left to do
+        self.assertEqual(db.recover_banner_writes().data, 0)
+
+    def test_recovery_keeps_pity_set_by_hand(self):
+        db = new_database(self.path)
+        self.addCleanup(db.close_db)
+        db.add_pull("x", 1, 12, None)
+        db.update_banner_pity(1, 3)
+
+        self.assertEqual(db.recover_banner_writes().data, 0)
+        self.assertEqual(banner_row(db)[0], 3)
+
+    def test_restore_migrates_old_backup(self):
+        backup_dir = os.path.join(self.tmp.name, "backups")
+        os.makedirs(backup_dir)
+
+        # a v11 backup (before banners.last_pull_id) with pulls its banner never got
+        old = sqlite3.connect(os.path.join(backup_dir, "data-20240101-000000.db"))
+        cur = old.cursor()
+        for version, _, step in MIGRATIONS:
+            if version > 11:
+                break
+            cur.execute("BEGIN")
+            step(cur)
+            cur.execute(f"PRAGMA user_version = {version}")
+            old.commit()
+        cur.execute("INSERT INTO games (game_name, channel_id) VALUES ('old game', '1')")
+        cur.execute("INSERT INTO banners (game_id, banner_name, current_pity, max_pity) VALUES (1, 'old banner', 7, 90)")
+        cur.executemany("INSERT INTO pull_history (banner_id, game_id, entry_name, pity) VALUES (1, 1, 'x', ?)", [(5,), (7,)])
+        old.commit()
+        old.close()
+
+        db = new_database(self.path)
+        self.addCleanup(db.close_db)
+        db.add_pull("x", 1, 4, None)
+
+        restore = Backup_Service(db, backup_dir).restore_backup("data-20240101-000000.db")
+        self.assertTrue(restore.success, restore.error)
+        # buffered write of the replaced data is gone, the restored banner is the backup's
+        self.assertEqual(db.pending_banners, {})
+        self.assertEqual(db.connection.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+        self.assertEqual(db.connection.execute("SELECT banner_name, current_pity FROM banners").fetchall(), [("old banner", 7)])
+        self.assertEqual(db.connection.execute("SELECT pull_count, pity_total FROM banner_summary").fetchone(), (2, 12))
+        self.assertEqual(db.connection.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+
+    def test_failed_restore_leaves_live_database(self):
+        backup_dir = os.path.join(self.tmp.name, "backups")
+        os.makedirs(backup_dir)
+        # passes the integrity check, but the migrations cant run on it
+        broken = sqlite3.connect(os.path.join(backup_dir, "data-20240101-000000.db"))
+        broken.execute("CREATE TABLE banners (junk TEXT)")
+        broken.execute("PRAGMA user_version = 11")
+        broken.commit()
+        broken.close()
+
+        db = new_database(self.path)
+        self.addCleanup(db.close_db)
+        db.add_pull("x", 1, 4, None)
+
+        restore = Backup_Service(db, backup_dir).restore_backup("data-20240101-000000.db")
+        self.assertFalse(restore.success)
+        self.assertEqual(db.connection.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+        self.assertEqual(db.get_banner(1).data[3], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager, coin_flip_outcome
+
+
+class Coin_Flip_Test(unittest.TestCase):
+    def test_whole_words_only(self):
+        for notes in ("twin", "wonderful", "window", "lossless", "closet", "", None):
+            self.assertIsNone(coin_flip_outcome(notes), notes)
+
+    def test_outcomes(self):
+        self.assertEqual(coin_flip_outcome("Won the 50/50"), 1)
+        self.assertEqual(coin_flip_outcome("win!"), 1)
+        self.assertEqual(coin_flip_outcome("lost 50/50 :("), 0)
+        self.assertEqual(coin_flip_outcome("loss, next one is guaranteed"), 2)
+        self.assertEqual(coin_flip_outcome("guarantee"), 2)
+        # lost beats won like before
+        self.assertEqual(coin_flip_outcome("won then lost"), 0)
+
+    def test_queries_use_it(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, "data.db"))
+            db.connect_db()
+            db.migrate()
+            db.add_games("game", "1")
+            db.add_banner(1, "banner", 0, 90)
+            db.add_pulls(1, [("a", 70, "lost"), ("b", 80, "twin"), ("c", 10, "window seat")])
+            db.flush_banner_writes()
+
+            self.assertEqual([row[1] for row in db.get_pity_column(1).data], [0, None, None])
+            # the twin / window pulls dont count, the last real 50/50 was the loss
+            self.assertEqual(db.get_last_coin_flip(1).data, 0)
+            db.close_db()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager
+from services.currency_service import Currency_Service
+
+
+class Currency_Income_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "data.db"))
+        self.db.connect_db()
+        self.db.migrate()
+        self.db.add_games("game", "1")
+        self.db.add_game_currency(1, 0, 0)
+        self.service = Currency_Service(self.db)
+        self.today = datetime.now(timezone.utc).date()
+
+    def tearDown(self):
+        self.db.close_db()
+        self.tmp.cleanup()
+
+    def add_day(self, days_ago, added=0, spent=0):
+        day = (self.today - timedelta(days=days_ago)).isoformat()
+        with self.db.connection:
+            self.db.connection.execute(
+                "INSERT INTO currency_daily (game_id, day, added, spent) VALUES (1, ?, ?, ?)",
+                (day, added, spent)
+            )
+
+    def test_rate_uses_the_first_logged_day(self):
+        # logging started 60 days ago, the only activity this month was 5 days ago
+        self.add_day(60, added=100)
+        self.add_day(4, added=300)
+
+        income = self.service.get_income(1)
+        self.assertTrue(income.success)
+        self.assertEqual(income.data["Monthly"]["Net"], 300)
+        self.assertEqual(income.data["Monthly"]["Per_Day"], 10.0)
+        self.assertEqual(income.data["Weekly"]["Per_Day"], round(300 / 7, 1))
+
+    def test_rate_of_a_new_game_counts_only_logged_days(self):
+        self.add_day(1, added=40)
+
+        income = self.service.get_income(1)
+        self.assertEqual(income.data["Monthly"]["Per_Day"], 20.0)
+
+    def test_pull_tokens_stay_out_of_the_income(self):
+        self.service.update_currency_amount(1, 500, "daily")
+        self.service.update_currency_token(1, 20, "event")
+        self.service.update_currency_token(1, 5, "pulled")
+
+        income = self.service.get_income(1)
+        self.assertEqual(income.data["Monthly"]["Added"], 500)
+        self.assertEqual(income.data["Monthly"]["Spent"], 0)
+        units = self.db.connection.execute("SELECT unit, COUNT(*) FROM currency_logs GROUP BY unit ORDER BY unit").fetchall()
+        self.assertEqual(units, [("currency", 1), ("token", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import discord
+from discord.ext import commands
+from commands.export_commands import setup_export_commands
+from database_manager import DatabaseManager
+from help import Result
+from services.export_service import Export_Service
+
+
+class Export_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "data.db"))
+        self.db.connect_db()
+        self.db.migrate()
+        self.db.add_games("game", "1")
+        self.export = Export_Service(self.db)
+        self.path = os.path.join(self.tmp.name, "out.csv")
+
+    def tearDown(self):
+        self.db.close_db()
+        self.tmp.cleanup()
+
+    def test_game_id_on_a_table_without_games(self):
+        for table in ("sessions", "session_breaks"):
+            result = self.export.export_table(table, "csv", self.path, game_id=1)
+            self.assertFalse(result.success)
+            self.assertEqual(result.error, None)
+            self.assertIn("per game", result.message)
+        self.assertTrue(self.export.export_table("sessions", "csv", self.path).success)
+
+    def test_sqlite_error_while_streaming(self):
+        def rows():
+            yield (1, "a")
+            raise sqlite3.OperationalError("database disk image is malformed")
+
+        opened = Result.ok(code="EXPORT_STREAM_OPENED", message="", data={"columns": ["id", "name"], "rows": rows()})
+        with mock.patch.object(self.db, "stream_table", return_value=opened):
+            result = self.export.export_table("pull_history", "csv", self.path)
+        self.assertFalse(result.success)
+        self.assertEqual(result.code, "FAILED_EXPORTING_TABLE")
+        self.assertIn("malformed", result.error)
+
+
+class Fake_Context:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+
+
+class Export_Command_Test(unittest.TestCase):
+    def test_bad_table_or_format_never_reaches_the_filesystem(self):
+        bot = commands.Bot(command_prefix=".", intents=discord.Intents.none())
+        setup_export_commands(bot, service=None)
+        export = bot.get_command("export").callback
+
+        for table, file_format in (("../../somewhere/x", "csv"), ("pull_history", "a/b"), ("pull_history", "exe"), (None, "csv")):
+            ctx = Fake_Context()
+            with mock.patch("tempfile.mkstemp") as mkstemp:
+                asyncio.run(export(ctx, table, file_format))
+            mkstemp.assert_not_called()
+            self.assertIn("Command Format", ctx.sent[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
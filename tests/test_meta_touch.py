@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager, META_TOUCH
+
+
+class Meta_Touch_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "data.db"))
+        self.db.connect_db()
+        self.db.migrate()
+        self.db.add_games("game", "1")
+        self.db.add_banner(1, "banner", 0, 90)
+        self.reset()
+
+    def tearDown(self):
+        self.db.close_db()
+        self.tmp.cleanup()
+
+    def reset(self):
+        connection = self.db.connection
+        connection.touch_sql = None
+        with connection:
+            connection.execute("UPDATE meta SET last_modified = 0 WHERE id = 1")
+        connection.touch_sql = META_TOUCH
+
+    def last_modified(self):
+        return self.db.connection.execute("SELECT last_modified FROM meta WHERE id = 1").fetchone()[0]
+
+    def test_write_touches_meta_once(self):
+        before = self.db.connection.total_changes
+        self.assertTrue(self.db.update_banner_pity(1, 5).success)
+        self.assertGreater(self.last_modified(), 0)
+        # the banner row + the touch
+        self.assertEqual(self.db.connection.total_changes - before, 2)
+
+    def test_write_that_changed_nothing_leaves_meta(self):
+        self.assertFalse(self.db.update_banner_pity(99, 5).success)
+        self.assertFalse(self.db.add_games("game", "1").success)
+        with self.db.connection:
+            self.db.connection.execute("UPDATE banners SET max_pity = 1 WHERE banner_id = -1")
+        self.assertEqual(self.last_modified(), 0)
+
+    def test_rolled_back_write_leaves_meta(self):
+        with self.assertRaises(ValueError):
+            with self.db.connection:
+                self.db.connection.execute("UPDATE banners SET max_pity = 1")
+                raise ValueError
+        with self.db.connection:
+            self.db.connection.execute("UPDATE banners SET max_pity = 1 WHERE banner_id = -1")
+        self.assertEqual(self.last_modified(), 0)
+
+    def test_reconnect_keeps_touching_meta(self):
+        # the .connect command: connect_db again on a running bot, no migrate
+        self.db.add_pull("x", 1, 5, None)
+        self.assertEqual(len(self.db.pending_banners), 1)
+        old = self.db.connection
+        self.assertTrue(self.db.connect_db().success)
+        self.assertIsNot(self.db.connection, old)
+        self.assertEqual(self.db.connection.touch_sql, META_TOUCH)
+        # the old connection was flushed and closed, not just dropped
+        self.assertEqual(self.db.pending_banners, {})
+        self.assertEqual(self.db.get_banner(1).data[3], 5)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            old.execute("SELECT 1")
+
+        self.reset()
+        self.assertTrue(self.db.add_games("other", "2").success)
+        self.assertGreater(self.last_modified(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
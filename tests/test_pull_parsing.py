@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.pull_service import Pull_Service
+
+
+class Pull_Parsing_Test(unittest.TestCase):
+    def setUp(self):
+        # parsing / validation never reaches the db
+        self.service = Pull_Service(None)
+
+    def test_block(self):
+        parsed = self.service.parse_pulls("entry_name, pity, notes\nA, 10\nB, 80, lost")
+        self.assertTrue(parsed.success)
+        self.assertEqual(parsed.data, [("A", 10, None), ("B", 80, "lost")])
+
+    def test_pity_below_one_reports_the_line(self):
+        for pity in ("0", "-3"):
+            parsed = self.service.parse_pulls(f"A, 10\nB, {pity}")
+            self.assertFalse(parsed.success)
+            self.assertEqual(parsed.code, "INVALID_PULL_ROW")
+            self.assertIn("Line 2", parsed.message)
+
+        parsed = self.service.parse_pulls('[{"entry_name": "A", "pity": 0}]', "pulls.json")
+        self.assertFalse(parsed.success)
+        self.assertIn("Line 1", parsed.message)
+
+    def test_single_pull_same_rule(self):
+        for pity in ("0", "-1", "x"):
+            added = self.service.add_pull_to_banner("A", 1, pity)
+            self.assertFalse(added.success)
+            self.assertEqual(added.code, "INVALID_PITY")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager
+from services.settings_service import Setting_Service
+from UI.SelectionMenu import SelectionMenu
+from UI.TableView import PaginatedTable
+
+
+class Settings_Subscribers_Test(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "data.db"))
+        self.db.connect_db()
+        self.db.migrate()
+        self.db.init_settings()
+        self.settings = Setting_Service(self.db)
+        self.settings.update_pagination(5)
+
+    async def asyncTearDown(self):
+        self.db.close_db()
+        self.tmp.cleanup()
+
+    async def change(self, *args):
+        # the commands change settings on the db thread, not the loop
+        result = await asyncio.to_thread(*args)
+        self.assertTrue(result.success)
+        await asyncio.sleep(0)
+
+    async def test_table_repages_on_page_size_change(self):
+        items = [{"n": i} for i in range(20)]
+        table = PaginatedTable(self.settings, items, guild_id=1)
+        table.page = 2
+        self.assertIn("10", table.build_embed().description)
+
+        await self.change(self.settings.update_pagination, 10, 1)
+        self.assertEqual(table.ITEMS_PER_PAGE, 10)
+        self.assertEqual((table.page, table.max_page), (1, 1))
+        # not the text cached for the old page 1
+        description = table.build_embed().description
+        self.assertIn("19", description)
+        self.assertIn("10", description)
+
+        # another server's change leaves it alone
+        await self.change(self.settings.update_pagination, 3, 2)
+        self.assertEqual(table.ITEMS_PER_PAGE, 10)
+
+        await table.on_timeout()
+        self.assertEqual(self.settings.subscribers, [])
+
+    async def test_menu_follows_the_global_size(self):
+        menu = SelectionMenu(None, self.settings, [f"item {i}" for i in range(12)], guild_id=1)
+        menu.current_page = 2
+        await self.change(self.settings.update_pagination, 4)
+        self.assertEqual((menu.items_per_page, menu.current_page), (4, 2))
+        self.assertEqual(menu.page_items(), ["item 8", "item 9", "item 10", "item 11"])
+        await menu.on_timeout()
+        self.assertEqual(self.settings.subscribers, [])
+
+    async def test_menu_without_timeout_is_not_kept_alive(self):
+        # the .listgame / .banners menus: nobody calls on_timeout on a timeout=None view
+        menu = SelectionMenu(None, self.settings, [f"item {i}" for i in range(12)], guild_id=1, timeout=None)
+        calls = []
+        menu.set_page_size = calls.append
+        self.assertEqual(len(self.settings.subscribers), 1)
+        del menu
+        gc.collect()
+
+        await self.change(self.settings.update_pagination, 4)
+        self.assertEqual(calls, [])
+        self.assertEqual(self.settings.subscribers, [])
+
+    async def test_stop_unsubscribes(self):
+        menu = SelectionMenu(None, self.settings, ["a", "b"], guild_id=1, timeout=None)
+        table = PaginatedTable(self.settings, [{"n": 1}], guild_id=1)
+        menu.stop()
+        table.stop()
+        self.assertEqual(self.settings.subscribers, [])
+
+    async def test_page_size_fits_a_selection_menu(self):
+        self.assertFalse(self.settings.update_pagination(24).success)
+        self.assertTrue(self.settings.update_pagination(23).success)
+        # every item button + the nav buttons, discord raises past 25
+        menu = SelectionMenu(None, self.settings, [f"item {i}" for i in range(40)], timeout=None)
+        self.assertEqual(len(menu.children), 25)
+        menu.stop()
+
+        # a size saved before the cap is read back capped
+        self.db.update_pagination(25)
+        self.db.update_guild_settings("1", 25, "{}")
+        self.settings.get_all_settings()
+        self.assertEqual((self.settings.page_size(), self.settings.page_size(1)), (23, 23))
+
+    async def test_feature_flags(self):
+        self.assertTrue(self.settings.feature_enabled("sim", 1, default=True))
+        await self.change(self.settings.set_feature, "sim", False, 1)
+        self.assertFalse(self.settings.feature_enabled("sim", 1, default=True))
+        self.assertTrue(self.settings.feature_enabled("sim", 2, default=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database_manager import DatabaseManager
+from services import shard_router
+from services.shard_router import Shard_Router, enter_guild, hold_guild, split_database
+
+
+class Shard_Router_Test(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.router = Shard_Router(os.path.join(self.tmp.name, "shards"), max_open=2, backup_dir=os.path.join(self.tmp.name, "backups"))
+
+    def tearDown(self):
+        self.router.close(wait=True)
+        self.tmp.cleanup()
+
+    async def in_guild(self, guild_id, func):
+        # one command: its own task, like discord.py runs them
+        async def command():
+            await enter_guild(guild_id)
+            return await func()
+        return await asyncio.create_task(command())
+
+    async def test_shard_opens_off_the_event_loop(self):
+        threads = []
+        real_open = shard_router.open_shard
+
+        def open_shard(*args):
+            threads.append(threading.current_thread())
+            return real_open(*args)
+
+        shard_router.open_shard = open_shard
+        try:
+            await self.in_guild(1, lambda: self.router.run(self.router.db.get_shard_summary))
+        finally:
+            shard_router.open_shard = real_open
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    async def test_concurrent_first_use_opens_once(self):
+        results = await asyncio.gather(*(
+            self.in_guild(1, lambda: self.router.run(id, self.router.db)) for _ in range(10)
+        ))
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(list(self.router.shards), ["guild-1"])
+
+    async def test_pinned_shard_is_not_evicted(self):
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def slow_command():
+            shard = self.router.current()
+            started.set()
+            await finish.wait()
+            return await shard.run(shard.db.get_shard_summary)
+
+        slow = asyncio.create_task(self.in_guild(1, slow_command))
+        await started.wait()
+        # two more guilds with max_open=2, guild 1 is the oldest but still in use
+        for guild_id in (2, 3):
+            await self.in_guild(guild_id, lambda: self.router.run(self.router.db.get_shard_summary))
+        self.assertIn("guild-1", self.router.shards)
+
+        finish.set()
+        self.assertTrue((await slow).success)
+        # once released the oldest unpinned ones go
+        await asyncio.sleep(0)
+        self.assertLessEqual(len(self.router.shards), 2)
+
+    async def test_view_hold_outlives_the_command(self):
+        release = await self.in_guild(1, lambda: asyncio.sleep(0, hold_guild(1)))
+        for guild_id in (2, 3, 4):
+            await self.in_guild(guild_id, lambda: self.router.run(self.router.db.get_shard_summary))
+        self.assertIn("guild-1", self.router.shards)
+
+        release()
+        release()
+        await self.in_guild(5, lambda: self.router.run(self.router.db.get_shard_summary))
+        self.assertNotIn("guild-1", self.router.shards)
+        # the command's own pin goes with its task's done callback
+        await asyncio.sleep(0)
+        self.assertEqual(self.router.pins, {})
+
+    async def test_walk_does_not_evict_the_hot_shards(self):
+        for guild_id in (1, 2, 3, 4):
+            await self.in_guild(guild_id, lambda: self.router.run(self.router.db.get_shard_summary))
+        hot = list(self.router.shards)
+        self.assertEqual(hot, ["guild-3", "guild-4"])
+
+        results = await self.router.aggregate(lambda shard: shard.db.get_shard_summary())
+        self.assertEqual(sorted(results), ["guild-1", "guild-2", "guild-3", "guild-4"])
+        self.assertEqual(list(self.router.shards), hot)
+
+    async def test_evicted_shard_reopens_with_its_data(self):
+        async def add_game():
+            return await self.router.run(self.router.db.add_games, "game", "10")
+
+        self.assertTrue((await self.in_guild(1, add_game)).success)
+        for guild_id in (2, 3):
+            await self.in_guild(guild_id, lambda: self.router.run(self.router.db.get_shard_summary))
+        self.assertNotIn("guild-1", self.router.shards)
+
+        summary = await self.in_guild(1, lambda: self.router.run(self.router.db.get_shard_summary))
+        self.assertEqual(summary.data["games"], 1)
+
+    def test_current_without_enter_guild_fails(self):
+        with self.assertRaises(RuntimeError):
+            self.router.current()
+
+
+class Split_Database_Test(unittest.TestCase):
+    def test_bad_guild_id_writes_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "data.db")
+            db = DatabaseManager(source)
+            db.connect_db()
+            db.migrate()
+            db.close_db()
+
+            out = os.path.join(tmp, "shards")
+            split = split_database(source, out, {"123": ["1"], "not a guild": ["2"]})
+            self.assertFalse(split.success)
+            self.assertEqual(split.code, "INVALID_GUILD_ID")
+            self.assertFalse(os.path.exists(out) and os.listdir(out))
+
+
+if __name__ == "__main__":
+    unittest.main()